@@ -0,0 +1,8 @@
+"""
+Benchmarks of the hot paths: winner detection, move generation, whole random games through the engine, search and
+position database I/O.  Every case is seeded and timed as the best of a few repeats; results are written as JSON and
+compared with a baseline file, anything slower than the baseline by more than the tolerance counts as a regression.
+
+    PYTHONPATH=library/src python -m benchmarks --save-baseline
+    PYTHONPATH=library/src python -m benchmarks --baseline benchmarks/baseline.json
+"""
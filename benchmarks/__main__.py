@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from benchmarks import cases  # noqa: F401  registers the cases
+from benchmarks.core import CASES, Result, compare, format_seconds, load, run, save
+
+HOME = os.path.dirname(__file__)
+BASELINE = os.path.join(HOME, 'baseline.json')
+RESULTS = os.path.join(HOME, 'results.json')
+
+
+def report(result: Result) -> None:
+    counters = ', '.join(f'{key} {value}' for key, value in result.counters.items())
+    print(f'{result.name:<32} {format_seconds(result.seconds_per_op):>12}/op {result.ops_per_second:>14,.1f} ops/s'
+          + (f'  ({counters})' if counters else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Times the hot paths of tic_tac_toe')
+    parser.add_argument('only', nargs='*', help='run only the cases whose names start with these prefixes')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    parser.add_argument('--out', default=RESULTS, help='where to write the results as JSON')
+    parser.add_argument('--baseline', default=BASELINE, help='results to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to the baseline file too')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='slowdown against the baseline that counts as a regression, 0.25 being 25%%')
+    args = parser.parse_args()
+    if args.list:
+        print('\n'.join(CASES))
+        return
+
+    results = run(args.only, report=report)
+    save(args.out, results)
+    print(f'results written to {args.out}')
+    if args.save_baseline:
+        save(args.baseline, results)
+        print(f'baseline written to {args.baseline}')
+        return
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}, rerun with --save-baseline to create one')
+        return
+
+    regressions = 0
+    print(f'\ncompared with {args.baseline}:')
+    for comparison in compare(results, load(args.baseline)):
+        regressed = comparison.ratio > 1 + args.tolerance
+        regressions += regressed
+        print(f'{comparison.name:<32} {format_seconds(comparison.baseline):>12} -> '
+              f'{format_seconds(comparison.current):>12} {comparison.ratio:6.2f}x'
+              + ('  REGRESSION' if regressed else ''))
+    if regressions:
+        sys.exit(f'{regressions} regression(s) beyond {args.tolerance:.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+the benchmark cases.  Inputs are built from fixed seeds in the setup functions, outside the timing
+"""
+from __future__ import annotations
+
+import os
+import random
+import tempfile
+
+from benchmarks.core import benchmark
+from tic_tac_toe.game.engine import TicTacToe
+from tic_tac_toe.game.players import RandomComputerPlayer
+from tic_tac_toe.game.renderers import NullRenderer
+from tic_tac_toe.logic.bitboard import cells_to_bits, get_geometry
+from tic_tac_toe.logic.minimax import NegamaxSearch, TranspositionTable
+from tic_tac_toe.logic.models import GameState, Grid, Mark, state_cache
+from tic_tac_toe.logic.positiondb import PositionDB, mark_range, write_position_db
+from tic_tac_toe.logic.solver import Solver
+from tic_tac_toe.one_time.convert_seq_db import DB_HOME, RESULT_CODES, read_seq_db
+
+STATES = 1000
+CONFIGS = {'3x3': (3, 3), '5x5': (5, 4)}
+SEQ_DB = os.path.join(DB_HOME, 'seq_db_X_6_O_6')
+
+
+def random_grids(size: int, winning_len: int, count: int, seed: int = 0) -> list[Grid]:
+    """grids after a random number of random moves, X starting"""
+    rng = random.Random(seed)
+    grids = []
+    for _ in range(count):
+        cells = rng.sample(range(size ** 2), rng.randint(0, size ** 2))
+        x_bits = sum(1 << cell for cell in cells[0::2])
+        o_bits = sum(1 << cell for cell in cells[1::2])
+        grids.append(Grid.from_bits(size, x_bits, o_bits, winning_len))
+    return grids
+
+
+def register_state_cases(label: str, size: int, winning_len: int) -> None:
+    @benchmark(f'winner/{label}', ops=STATES)
+    def winner():
+        grids = random_grids(size, winning_len, STATES)
+
+        def timed():
+            # a fresh state each time, so the winner is really worked out
+            return {'wins': sum(1 for grid in grids if GameState(grid).winner is not None)}
+        return timed
+
+    @benchmark(f'possible_moves/{label}', ops=STATES)
+    def possible_moves():
+        states = [GameState(grid) for grid in random_grids(size, winning_len, STATES, seed=1)]
+
+        def timed():
+            state_cache.clear()
+            return {'moves': sum(len(state.possible_moves) for state in states)}
+        return timed
+
+    @benchmark(f'legal_cells/{label}', ops=STATES)
+    def legal_cells():
+        grids = random_grids(size, winning_len, STATES, seed=1)
+
+        def timed():
+            return {'moves': sum(len(GameState(grid).legal_cells) for grid in grids)}
+        return timed
+
+
+def register_game_cases(label: str, size: int, winning_len: int, games: int) -> None:
+    @benchmark(f'random_games/{label}', ops=games)
+    def random_games():
+        game = TicTacToe(player1=RandomComputerPlayer('random-X', Mark.CROSS, delay_seconds=0),
+                         player2=RandomComputerPlayer('random-O', Mark.NAUGHT, delay_seconds=0),
+                         renderer=NullRenderer(), size=size, winning_len=winning_len)
+
+        def timed():
+            random.seed(0)
+            state_cache.clear()
+            for _ in range(games):
+                game.play()
+        return timed
+
+
+for config_label, (config_size, config_winning_len) in CONFIGS.items():
+    register_state_cases(config_label, config_size, config_winning_len)
+register_game_cases('3x3', 3, 3, games=500)
+register_game_cases('5x5', 5, 4, games=100)
+
+
+@benchmark('negamax_solve/3x3')
+def negamax_solve_3x3():
+    geometry = get_geometry(3, 3)
+
+    def timed():
+        result = NegamaxSearch(geometry, table=TranspositionTable()).search(0, 0)
+        return {'nodes': result.nodes, 'score': result.score, 'depth': result.depth}
+    return timed
+
+
+@benchmark('negamax_depth4/5x5')
+def negamax_depth4_5x5():
+    geometry = get_geometry(5, 4)
+
+    def timed():
+        result = NegamaxSearch(geometry, table=TranspositionTable(), max_depth=4).search(0, 0)
+        return {'nodes': result.nodes, 'score': result.score, 'depth': result.depth}
+    return timed
+
+
+@benchmark('solver/3x3')
+def solver_3x3():
+    geometry = get_geometry(3, 3)
+
+    def timed():
+        result = Solver(geometry).solve(0, 0)
+        return {'nodes': result.nodes, 'positions': result.positions}
+    return timed
+
+
+@benchmark('seq_db_load/X_6_O_6')
+def seq_db_load():
+    def timed():
+        return {'rows': len(read_seq_db(SEQ_DB))}
+    return timed
+
+
+@benchmark('position_db_lookup/X_6_O_6', repeat=3)
+def position_db_lookup():
+    """every pickled sequence looked up in the converted binary database, opening included"""
+    cell_count = 25
+    rows = read_seq_db(SEQ_DB)
+    boards = [cells_to_bits(''.join(row.seq).ljust(cell_count)) for row in rows]
+    f_name = os.path.join(tempfile.mkdtemp(prefix='benchmarks-'), 'seq_db_X_6_O_6.ttdb')
+    records = [(board, RESULT_CODES[row.win_loss]) for board, row in zip(boards, rows)]
+    first_depth, depth = mark_range(records)
+    write_position_db(f_name, size=5, winning_len=4, depth=depth, records=records, first_depth=first_depth)
+
+    def timed():
+        with PositionDB(f_name) as position_db:
+            found = sum(1 for x_bits, o_bits in boards if position_db.lookup(x_bits, o_bits) is not None)
+        return {'lookups': len(boards), 'found': found}
+    return timed
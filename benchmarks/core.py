@@ -0,0 +1,111 @@
+"""
+registry, timing and baseline comparison for the benchmark cases
+"""
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+REPEAT = 5
+
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Callable[[], dict | None]]  # returns the timed callable, which may report counters
+    ops: int  # operations per call of the timed callable
+    repeat: int = REPEAT
+
+
+@dataclass
+class Result:
+    name: str
+    seconds_per_op: float  # best over the repeats
+    ops: int
+    counters: dict = field(default_factory=dict)
+
+    @property
+    def ops_per_second(self) -> float:
+        return 1 / self.seconds_per_op if self.seconds_per_op else 0.0
+
+
+CASES: dict[str, Case] = {}
+
+
+def benchmark(name: str, ops: int = 1, repeat: int = REPEAT):
+    """registers a setup function: it prepares its inputs untimed and returns the callable to time"""
+    def register(setup: Callable[[], Callable[[], dict | None]]):
+        CASES[name] = Case(name=name, setup=setup, ops=ops, repeat=repeat)
+        return setup
+    return register
+
+
+def run_case(case: Case) -> Result:
+    timed = case.setup()
+    best = float('inf')
+    counters: dict = {}
+    for _ in range(case.repeat):
+        started = time.perf_counter()
+        counters = timed() or {}
+        best = min(best, time.perf_counter() - started)
+    return Result(name=case.name, seconds_per_op=best / case.ops, ops=case.ops, counters=counters)
+
+
+def run(selected: list[str] | None = None, report: Callable[[Result], None] | None = None) -> list[Result]:
+    results = []
+    for name, case in CASES.items():
+        if selected and not any(name.startswith(prefix) for prefix in selected):
+            continue
+        result = run_case(case)
+        results.append(result)
+        if report:
+            report(result)
+    return results
+
+
+def environment() -> dict:
+    return {'python': sys.version.split()[0], 'implementation': platform.python_implementation(),
+            'machine': platform.machine(), 'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def save(f_name: str, results: list[Result]) -> None:
+    document = {'environment': environment(),
+                'results': {result.name: {'seconds_per_op': result.seconds_per_op, 'ops': result.ops,
+                                          'counters': result.counters} for result in results}}
+    with open(f_name, 'w') as results_file:
+        json.dump(document, results_file, indent=2)
+
+
+def load(f_name: str) -> dict[str, dict]:
+    with open(f_name) as results_file:
+        return json.load(results_file)['results']
+
+
+@dataclass(frozen=True)
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float('inf')
+
+
+def compare(results: list[Result], baseline: dict[str, dict]) -> list[Comparison]:
+    """current against baseline seconds per op, for the cases present in both"""
+    return [Comparison(name=result.name, baseline=baseline[result.name]['seconds_per_op'],
+                       current=result.seconds_per_op)
+            for result in results if result.name in baseline]
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f'{seconds / scale:.3f}{unit}'
+    return f'{seconds / 1e-9:.1f}ns'
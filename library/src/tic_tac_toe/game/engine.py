@@ -1,13 +1,38 @@
+import time
 from dataclasses import dataclass
-from tic_tac_toe.game.players import Player, RandomComputerPlayer
-from tic_tac_toe.game.renderers import Renderer, ConsoleRenderer
+from tic_tac_toe.game.players import AsyncPlayer, Player, RandomComputerPlayer
+from tic_tac_toe.game.renderers import AsyncRenderer, Renderer, IncrementalRenderer
+from tic_tac_toe.logic.bitboard import get_geometry
 from tic_tac_toe.logic.exceptions import InvalidMove
 from tic_tac_toe.logic.models import GameState, Grid, Mark
 from tic_tac_toe.logic.validators import validate_players
 from typing import TypeAlias, Callable
 from tic_tac_toe.logic.params import SIZE, WINNING_LEN
+from tic_tac_toe.logic.records import GameRecorder
+from tic_tac_toe.logic.stats import HUMAN, SearchStats
 
 ErrorHandler: TypeAlias = Callable[[Exception], None]
+MoveHook: TypeAlias = Callable[[SearchStats], None]
+
+
+def move_stats(player, before: GameState, after: GameState, seconds: float) -> SearchStats:
+    """
+    the stats of the move from before to after: the player's own when it keeps them (computer players do), otherwise
+    just the move and the wall time it took, waiting for a human included
+    """
+    stats = getattr(player, 'last_stats', None)
+    ply = before.grid.board.bit_count()
+    if stats is not None and stats.ply == ply:
+        return stats
+    return SearchStats(player=player.name, mark=player.mark.value, ply=ply, move=moved_cell(before, after),
+                       source=HUMAN, seconds=seconds)
+
+
+def moved_cell(before: GameState, after: GameState) -> int:
+    """the cell marked between two consecutive game states"""
+    before_x, before_o = before.grid.bits
+    after_x, after_o = after.grid.bits
+    return ((after_x | after_o) ^ (before_x | before_o)).bit_length() - 1
 
 
 @dataclass(frozen=True)
@@ -16,29 +41,104 @@ class TicTacToe:
     player2: Player
     renderer: "Renderer"
     error_handler: ErrorHandler | None = None
+    size: int = SIZE
+    winning_len: int = WINNING_LEN
+    move_hook: MoveHook | None = None  # called with the SearchStats of every move
+    recorder: GameRecorder | None = None  # finished games are appended to its log
 
     def __post_init__(self):
         validate_players(self.player1, self.player2)
+        get_geometry(self.size, self.winning_len)  # builds, or reuses, the configuration's lines up front
 
-    def play(self, starting_mark: Mark = Mark.CROSS) -> None:
-        game_state = GameState(grid=Grid(size=SIZE, cells=Grid.cells, winning_len=WINNING_LEN),
+    def play(self, starting_mark: Mark = Mark.CROSS) -> GameState:
+        game_state = GameState(grid=Grid(size=self.size, winning_len=self.winning_len),
                                starting_mark=starting_mark)
         # blank start
+        moves: list[int] = []
         while True:
             self.renderer.render(game_state)
             if game_state.game_over:
-                break
+                if self.recorder:
+                    self.record(game_state, moves)
+                return game_state
             player = self.get_current_player(game_state)
             try:
-                game_state = player.make_move(game_state)
+                started = time.perf_counter()
+                next_state = player.make_move(game_state)
             except InvalidMove as ex:
                 if self.error_handler:
                     self.error_handler(ex)
                 else:
                     raise InvalidMove('Invalid move attempted')
+            else:
+                if self.move_hook:
+                    self.move_hook(move_stats(player, game_state, next_state, time.perf_counter() - started))
+                if self.recorder:
+                    moves.append(moved_cell(game_state, next_state))
+                game_state = next_state
 
     # end of play 
 
+    def record(self, game_state: GameState, moves: list[int]) -> None:
+        players = {self.player1.mark: self.player1.name, self.player2.mark: self.player2.name}
+        self.recorder.write_game(game_state, moves, player_x=players[Mark.CROSS], player_o=players[Mark.NAUGHT])
+
+    def get_current_player(self, game_state):
+        if game_state.current_mark is self.player1.mark:
+            return self.player1
+        else:
+            return self.player2
+
+
+@dataclass(frozen=True)
+class AsyncTicTacToe:
+    """
+    TicTacToe for an event loop: the same game loop over AsyncPlayers and an AsyncRenderer, so many games can run
+    side by side as tasks.  play returns the final game state
+    """
+    player1: AsyncPlayer
+    player2: AsyncPlayer
+    renderer: AsyncRenderer
+    error_handler: ErrorHandler | None = None
+    size: int = SIZE
+    winning_len: int = WINNING_LEN
+    move_hook: MoveHook | None = None
+    recorder: GameRecorder | None = None
+
+    def __post_init__(self):
+        validate_players(self.player1, self.player2)
+        get_geometry(self.size, self.winning_len)
+
+    async def play(self, starting_mark: Mark = Mark.CROSS) -> GameState:
+        game_state = GameState(grid=Grid(size=self.size, winning_len=self.winning_len),
+                               starting_mark=starting_mark)
+        moves: list[int] = []
+        while True:
+            await self.renderer.render(game_state)
+            if game_state.game_over:
+                if self.recorder:
+                    self.record(game_state, moves)
+                return game_state
+            player = self.get_current_player(game_state)
+            try:
+                started = time.perf_counter()
+                next_state = await player.make_move(game_state)
+            except InvalidMove as ex:
+                if self.error_handler:
+                    self.error_handler(ex)
+                else:
+                    raise InvalidMove('Invalid move attempted')
+            else:
+                if self.move_hook:
+                    self.move_hook(move_stats(player, game_state, next_state, time.perf_counter() - started))
+                if self.recorder:
+                    moves.append(moved_cell(game_state, next_state))
+                game_state = next_state
+
+    def record(self, game_state: GameState, moves: list[int]) -> None:
+        players = {self.player1.mark: self.player1.name, self.player2.mark: self.player2.name}
+        self.recorder.write_game(game_state, moves, player_x=players[Mark.CROSS], player_o=players[Mark.NAUGHT])
+
     def get_current_player(self, game_state):
         if game_state.current_mark is self.player1.mark:
             return self.player1
@@ -49,7 +149,7 @@ class TicTacToe:
 def test():
     player1 = RandomComputerPlayer(name="Random1", mark=Mark("X"))
     player2 = RandomComputerPlayer(name="Random2", mark=Mark("O"))
-    t = TicTacToe(player1=player1, player2=player2, renderer=ConsoleRenderer, error_handler=None)
+    t = TicTacToe(player1=player1, player2=player2, renderer=IncrementalRenderer(), error_handler=None)
     t.play()
     return
 
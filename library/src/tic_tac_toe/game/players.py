@@ -1,15 +1,21 @@
 import abc
+import asyncio
 import time
-from random import randint, choice
+from concurrent.futures import Executor
+from random import choice
 
-from tic_tac_toe.logic.models import Grid, GameState, Mark, Move
+from tic_tac_toe.logic.book import get_opening_book
+from tic_tac_toe.logic.models import GameState, Mark, Move, state_cache
 from tic_tac_toe.logic.exceptions import InvalidMove
+from tic_tac_toe.logic.mcts import EXPLORATION, MCTS, MCTSResult, Node, find_subtree
+from tic_tac_toe.logic.minimax import NegamaxSearch, SearchResult, TranspositionTable
+from tic_tac_toe.logic.stats import BOOK, RANDOM, SEARCH, SearchStats
 from abc import ABCMeta
 
 
 class Player(metaclass=ABCMeta):
     def __init__(self, name: str, mark: Mark):
-        self.name: str = "unchristened"
+        self.name: str = name or "unchristened"
         self.mark = mark
 
     def make_move(self, game_state: GameState) -> GameState:
@@ -26,13 +32,49 @@ class Player(metaclass=ABCMeta):
 
 
 class ComputerPlayer(Player, metaclass=ABCMeta):
-    def __init__(self, name: str, mark: Mark, delay_seconds: float = 0.25) -> None:
+    def __init__(self, name: str, mark: Mark, delay_seconds: float = 0.25, book: str | None = None) -> None:
+        """book is the file name of an opening book (see one_time/build_opening_book), consulted before any search"""
         super().__init__(name=name, mark=mark)
         self.delay_seconds = delay_seconds
+        self.book = book
+        self.last_stats: SearchStats | None = None
 
     def get_move(self, game_state: GameState) -> Move | None:
-        time.sleep(self.delay_seconds)
-        return self.get_computer_move(game_state)
+        if self.delay_seconds:
+            time.sleep(self.delay_seconds)
+        return self.choose_move(game_state)
+
+    def choose_move(self, game_state: GameState) -> Move | None:
+        """the book move, or else the computer move, with what it cost recorded in last_stats"""
+        started = time.perf_counter()
+        cache_hits, cache_misses = state_cache.hits, state_cache.misses
+        if move := self.get_book_move(game_state):
+            counters = {'source': BOOK}
+        else:
+            move = self.get_computer_move(game_state)
+            counters = self.search_counters()
+        if move is not None:
+            self.last_stats = SearchStats(player=self.name, mark=self.mark.value, ply=game_state.grid.board.bit_count(),
+                                          move=move.place, seconds=time.perf_counter() - started,
+                                          cache_hits=state_cache.hits - cache_hits,
+                                          cache_misses=state_cache.misses - cache_misses, **counters)
+        return move
+
+    def search_counters(self) -> dict:
+        """SearchStats fields describing the search behind the last computer move"""
+        return {'source': SEARCH}
+
+    def get_book_move(self, game_state: GameState) -> Move | None:
+        if self.book is None or game_state.game_over:
+            return None
+        grid = game_state.grid
+        book = get_opening_book(self.book)
+        if not book.covers(grid.size, grid.winning_len):
+            return None
+        me, them = (grid.x_bits, grid.o_bits) if game_state.current_mark is Mark.CROSS \
+            else (grid.o_bits, grid.x_bits)
+        entry = book.probe(me, them)
+        return game_state.make_move_to(entry.move) if entry is not None else None
 
     @abc.abstractmethod
     def get_computer_move(self, game_state: GameState) -> Move | None:
@@ -41,44 +83,189 @@ class ComputerPlayer(Player, metaclass=ABCMeta):
 
 class RandomComputerPlayer(ComputerPlayer):
     def get_computer_move(self, game_state: GameState) -> Move | None:
-        try:
-            return choice(game_state.possible_moves)
-        except IndexError:  # takes care of empty list - when no more moves are possible
+        if game_state.game_over:
             return None
+        # pick an empty cell first and build only that one move, rather than every possible move
+        return game_state.make_move_to(choice(game_state.legal_cells))
 
-
-class MiniMaxPlayer(ComputerPlayer):
-    def get_computer_move(self, game_state: GameState) -> Move | None:
-        return None
-
-
-    def minimax(self, game_state: GameState) -> Move | None:
-        possible_moves = game_state.possible_moves
-        for move in possible_moves:
-            if move.after_gamestate.winner in [self.mark, self.mark.other()]:
-                # if winning or opponent winning in a move choose that
-                return Move
-            else:
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+    def search_counters(self) -> dict:
+        return {'source': RANDOM}
 
 
+class MiniMaxPlayer(ComputerPlayer):
+    """
+    alpha-beta negamax with a transposition table that is kept between moves.  3x3 is solved outright, larger boards
+    are deepened iteratively until the node or time budget runs out; last_result reports the depth reached and speed
+    """
+    def __init__(self, name: str, mark: Mark, delay_seconds: float = 0.25, max_nodes: int | None = None,
+                 time_limit: float | None = 1.0, max_depth: int | None = None, table_size: int = 1_000_000,
+                 book: str | None = None) -> None:
+        super().__init__(name=name, mark=mark, delay_seconds=delay_seconds, book=book)
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table_size = table_size
+        self.tables: dict[tuple[int, int], TranspositionTable] = {}
+        self.last_result: SearchResult | None = None
 
+    def get_computer_move(self, game_state: GameState) -> Move | None:
+        if game_state.game_over:
+            return None
+        grid = game_state.grid
+        table = self.tables.setdefault((grid.size, grid.winning_len), TranspositionTable(self.table_size))
+        search = NegamaxSearch(grid.geometry, table=table, max_nodes=self.max_nodes, time_limit=self.time_limit,
+                               max_depth=self.max_depth)
+        me, them = (grid.x_bits, grid.o_bits) if game_state.current_mark is Mark.CROSS \
+            else (grid.o_bits, grid.x_bits)
+        self.last_result = search.search(me, them)
+        return game_state.make_move_to(self.last_result.move)
+
+    def search_counters(self) -> dict:
+        result = self.last_result
+        return {'source': SEARCH, 'nodes': result.nodes, 'table_probes': result.table_probes,
+                'table_hits': result.table_hits, 'max_depth': result.max_ply,
+                'branching_factor': result.branching_factor}
+
+
+class MCTSPlayer(ComputerPlayer):
+    """
+    UCT Monte Carlo Tree Search within a wall clock and/or playout budget per move.  Strength and latency both grow
+    with the budget.  With reuse_tree the subtree under the position actually reached is kept for the next move
+    """
+    def __init__(self, name: str, mark: Mark, delay_seconds: float = 0.25, time_limit: float | None = 1.0,
+                 max_playouts: int | None = None, exploration: float = EXPLORATION, seed: int | None = None,
+                 reuse_tree: bool = True, book: str | None = None) -> None:
+        super().__init__(name=name, mark=mark, delay_seconds=delay_seconds, book=book)
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.seed = seed
+        self.reuse_tree = reuse_tree
+        self.engines: dict[tuple[int, int], MCTS] = {}
+        self.tree: Node | None = None
+        self.last_result: MCTSResult | None = None
 
+    def get_computer_move(self, game_state: GameState) -> Move | None:
+        if game_state.game_over:
+            return None
+        grid = game_state.grid
+        if (engine := self.engines.get((grid.size, grid.winning_len))) is None:
+            engine = MCTS(grid.geometry, time_limit=self.time_limit, max_playouts=self.max_playouts,
+                          exploration=self.exploration, seed=self.seed)
+            self.engines[(grid.size, grid.winning_len)] = engine
+            self.tree = None
+        me, them = (grid.x_bits, grid.o_bits) if game_state.current_mark is Mark.CROSS \
+            else (grid.o_bits, grid.x_bits)
+        root = find_subtree(self.tree, me, them) if self.reuse_tree else None
+        if root is None:
+            root = Node(grid.geometry, me, them)
+        self.last_result = engine.search(root)
+        if self.reuse_tree:
+            self.tree = next(child for child in root.children if child.move == self.last_result.move)
+        return game_state.make_move_to(self.last_result.move)
+
+    def search_counters(self) -> dict:
+        result = self.last_result
+        return {'source': SEARCH, 'nodes': result.playouts, 'max_depth': result.max_depth,
+                'branching_factor': result.branching_factor}
+
+
+# computer players kept in this process between moves, by key, see choose_cell
+resident_players: dict[str, ComputerPlayer] = {}
+
+
+def choose_cell(player: ComputerPlayer, game_state: GameState,
+                key: str | None = None) -> tuple[int, SearchStats | None]:
+    """
+    the cell a computer player picks, book first, without its delay, and its stats.  Module level so that it can run
+    in a worker process; only the cell and the stats travel back.  With a key the first player sent under it stays in
+    this process and plays every later call with the same key, so its transposition table or search tree carries
+    over from move to move; release_player drops it
+    """
+    if key is not None:
+        player = resident_players.setdefault(key, player)
+    move = player.choose_move(game_state)
+    return (move.place if move is not None else -1), player.last_stats
+
+
+def release_player(key: str) -> None:
+    resident_players.pop(key, None)
+
+
+class AsyncPlayer(metaclass=ABCMeta):
+    """
+    the Player interface for code running on an event loop: make_move and get_move are coroutines
+    """
+    def __init__(self, name: str, mark: Mark):
+        self.name: str = name or "unchristened"
+        self.mark = mark
 
+    async def make_move(self, game_state: GameState) -> GameState:
+        if self.mark == game_state.current_mark:
+            if move := await self.get_move(game_state):
+                return move.after_gamestate
+            raise InvalidMove("Bad move or no more moves possible")
+        else:
+            raise InvalidMove(f"Its not player {self.name} 's turn")
 
+    @abc.abstractmethod
+    async def get_move(self, game_state: GameState) -> Move | None:
+        """implemented by the actual player classes"""
 
 
+class AsyncComputerPlayer(AsyncPlayer):
+    """
+    runs a ComputerPlayer's search in an executor, a process pool in the server, so the event loop never blocks.  The
+    optional semaphore bounds how many searches are queued on the executor at once.
+    Without a key every move searches with a fresh copy of the player, as pickled into the executor.  With one the
+    copy stays in the process that ran the first move (see choose_cell) and keeps its search state, provided all moves
+    run in that process: a thread pool or a single worker process pool.  release drops it once the game is over
+    """
+    def __init__(self, player: ComputerPlayer, executor: Executor | None = None,
+                 slots: asyncio.Semaphore | None = None, key: str | None = None) -> None:
+        super().__init__(name=player.name, mark=player.mark)
+        self.player = player
+        self.executor = executor
+        self.slots = slots
+        self.key = key
+        self.last_stats: SearchStats | None = None
+
+    async def get_move(self, game_state: GameState) -> Move | None:
+        if game_state.game_over:
+            return None
+        if self.player.delay_seconds:
+            await asyncio.sleep(self.player.delay_seconds)
+        loop = asyncio.get_running_loop()
+        if self.slots is None:
+            cell, self.last_stats = await loop.run_in_executor(self.executor, choose_cell, self.player, game_state,
+                                                               self.key)
+        else:
+            async with self.slots:
+                cell, self.last_stats = await loop.run_in_executor(self.executor, choose_cell, self.player,
+                                                                   game_state, self.key)
+        return game_state.make_move_to(cell) if cell >= 0 else None
+
+    def release(self) -> None:
+        """drops the player kept under the key.  Queued behind the game's last search, nothing waits for it"""
+        if self.key is None:
+            return
+        try:
+            asyncio.get_running_loop().run_in_executor(self.executor, release_player, self.key)
+        except RuntimeError:
+            pass  # the executor is shut down, and the players it kept are gone with it
+
+
+class QueuePlayer(AsyncPlayer):
+    """
+    a player whose cells arrive on a queue, e.g. from a network client.  The queue holds a single move, so a client
+    sending ahead of the game waits for it.  get_move raises asyncio.TimeoutError when no move comes within timeout
+    seconds
+    """
+    def __init__(self, name: str, mark: Mark, timeout: float | None = None) -> None:
+        super().__init__(name=name, mark=mark)
+        self.timeout = timeout
+        self.moves: asyncio.Queue[int] = asyncio.Queue(maxsize=1)
 
+    async def get_move(self, game_state: GameState) -> Move | None:
+        cell = await asyncio.wait_for(self.moves.get(), self.timeout)
+        return game_state.make_move_to(cell)
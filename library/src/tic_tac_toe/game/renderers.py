@@ -1,5 +1,8 @@
 import abc
-from typing import Iterable
+import sys
+from dataclasses import dataclass
+from functools import cache
+from typing import Iterable, TextIO
 from tic_tac_toe.logic.models import GameState
 
 
@@ -9,6 +12,13 @@ class Renderer:
         """implement your own renderer"""
 
 
+class AsyncRenderer(metaclass=abc.ABCMeta):
+    """the Renderer interface for code running on an event loop"""
+    @abc.abstractmethod
+    async def render(self, game_state: GameState) -> None:
+        """implement your own renderer"""
+
+
 class ConsoleRenderer(Renderer):
     def render(self, game_state: GameState) -> None:
         clear_screen()
@@ -21,6 +31,72 @@ class ConsoleRenderer(Renderer):
                 print("No one wins this time \N{neutral face}")
 
 
+class NullRenderer(Renderer):
+    """renders nothing, for headless games"""
+    def render(self, game_state: GameState) -> None:
+        pass
+
+
+@dataclass(frozen=True)
+class BoardLayout:
+    """the static frame print_solid draws for one board size, and where on screen each cell goes"""
+    frame: str
+    cell_positions: tuple[tuple[int, int], ...]  # 1 based (row, column) of every cell
+    status_row: int
+
+
+@cache
+def board_layout(size: int) -> BoardLayout:
+    left_gutter = 6
+    row_header = ' ' * left_gutter + ' | '.join([chr(i) for i in range(ord('A'), ord('Z') + 1)][:size])
+    row_separator = ' ' * (left_gutter // 2) + '_' * (len(row_header) - left_gutter // 2)
+    lines = [row_header]
+    positions = []
+    for i in range(size):
+        prefix = ' ' * (left_gutter // 2 - len(str(i)) - 1) + str(i) + '|' + ' ' * (left_gutter // 2 - len(str(i)))
+        lines += [row_separator, prefix + ' | '.join(' ' * size)]
+        positions += [(len(lines), len(prefix) + 4 * column + 1) for column in range(size)]
+    return BoardLayout(frame='\n'.join(lines), cell_positions=tuple(positions), status_row=len(lines) + 2)
+
+
+def move_to(row: int, column: int) -> str:
+    return f"\033[{row};{column}H"
+
+
+class IncrementalRenderer(Renderer):
+    """
+    draws the board print_solid style, but clears the screen and draws the frame only for the first state of a game
+    (or a new board size).  After that only the cells that changed since the last frame are written, through cursor
+    addressing, and every frame goes out as a single write
+    """
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self.stream = stream or sys.stdout
+        self.drawn: str | None = None  # cells currently on screen
+
+    def render(self, game_state: GameState) -> None:
+        cells = game_state.grid.cells
+        layout = board_layout(game_state.grid.size)
+        parts = []
+        if self.drawn is None or len(self.drawn) != len(cells) or any(
+                old != ' ' and new == ' ' for old, new in zip(self.drawn, cells)):
+            # first frame, another size or a new game: start from a blank frame
+            parts.append("\033[2J" + move_to(1, 1) + layout.frame)
+            self.drawn = ' ' * len(cells)
+        for cell, (old, new) in enumerate(zip(self.drawn, cells)):
+            if old != new:
+                parts.append(move_to(*layout.cell_positions[cell]) + new)
+        if game_state.winner:
+            parts.extend(move_to(*layout.cell_positions[cell]) + blink(cells[cell])
+                         for cell in game_state.winning_cells)
+            parts.append(move_to(layout.status_row, 1) + f"\033[2K{game_state.winner.value} wins \N{party popper}")
+        elif game_state.tie:
+            parts.append(move_to(layout.status_row, 1) + "\033[2KNo one wins this time \N{neutral face}")
+        parts.append(move_to(layout.status_row + 1, 1))
+        self.drawn = cells
+        self.stream.write(''.join(parts))
+        self.stream.flush()
+
+
 # following functions are outside the class definition
 def clear_screen():
     print("\033c", end="")
@@ -0,0 +1,262 @@
+"""
+asyncio game server: many concurrent games against the computer players, each game an AsyncTicTacToe task, with the
+computer's searches sent to a process pool so that the event loop never blocks.
+
+Line protocol, one command or event per line, fields separated by spaces, cells written with '.' for empty:
+    client  NEW <opponent> [<size> <winning len> [<X|O>]]  start a game against random, minimax or mcts as X or O
+            MOVE <game id> <cell>                          cell index, row major from 0
+            RESIGN <game id>
+            QUIT
+    server  GAME <game id> <your mark>
+            STATE <game id> <cells> <mark to move, or - once the game is over>
+            OVER <game id> <X|O|TIE|TIMEOUT|RESIGNED|ERROR>
+            ERR [<game id>] <message>
+
+Backpressure: a game holds at most one pending client move, so a client sending ahead stops being read until its game
+catches up; every event is drained to the client's socket before its game goes on; at most max_pending_searches
+searches wait on the pool; and no more than max_games games are kept.  A game ends with TIMEOUT when the client takes
+longer than move_timeout for a move or the whole game runs longer than game_timeout.  A line longer than MAX_LINE
+bytes gets an ERR and the connection is closed.
+
+Every game is pinned to one of the executors, a single worker process pool each, so its computer player stays in that
+worker between moves and keeps its transposition table or search tree (see players.AsyncComputerPlayer).
+
+    python -m tic_tac_toe.game.server --port 8765 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Sequence
+
+from tic_tac_toe.game.engine import AsyncTicTacToe
+from tic_tac_toe.game.players import AsyncComputerPlayer, QueuePlayer
+from tic_tac_toe.game.renderers import AsyncRenderer
+from tic_tac_toe.game.tournament import PLAYERS
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.exceptions import InvalidWinningPattern
+from tic_tac_toe.logic.models import GameState, Mark
+from tic_tac_toe.logic.params import SIZE, WINNING_LEN
+
+MAX_GAMES = 10_000
+MAX_PENDING_SEARCHES = 64
+MOVE_TIMEOUT = 60.0
+GAME_TIMEOUT = 900.0
+MAX_LINE = 1024
+
+
+class ProtocolRenderer(AsyncRenderer):
+    """renders a game as STATE lines on the client's stream"""
+    def __init__(self, writer: asyncio.StreamWriter, game_id: int) -> None:
+        self.writer = writer
+        self.game_id = game_id
+
+    async def render(self, game_state: GameState) -> None:
+        to_move = '-' if game_state.game_over else game_state.current_mark.value
+        await send(self.writer, f'STATE {self.game_id} {game_state.grid.cells.replace(" ", ".")} {to_move}')
+
+
+async def send(writer: asyncio.StreamWriter, line: str) -> None:
+    if writer.is_closing():
+        return
+    writer.write(line.encode('ascii') + b'\n')
+    await writer.drain()
+
+
+@dataclass
+class Session:
+    game_id: int
+    client: QueuePlayer
+    computer: AsyncComputerPlayer
+    task: asyncio.Task | None = None
+
+
+class SessionManager:
+    def __init__(self, executors: Sequence[Executor] = (), max_games: int = MAX_GAMES,
+                 max_pending_searches: int = MAX_PENDING_SEARCHES, move_timeout: float | None = MOVE_TIMEOUT,
+                 game_timeout: float | None = GAME_TIMEOUT) -> None:
+        """
+        executors run the computer players' searches, a game always on the same one; they should each run a single
+        worker.  Without any, the searches run on the loop's default thread pool
+        """
+        self.executors = executors
+        self.max_games = max_games
+        self.move_timeout = move_timeout
+        self.game_timeout = game_timeout
+        self.slots = asyncio.Semaphore(max_pending_searches)
+        self.sessions: dict[int, Session] = {}
+        self.game_ids = itertools.count(1)
+        self.finished = 0
+
+    def new_game(self, writer: asyncio.StreamWriter, opponent: str, size: int = SIZE, winning_len: int = WINNING_LEN,
+                 mark: Mark = Mark.CROSS) -> Session:
+        if len(self.sessions) >= self.max_games:
+            raise ValueError(f'Server is full, {self.max_games} games in play')
+        if opponent not in PLAYERS:
+            raise ValueError(f'Unknown opponent {opponent}, choose from {", ".join(PLAYERS)}')
+        get_geometry(size, winning_len)  # rejects an unknown configuration before a game id is taken
+        game_id = next(self.game_ids)
+        client = QueuePlayer(name=f'client-{game_id}', mark=mark, timeout=self.move_timeout)
+        executor = self.executors[game_id % len(self.executors)] if self.executors else None
+        computer = AsyncComputerPlayer(PLAYERS[opponent](name=f'{opponent}-{game_id}', mark=mark.other,
+                                                         delay_seconds=0),
+                                       executor, self.slots, key=str(game_id))
+        game = AsyncTicTacToe(player1=client, player2=computer, renderer=ProtocolRenderer(writer, game_id),
+                              error_handler=lambda ex: writer.write(f'ERR {game_id} {ex}\n'.encode('ascii')),
+                              size=size, winning_len=winning_len)
+        session = Session(game_id=game_id, client=client, computer=computer)
+        self.sessions[game_id] = session
+        session.task = asyncio.create_task(self.run(session, game, writer))
+        return session
+
+    async def run(self, session: Session, game: AsyncTicTacToe, writer: asyncio.StreamWriter) -> None:
+        await send(writer, f'GAME {session.game_id} {session.client.mark.value}')
+        try:
+            final = await asyncio.wait_for(game.play(starting_mark=Mark.CROSS), self.game_timeout)
+            result = final.winner.value if final.winner else 'TIE'
+        except asyncio.TimeoutError:  # not the builtin TimeoutError before Python 3.11
+            result = 'TIMEOUT'
+        except asyncio.CancelledError:
+            result = 'RESIGNED'
+        except Exception as ex:
+            result = 'ERROR'
+            writer.write(f'ERR {session.game_id} {type(ex).__name__}: {ex}\n'.encode('ascii', 'replace'))
+        finally:
+            del self.sessions[session.game_id]
+            self.finished += 1
+            session.computer.release()
+        await send(writer, f'OVER {session.game_id} {result}')
+
+    async def move(self, session: Session, cell: int) -> None:
+        """
+        hands a client move to its game, waiting while the game still holds an earlier one unless the game ends
+        """
+        put = asyncio.ensure_future(session.client.moves.put(cell))
+        await asyncio.wait({put, session.task}, return_when=asyncio.FIRST_COMPLETED)
+        put.cancel()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        owned: dict[int, Session] = {}
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    await send(writer, f'ERR Line longer than {MAX_LINE} bytes')
+                    break
+                if not line:
+                    break
+                fields = line.decode('ascii', 'replace').split()
+                if not fields:
+                    continue
+                if fields[0].upper() == 'QUIT':
+                    break
+                try:
+                    await self.dispatch(fields, writer, owned)
+                except (ValueError, IndexError, InvalidWinningPattern) as ex:
+                    await send(writer, f'ERR {ex}')
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for session in owned.values():
+                if session.task is not None:
+                    session.task.cancel()
+            writer.close()
+
+    async def dispatch(self, fields: list[str], writer: asyncio.StreamWriter, owned: dict[int, Session]) -> None:
+        command, arguments = fields[0].upper(), fields[1:]
+        if command == 'NEW':
+            size, winning_len = (int(arguments[1]), int(arguments[2])) if len(arguments) >= 3 else (SIZE, WINNING_LEN)
+            mark = Mark(arguments[3].upper()) if len(arguments) >= 4 else Mark.CROSS
+            session = self.new_game(writer, arguments[0], size, winning_len, mark)
+            owned[session.game_id] = session
+            session.task.add_done_callback(lambda _: owned.pop(session.game_id, None))
+        elif command in ('MOVE', 'RESIGN'):
+            game_id = int(arguments[0])
+            session = owned.get(game_id)
+            if session is None or session.task is None or session.task.done():
+                raise ValueError(f'No game {game_id} in play on this connection')
+            if command == 'MOVE':
+                await self.move(session, int(arguments[1]))
+            else:
+                session.task.cancel()
+        else:
+            raise ValueError(f'Unknown command {command}')
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+
+
+async def play_random_client(host: str, port: int, opponent: str, size: int, winning_len: int,
+                             mark: Mark = Mark.CROSS) -> str:
+    """a client making random moves, for testing: plays one game and returns its result"""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'NEW {opponent} {size} {winning_len} {mark.value}\n'.encode('ascii'))
+    result = 'ERROR'
+    while line := await reader.readline():
+        event, *fields = line.decode('ascii').split()
+        if event == 'STATE' and fields[2] == mark.value:
+            cell = random.choice([index for index, char in enumerate(fields[1]) if char == '.'])
+            writer.write(f'MOVE {fields[0]} {cell}\n'.encode('ascii'))
+        elif event == 'OVER':
+            result = fields[1]
+            break
+    writer.write(b'QUIT\n')
+    writer.close()
+    return result
+
+
+async def load_test(games: int = 1000, opponent: str = 'random', size: int = 3, winning_len: int = 3,
+                    executors: Sequence[Executor] = ()) -> None:
+    manager = SessionManager(executors=executors)
+    server = await manager.serve(port=0)
+    port = server.sockets[0].getsockname()[1]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(play_random_client('127.0.0.1', port, opponent, size, winning_len,
+                                                        Mark.CROSS if game % 2 == 0 else Mark.NAUGHT)
+                                     for game in range(games)))
+    seconds = time.perf_counter() - started
+    server.close()
+    await server.wait_closed()
+    tally = {result: results.count(result) for result in sorted(set(results))}
+    print(f'{games} concurrent games against {opponent} on {size}x{size}/{winning_len} in {seconds:.2f}s '
+          f'({games / seconds:,.0f} games/s): {tally}')
+
+
+def test():
+    asyncio.run(load_test(games=1000))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves games against the computer players over a line protocol')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None, help='search processes, defaults to the number of cores')
+    parser.add_argument('--max-games', type=int, default=MAX_GAMES)
+    args = parser.parse_args()
+
+    async def serve_forever():
+        with contextlib.ExitStack() as stack:
+            executors = [stack.enter_context(ProcessPoolExecutor(max_workers=1))
+                         for _ in range(args.workers or os.cpu_count() or 1)]
+            manager = SessionManager(executors=executors, max_games=args.max_games)
+            server = await manager.serve(args.host, args.port)
+            print(f'serving on {args.host}:{args.port}')
+            async with server:
+                await server.serve_forever()
+
+    try:
+        asyncio.run(serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Headless matches between any two players: no renderer, no artificial move delay, games fanned out over a process pool.
+The starting mark alternates from game to game.  Used to regression test computer players before deploying them.
+Latency and search counters come from the engine's move hook, see logic.stats.  With --record the games are appended
+to a game record log, see logic.records.
+
+    python -m tic_tac_toe.game.tournament --player1 minimax --player2 random --games 1000 --size 3 --winning-len 3
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from tic_tac_toe.game.engine import TicTacToe
+from tic_tac_toe.game.players import Player, ComputerPlayer, RandomComputerPlayer, MiniMaxPlayer, MCTSPlayer
+from tic_tac_toe.game.renderers import NullRenderer
+from tic_tac_toe.logic.exceptions import InvalidMove, InvalidPlayer
+from tic_tac_toe.logic.models import Mark
+from tic_tac_toe.logic.params import SIZE, WINNING_LEN
+from tic_tac_toe.logic.records import GameRecord, GameRecorder
+from tic_tac_toe.logic.stats import SearchStats
+from tic_tac_toe.logic.validators import validate_players
+
+PLAYERS: dict[str, type[ComputerPlayer]] = {
+    'random': RandomComputerPlayer,
+    'minimax': MiniMaxPlayer,
+    'mcts': MCTSPlayer,
+}
+
+
+@dataclass(frozen=True)
+class GameResult:
+    starting_mark: Mark
+    winner: Mark | None
+    plies: int
+    moves: tuple[SearchStats, ...]
+
+    def move_seconds(self, mark: Mark) -> list[float]:
+        return [stats.seconds for stats in self.moves if stats.mark == mark.value]
+
+
+@dataclass(frozen=True)
+class MatchReport:
+    player1: str
+    player2: str
+    games: int
+    player1_wins: int
+    player2_wins: int
+    draws: int
+    seconds: float
+    latency: dict[str, dict[str, float]]  # player name -> percentile name -> seconds
+    search: dict[str, dict[str, float]]  # player name -> counter -> value, over all of its moves
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def rate(self, count: int) -> float:
+        return count / self.games if self.games else 0.0
+
+    def __str__(self) -> str:
+        lines = [
+            f'{self.games} games in {self.seconds:.2f}s ({self.games_per_second:,.1f} games/s)',
+            f'{self.player1} wins {self.rate(self.player1_wins):.1%}, draws {self.rate(self.draws):.1%}, '
+            f'{self.player2} wins {self.rate(self.player2_wins):.1%}',
+        ]
+        for name, percentiles in self.latency.items():
+            lines.append(f'{name} move latency: ' +
+                         ', '.join(f'{key} {value * 1000:.3f}ms' for key, value in percentiles.items()))
+        for name, counters in self.search.items():
+            lines.append(f'{name} search: {counters["nodes"]:,.0f} nodes at {counters["nodes_per_second"]:,.0f}/s, '
+                         f'table hits {counters["table_hit_rate"]:.1%}, state cache hits '
+                         f'{counters["cache_hit_rate"]:.1%}, max depth {counters["max_depth"]:.0f}')
+        return '\n'.join(lines)
+
+
+def without_delay(player: Player) -> Player:
+    player = copy.deepcopy(player)
+    if isinstance(player, ComputerPlayer):
+        player.delay_seconds = 0
+    return player
+
+
+def play_game(player1: Player, player2: Player, starting_mark: Mark, size: int = SIZE,
+              winning_len: int = WINNING_LEN) -> GameResult:
+    moves: list[SearchStats] = []
+    game = TicTacToe(player1=player1, player2=player2, renderer=NullRenderer(), size=size, winning_len=winning_len,
+                     move_hook=moves.append)
+    game_state = game.play(starting_mark)
+    return GameResult(starting_mark=starting_mark, winner=game_state.winner, plies=len(moves), moves=tuple(moves))
+
+
+def play_games(player1: Player, player2: Player, first_game: int, games: int, size: int,
+               winning_len: int) -> list[GameResult]:
+    """
+    a batch of games, run inside one worker.  Even numbered games start with CROSS, odd numbered ones with NAUGHT
+    """
+    player1, player2 = without_delay(player1), without_delay(player2)
+    return [play_game(player1, player2, Mark.CROSS if game % 2 == 0 else Mark.NAUGHT, size, winning_len)
+            for game in range(first_game, first_game + games)]
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    if len(samples) < 2:
+        value = samples[0] if samples else 0.0
+        return {'p50': value, 'p90': value, 'p99': value, 'max': value}
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p90': cuts[89], 'p99': cuts[98], 'max': max(samples)}
+
+
+def search_totals(moves: list[SearchStats]) -> dict[str, float]:
+    seconds = sum(stats.seconds for stats in moves)
+    nodes = sum(stats.nodes for stats in moves)
+    table_probes = sum(stats.table_probes for stats in moves)
+    cache_hits = sum(stats.cache_hits for stats in moves)
+    cache_lookups = cache_hits + sum(stats.cache_misses for stats in moves)
+    return {'nodes': nodes, 'nodes_per_second': nodes / seconds if seconds else 0.0,
+            'table_hit_rate': sum(stats.table_hits for stats in moves) / table_probes if table_probes else 0.0,
+            'cache_hit_rate': cache_hits / cache_lookups if cache_lookups else 0.0,
+            'max_depth': max((stats.max_depth for stats in moves), default=0)}
+
+
+def run_match(player1: Player, player2: Player, games: int = 100, workers: int | None = None,
+              size: int = SIZE, winning_len: int = WINNING_LEN, record: str | None = None) -> MatchReport:
+    """
+    plays games between the two players, over `workers` processes (all cores by default, 1 runs in process).  The
+    games are appended to the game record log `record` when given, by this process only.  The report is keyed by
+    player name, so the two players must be named apart
+    """
+    validate_players(player1, player2)
+    if player1.name == player2.name:
+        raise InvalidPlayer(f'Both players are named {player1.name!r}')
+    workers = workers or os.cpu_count() or 1
+    batch = max(1, -(-games // (workers * 4)))
+    started = time.perf_counter()
+    if workers == 1:
+        results = play_games(player1, player2, 0, games, size, winning_len)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_games, player1, player2, first, min(batch, games - first), size,
+                                       winning_len)
+                       for first in range(0, games, batch)]
+            for future in futures:
+                results.extend(future.result())
+    seconds = time.perf_counter() - started
+    if record:
+        names = {player1.mark: player1.name, player2.mark: player2.name}
+        with GameRecorder(record) as recorder:
+            for result in results:
+                recorder.write(GameRecord(size=size, winning_len=winning_len, starting_mark=result.starting_mark,
+                                          winner=result.winner, player_x=names[Mark.CROSS],
+                                          player_o=names[Mark.NAUGHT],
+                                          moves=tuple(stats.move for stats in result.moves)))
+    wins = {mark: sum(1 for result in results if result.winner is mark) for mark in Mark}
+    latency = {player.name: percentiles([seconds for result in results
+                                         for seconds in result.move_seconds(player.mark)])
+               for player in (player1, player2)}
+    search = {player.name: search_totals([stats for result in results for stats in result.moves
+                                          if stats.mark == player.mark.value])
+              for player in (player1, player2)}
+    return MatchReport(player1=player1.name, player2=player2.name, games=len(results),
+                       player1_wins=wins[player1.mark], player2_wins=wins[player2.mark],
+                       draws=sum(1 for result in results if result.winner is None), seconds=seconds,
+                       latency=latency, search=search)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays a headless match between two computer players')
+    parser.add_argument('--player1', choices=PLAYERS, default='minimax', help='plays CROSS')
+    parser.add_argument('--player2', choices=PLAYERS, default='random', help='plays NAUGHT')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cores')
+    parser.add_argument('--size', type=int, default=SIZE)
+    parser.add_argument('--winning-len', type=int, default=WINNING_LEN)
+    parser.add_argument('--book', default=None, help='opening book consulted by both players')
+    parser.add_argument('--record', default=None, help='game record log the games are appended to')
+    args = parser.parse_args()
+    player1 = PLAYERS[args.player1](name=f'{args.player1}-X', mark=Mark.CROSS, delay_seconds=0, book=args.book)
+    player2 = PLAYERS[args.player2](name=f'{args.player2}-O', mark=Mark.NAUGHT, delay_seconds=0, book=args.book)
+    try:
+        print(run_match(player1, player2, games=args.games, workers=args.workers, size=args.size,
+                        winning_len=args.winning_len, record=args.record))
+    except (InvalidMove, InvalidPlayer) as ex:
+        parser.exit(1, f'Match aborted: {ex}\n')
+    return
+
+
+if __name__ == '__main__':
+    main()
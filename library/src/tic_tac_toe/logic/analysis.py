@@ -0,0 +1,219 @@
+"""
+Batched position analysis: the value of every legal move of many positions at once, e.g. for move hints or for games
+read back from a log.  Positions come as cells strings or packed boards (x_bits | o_bits << size ** 2, as in
+models.Grid).  Each batch is reduced to its distinct canonical positions, the ones not cached already are solved in
+chunks, in parallel when an executor is given, and the answers are mapped back to each request's orientation.
+Answers are kept in a bounded LRU keyed by canonical position, so repeated requests cost a dict lookup.  Each process
+keeps one solver per configuration whose memo carries over from batch to batch; it is cleared once it holds more than
+memo_size positions, so memory stays bounded there too.
+Values are exact solver values (see logic/solver): an outcome for the side to move and the distance, in plies, to the
+end of the game under best play.  With max_depth set positions with that many marks are not searched and come out
+UNKNOWN, which keeps boards too big to solve tractable.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import cache
+from typing import Iterable
+
+from tic_tac_toe.logic.bitboard import cells_to_bits, get_geometry, mask_to_cells
+from tic_tac_toe.logic.exceptions import InvalidGameState
+from tic_tac_toe.logic.models import Mark
+from tic_tac_toe.logic.solver import LOSS, TIE, WIN, Solver, distance_of, mover_outcome, mover_preference, outcome_of, \
+    pack
+from tic_tac_toe.logic.symmetry import IDENTITY, Symmetry, get_symmetry
+
+Position = str | int  # cells string or packed board
+CHUNK_SIZE = 64
+MEMO_SIZE = 1 << 20  # solver memo entries kept per process and configuration
+
+
+@dataclass(frozen=True)
+class MoveValue:
+    cell: int
+    outcome: int  # for the side to move once it has played the cell: WIN, TIE, LOSS or UNKNOWN
+    distance: int  # plies to the end of the game under best play, this move included
+
+
+@dataclass(frozen=True)
+class Analysis:
+    outcome: int  # for the side to move
+    distance: int
+    moves: tuple[MoveValue, ...]  # best first
+
+    @property
+    def best_move(self) -> int | None:
+        return self.moves[0].cell if self.moves else None
+
+    def oriented(self, symmetry: Symmetry, transform: int) -> Analysis:
+        """the analysis of the canonical position, with its cells mapped back through `transform`"""
+        if transform == IDENTITY:
+            return self
+        return Analysis(outcome=self.outcome, distance=self.distance,
+                        moves=tuple(MoveValue(symmetry.from_canonical_cell(move.cell, transform), move.outcome,
+                                              move.distance) for move in self.moves))
+
+
+@cache
+def get_solver(size: int, winning_len: int, max_depth: int | None) -> Solver:
+    """
+    one solver per configuration and process.  Its memo stays exact whatever position it is asked about, so every
+    batch a worker sees builds on what the previous ones solved, until analyze_positions clears it
+    """
+    return Solver(get_geometry(size, winning_len), max_depth=max_depth)
+
+
+def analyze_positions(size: int, winning_len: int, max_depth: int | None, positions: list[tuple[int, int]],
+                      memo_size: int = MEMO_SIZE) -> list[Analysis]:
+    """
+    analyses (me, them) positions, the side owning `me` to move.  Module level so that it can run in a worker process.
+    The solver's memo is cleared after any position that leaves it holding more than memo_size entries
+    """
+    geometry = get_geometry(size, winning_len)
+    solver = get_solver(size, winning_len, max_depth)
+    analyses = []
+    for me, them in positions:
+        if geometry.has_line(them):
+            analyses.append(Analysis(outcome=LOSS, distance=0, moves=()))
+            continue
+        if geometry.has_line(me):
+            raise InvalidGameState('The side to move has already won')
+        values = {}
+        for cell in mask_to_cells(geometry.full_mask & ~(me | them)):
+            new_me = me | 1 << cell
+            if geometry.completes_line(new_me, cell):
+                values[cell] = pack(WIN, 1)
+            else:
+                child = solver.value(them, new_me)
+                values[cell] = pack(mover_outcome(outcome_of(child)), distance_of(child) + 1)
+        if len(solver.table) > memo_size:
+            solver.table.clear()
+        if not values:
+            analyses.append(Analysis(outcome=TIE, distance=0, moves=()))
+            continue
+        ranked = sorted(values, key=lambda cell: mover_preference(values[cell]), reverse=True)
+        best = values[ranked[0]]
+        analyses.append(Analysis(outcome=outcome_of(best), distance=distance_of(best),
+                                 moves=tuple(MoveValue(cell, outcome_of(values[cell]), distance_of(values[cell]))
+                                             for cell in ranked)))
+    return analyses
+
+
+class AnalysisCache:
+    """
+    canonical key -> Analysis, a size bounded LRU.  Like models.StateCache, a plain dict in recency order: a hit moves
+    its entry to the end and the first entry is the one evicted
+    """
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        self.capacity = capacity
+        self.analyses: dict[int, Analysis] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.analyses)
+
+    def get(self, key: int) -> Analysis | None:
+        if (analysis := self.analyses.pop(key, None)) is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.analyses[key] = analysis
+        return analysis
+
+    def put(self, key: int, analysis: Analysis) -> None:
+        analyses = self.analyses
+        analyses.pop(key, None)
+        if len(analyses) >= self.capacity:
+            del analyses[next(iter(analyses))]
+        analyses[key] = analysis
+
+    def clear(self) -> None:
+        self.analyses.clear()
+        self.hits = self.misses = 0
+
+
+class Analyzer:
+    """
+    analyses positions of one (size, winning_len) configuration.  Without an executor the work runs in process,
+    with one it is spread over it chunk_size positions at a time.  cache_size bounds the answers kept here, memo_size
+    the solver memo kept by each process doing the work
+    """
+    def __init__(self, size: int, winning_len: int, max_depth: int | None = None, starting_mark: Mark = Mark.CROSS,
+                 executor: Executor | None = None, cache_size: int = 1 << 16, chunk_size: int = CHUNK_SIZE,
+                 memo_size: int = MEMO_SIZE) -> None:
+        self.size = size
+        self.winning_len = winning_len
+        self.max_depth = max_depth
+        self.starting_mark = starting_mark
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.memo_size = memo_size
+        self.cache = AnalysisCache(cache_size)
+        self.geometry = get_geometry(size, winning_len)
+        self.symmetry = get_symmetry(size)
+        self.cell_count = size ** 2
+
+    def side_to_move(self, position: Position) -> tuple[int, int]:
+        """(me, them) of a position, the side to move first"""
+        if isinstance(position, str):
+            if len(position) != self.cell_count:
+                raise InvalidGameState(f'Expected {self.cell_count} cells, got {len(position)}')
+            x_bits, o_bits = cells_to_bits(position)
+        else:
+            x_bits, o_bits = position & self.geometry.full_mask, position >> self.cell_count
+        if x_bits & o_bits:
+            raise InvalidGameState('A cell holds both marks')
+        difference = x_bits.bit_count() - o_bits.bit_count()
+        if abs(difference) > 1:
+            raise InvalidGameState('Difference between number of Xs and Os must not be more than 1')
+        if difference == 0:
+            return (x_bits, o_bits) if self.starting_mark is Mark.CROSS else (o_bits, x_bits)
+        return (o_bits, x_bits) if difference > 0 else (x_bits, o_bits)
+
+    def analyze(self, positions: Iterable[Position]) -> list[Analysis]:
+        """analyses, in request order, moves given in each request's own orientation"""
+        requests = []
+        found: dict[int, Analysis] = {}
+        missing: dict[int, tuple[int, int]] = {}
+        for position in positions:
+            key, transform = self.symmetry.canonical(*self.side_to_move(position))
+            requests.append((key, transform))
+            if key in found or key in missing:
+                continue
+            if (analysis := self.cache.get(key)) is not None:
+                found[key] = analysis
+            else:
+                missing[key] = self.symmetry.split_key(key)
+        if missing:
+            found.update(self.solve(missing))
+        return [found[key].oriented(self.symmetry, transform) for key, transform in requests]
+
+    def analyze_one(self, position: Position) -> Analysis:
+        return self.analyze([position])[0]
+
+    def solve(self, missing: dict[int, tuple[int, int]]) -> dict[int, Analysis]:
+        keys = list(missing)
+        chunks = [keys[start:start + self.chunk_size] for start in range(0, len(keys), self.chunk_size)]
+        if self.executor is None or len(chunks) == 1:
+            results = [analyze_positions(self.size, self.winning_len, self.max_depth, [missing[key] for key in chunk],
+                                         self.memo_size)
+                       for chunk in chunks]
+        else:
+            futures = [self.executor.submit(analyze_positions, self.size, self.winning_len, self.max_depth,
+                                            [missing[key] for key in chunk], self.memo_size)
+                       for chunk in chunks]
+            results = [future.result() for future in futures]
+        solved = {}
+        for chunk, analyses in zip(chunks, results):
+            for key, analysis in zip(chunk, analyses):
+                self.cache.put(key, analysis)
+                solved[key] = analysis
+        return solved
+
+
+@cache
+def get_analyzer(size: int, winning_len: int, max_depth: int | None = None) -> Analyzer:
+    """one in process analyzer per configuration, shared by every caller wanting hints, and so is its cache"""
+    return Analyzer(size, winning_len, max_depth=max_depth)
@@ -0,0 +1,102 @@
+"""
+Bitboard helpers.  A position is held as two integers, one for the Xs and one for the Os, where bit i stands for
+cell i of the row-major cells string.  Winning lines are generated on demand by one_time/generate_winning_patterns and
+kept as integer masks in one Geometry per (size, winning_len), so that winner and tie checks are a handful of
+AND/compare operations instead of regex matches and any number of configurations can be served side by side.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+
+from tic_tac_toe.logic.exceptions import InvalidWinningPattern
+from tic_tac_toe.one_time.generate_winning_patterns import Grid as PatternGrid
+
+MARKER = '?'
+
+
+def pattern_to_mask(pattern: str) -> int:
+    """'?' positions of a winning pattern string become set bits"""
+    mask = 0
+    for index, char in enumerate(pattern):
+        if char == MARKER:
+            mask |= 1 << index
+    return mask
+
+
+def mask_to_cells(mask: int) -> list[int]:
+    """indices of the set bits of a mask, lowest first"""
+    cells = []
+    while mask:
+        low = mask & -mask
+        cells.append(low.bit_length() - 1)
+        mask ^= low
+    return cells
+
+
+def cells_to_bits(cells: str) -> tuple[int, int]:
+    """splits a cells string into its (X, O) bitboards"""
+    x_bits = o_bits = 0
+    for index, char in enumerate(cells):
+        if char == 'X':
+            x_bits |= 1 << index
+        elif char == 'O':
+            o_bits |= 1 << index
+    return x_bits, o_bits
+
+
+def bits_to_cells(x_bits: int, o_bits: int, cell_count: int) -> str:
+    """inverse of cells_to_bits"""
+    return ''.join('X' if x_bits >> i & 1 else 'O' if o_bits >> i & 1 else ' ' for i in range(cell_count))
+
+
+@dataclass(frozen=True)
+class Geometry:
+    """precomputed line masks for one (size, winning_len) configuration, shared by every game played with it"""
+    size: int
+    winning_len: int
+    lines: tuple[int, ...]
+    cell_lines: tuple[tuple[int, ...], ...]  # cell index -> masks of the lines running through that cell
+    full_mask: int
+
+    def winning_line(self, bits: int) -> int:
+        """first line fully covered by bits, or 0"""
+        for line in self.lines:
+            if bits & line == line:
+                return line
+        return 0
+
+    def has_line(self, bits: int) -> bool:
+        return self.winning_line(bits) != 0
+
+    def completes_line(self, bits: int, cell: int) -> bool:
+        """
+        whether bits, which include a mark just placed on cell, hold a full line through that cell.  Only the few
+        lines through the cell are tested, so this is the incremental check used after every move
+        """
+        for line in self.cell_lines[cell]:
+            if bits & line == line:
+                return True
+        return False
+
+    def is_full(self, x_bits: int, o_bits: int) -> bool:
+        return x_bits | o_bits == self.full_mask
+
+    def patterns(self) -> list[str]:
+        """the lines as winning pattern strings, '?' on the line and '.' elsewhere"""
+        return [''.join(MARKER if line >> cell & 1 else '.' for cell in range(self.size ** 2)) for line in self.lines]
+
+
+@cache
+def get_geometry(size: int, winning_len: int) -> Geometry:
+    """the configuration for (size, winning_len), generated on first use and cached for the life of the process"""
+    if size < 1 or not 1 <= winning_len <= size:
+        raise InvalidWinningPattern(f'Winning pattern not found for size {size} and winning length {winning_len}')
+    # with a winning length of 1 every cell is found once per direction, so drop repeats
+    lines = tuple(dict.fromkeys(pattern_to_mask(pattern)
+                                for pattern in PatternGrid(size=size, win_len=winning_len).get_winning_patterns()))
+    return Geometry(size=size,
+                    winning_len=winning_len,
+                    lines=lines,
+                    cell_lines=tuple(tuple(line for line in lines if line >> cell & 1) for cell in range(size ** 2)),
+                    full_mask=(1 << size ** 2) - 1)
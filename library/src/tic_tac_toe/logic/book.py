@@ -0,0 +1,74 @@
+"""
+Opening book: the best move of every canonical position up to some ply, kept in the position database format of
+logic/positiondb.py and read through its mmap, so opening a book costs nothing until the first probe.
+Positions are stored from the side to move's point of view (its marks under the X code, the opponent's under the O
+code), since the same marks can be X to move or O to move depending on who started.  The two byte value holds the
+best move, in canonical orientation, in its low byte and the solver outcome code for the side to move (TIE, WIN, LOSS,
+or UNKNOWN when the search was cut short) in its high byte.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cache
+
+from tic_tac_toe.logic.positiondb import PositionDB, pack_bits
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+VALUE_WIDTH = 2
+
+
+def pack_entry(move: int, outcome: int) -> int:
+    return move | outcome << 8
+
+
+@dataclass(frozen=True)
+class BookMove:
+    move: int
+    outcome: int  # for the side to move, see logic/solver
+
+
+class OpeningBook:
+    """
+    lazily mapped opening book.  Only the file name is pickled, so players holding a book can be sent to worker
+    processes and deep copied
+    """
+    def __init__(self, f_name: str) -> None:
+        self.f_name = f_name
+        self._db: PositionDB | None = None
+
+    def __getstate__(self) -> dict:
+        return {'f_name': self.f_name, '_db': None}
+
+    @property
+    def db(self) -> PositionDB:
+        if self._db is None:
+            self._db = PositionDB(self.f_name)
+            if self._db.value_width != VALUE_WIDTH or not self._db.canonical:
+                raise ValueError(f'{self.f_name} is a position database but not an opening book')
+        return self._db
+
+    def covers(self, size: int, winning_len: int) -> bool:
+        return self.db.size == size and self.db.winning_len == winning_len
+
+    def probe(self, me: int, them: int) -> BookMove | None:
+        """book move for the side owning `me`, or None when the position is not in the book"""
+        db = self.db
+        if (me | them).bit_count() > db.depth:
+            return None
+        symmetry = get_symmetry(db.size)
+        key, transform = symmetry.canonical(me, them)
+        value = db.get(pack_bits(*symmetry.split_key(key), db.cell_count))
+        if value is None:
+            return None
+        return BookMove(move=symmetry.from_canonical_cell(value & 0xFF, transform), outcome=value >> 8)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+@cache
+def get_opening_book(f_name: str) -> OpeningBook:
+    """one book per file and process, shared by every player using it"""
+    return OpeningBook(f_name)
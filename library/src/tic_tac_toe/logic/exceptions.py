@@ -10,3 +10,7 @@ class InvalidMove(Exception):
 
 class InvalidPlayer(Exception):
     """Raised when invalid player setup found."""
+
+
+class SearchAborted(Exception):
+    """Raised inside a search when its node or time budget is exhausted."""
@@ -0,0 +1,151 @@
+"""
+Monte Carlo Tree Search with UCT for boards that exhaustive search cannot finish, e.g. 5x5 with a winning length of 4.
+Nodes hold the side-to-move / side-that-just-moved bitboards, rollouts are random playouts on plain integers, and the
+search runs until a wall clock or playout budget is used up.  The tree below the move finally played can be kept and
+reused as the root of the next search.
+"""
+from __future__ import annotations
+
+import math
+import random
+import time
+from dataclasses import dataclass
+
+from tic_tac_toe.logic.bitboard import Geometry, mask_to_cells
+
+DRAW = 0.5
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+    __slots__ = ('me', 'them', 'move', 'parent', 'children', 'untried', 'visits', 'wins', 'terminal_value')
+
+    def __init__(self, geometry: Geometry, me: int, them: int, move: int = -1, parent: Node | None = None) -> None:
+        self.me = me  # side to move
+        self.them = them  # side that made `move`
+        self.move = move
+        self.parent = parent
+        self.children: list[Node] = []
+        self.visits = 0
+        self.wins = 0.0  # reward summed from the point of view of the side that made `move`
+        if move >= 0 and geometry.completes_line(them, move):
+            self.terminal_value: float | None = 0.0  # the side to move has lost
+        elif me | them == geometry.full_mask:
+            self.terminal_value = DRAW
+        else:
+            self.terminal_value = None
+        self.untried = [] if self.terminal_value is not None else mask_to_cells(geometry.full_mask & ~(me | them))
+
+    def uct_child(self, exploration: float) -> Node:
+        log_visits = math.log(self.visits)
+        return max(self.children,
+                   key=lambda child: child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits))
+
+    def most_visited_child(self) -> Node:
+        return max(self.children, key=lambda child: child.visits)
+
+
+@dataclass(frozen=True)
+class MCTSResult:
+    move: int
+    playouts: int
+    seconds: float
+    win_rate: float  # of the chosen move, for the side to move at the root
+    reused_visits: int  # visits already on the root when the search started
+    max_depth: int = 0  # deepest tree node reached, the root being 0
+    branching_factor: float = 0.0  # children per expanded tree node
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.seconds if self.seconds else 0.0
+
+
+class MCTS:
+    def __init__(self, geometry: Geometry, time_limit: float | None = 1.0, max_playouts: int | None = None,
+                 exploration: float = EXPLORATION, seed: int | None = None) -> None:
+        if time_limit is None and max_playouts is None:
+            raise ValueError('MCTS needs a time limit or a playout budget')
+        self.geometry = geometry
+        self.time_limit = time_limit
+        self.max_playouts = max_playouts
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.max_depth = 0
+        self.expanded = 0  # tree nodes given a child during the search
+        self.children = 0
+
+    def search(self, root: Node) -> MCTSResult:
+        started = time.perf_counter()
+        deadline = started + self.time_limit if self.time_limit is not None else math.inf
+        reused_visits = root.visits
+        self.max_depth = self.expanded = self.children = 0
+        playouts = 0
+        while playouts != self.max_playouts:
+            if playouts & 15 == 0 and time.perf_counter() > deadline:
+                break
+            self.iterate(root)
+            playouts += 1
+        if not root.children:
+            self.iterate(root)  # even a zero budget must leave a move to play
+        best = root.most_visited_child()
+        return MCTSResult(move=best.move, playouts=playouts, seconds=time.perf_counter() - started,
+                          win_rate=best.wins / best.visits, reused_visits=reused_visits, max_depth=self.max_depth,
+                          branching_factor=self.children / self.expanded if self.expanded else 0.0)
+
+    def iterate(self, root: Node) -> None:
+        node = root
+        depth = 0
+        while not node.untried and node.children:
+            node = node.uct_child(self.exploration)
+            depth += 1
+        if node.untried:
+            cell = node.untried.pop(self.random.randrange(len(node.untried)))
+            child = Node(self.geometry, node.them, node.me | 1 << cell, move=cell, parent=node)
+            if not node.children:
+                self.expanded += 1
+            node.children.append(child)
+            self.children += 1
+            node = child
+            depth += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        reward = node.terminal_value if node.terminal_value is not None else self.rollout(node.me, node.them)
+        while node is not None:
+            node.visits += 1
+            node.wins += 1.0 - reward
+            reward = 1.0 - reward
+            node = node.parent
+
+    def rollout(self, me: int, them: int) -> float:
+        """random playout on bitboards, the result for the side owning `me`, which is to move"""
+        completes_line = self.geometry.completes_line
+        cells = mask_to_cells(self.geometry.full_mask & ~(me | them))
+        self.random.shuffle(cells)
+        mover_is_me = True
+        for cell in cells:
+            if mover_is_me:
+                me |= 1 << cell
+                if completes_line(me, cell):
+                    return 1.0
+            else:
+                them |= 1 << cell
+                if completes_line(them, cell):
+                    return 0.0
+            mover_is_me = not mover_is_me
+        return DRAW
+
+
+def find_subtree(previous: Node | None, me: int, them: int) -> Node | None:
+    """
+    the node for (me, them) among the previous root and its children and grandchildren, detached from its parent
+    """
+    if previous is None:
+        return None
+    frontier = [previous]
+    for _ in range(3):
+        for node in frontier:
+            if node.me == me and node.them == them:
+                node.parent = None
+                return node
+        frontier = [child for node in frontier for child in node.children]
+    return None
@@ -0,0 +1,261 @@
+"""
+Negamax search with alpha-beta pruning and a bounded transposition table.  The search works on the side-to-move /
+side-that-just-moved bitboards, so one routine serves both marks.  Scores are from the point of view of the side to
+move: WIN_SCORE less the number of plies to the win, the negative of that for a loss and 0 for a tie.  Positions cut
+off at the depth limit get the incremental open-line score of evaluation.LineEvaluator, kept below WIN_THRESHOLD.
+The transposition table is keyed by the canonical (symmetry reduced) position and keeps its best move in canonical
+orientation.
+search() deepens iteratively, one ply at a time, under a hard deadline and always answers with the best move of the
+last completed depth.  Moves are ordered by the previous iteration's principal variation (the table move), then killer
+moves of the ply, then the history heuristic.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+from tic_tac_toe.logic.bitboard import Geometry, mask_to_cells
+from tic_tac_toe.logic.evaluation import LineEvaluator
+from tic_tac_toe.logic.exceptions import SearchAborted
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+EXACT = 0
+LOWER = 1  # score is a lower bound, the search failed high
+UPPER = 2  # score is an upper bound, the search failed low
+
+WIN_SCORE = 1000
+WIN_THRESHOLD = WIN_SCORE - 100  # anything beyond this is a forced result rather than a heuristic
+INFINITY = WIN_SCORE + 1
+TIME_CHECK_INTERVAL = 1024  # nodes between two clock reads
+
+
+class TranspositionTable:
+    """
+    position key -> (depth, flag, score, best_move).  Bounded: once capacity is reached the oldest entry is evicted
+    """
+
+    def __init__(self, capacity: int = 1_000_000) -> None:
+        self.capacity = capacity
+        self.entries: dict[int, tuple[int, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: int) -> tuple[int, int, int, int] | None:
+        return self.entries.get(key)
+
+    def put(self, key: int, depth: int, flag: int, score: int, best_move: int) -> None:
+        entries = self.entries
+        if key in entries:
+            del entries[key]
+        elif len(entries) >= self.capacity:
+            del entries[next(iter(entries))]
+        entries[key] = (depth, flag, score, best_move)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    move: int  # cell index
+    score: int
+    nodes: int
+    seconds: float
+    completed: bool  # False when the budget ran out before the full depth was searched
+    depth: int = 0  # last fully searched depth
+    table_probes: int = 0
+    table_hits: int = 0  # probes that found an entry, whether or not it cut the search short
+    max_ply: int = 0  # deepest node visited, below the root
+    branching_factor: float = 0.0  # moves searched per expanded node, after pruning
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """forced results are stored relative to the node so that they stay valid when reached at another ply"""
+    if score > WIN_THRESHOLD:
+        return score + ply
+    if score < -WIN_THRESHOLD:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score > WIN_THRESHOLD:
+        return score - ply
+    if score < -WIN_THRESHOLD:
+        return score + ply
+    return score
+
+
+class NegamaxSearch:
+    def __init__(self, geometry: Geometry, table: TranspositionTable | None = None, max_nodes: int | None = None,
+                 time_limit: float | None = None, max_depth: int | None = None,
+                 evaluator: LineEvaluator | None = None) -> None:
+        self.geometry = geometry
+        self.evaluator = evaluator if evaluator is not None else LineEvaluator(geometry)
+        self.table = table if table is not None else TranspositionTable()
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.symmetry = get_symmetry(geometry.size)
+        self.nodes = 0
+        self.table_hits = 0
+        self.max_ply = 0
+        self.expanded = 0  # nodes whose moves were searched
+        self.children = 0  # moves searched
+        self.deadline: float | None = None
+        cell_count = geometry.size ** 2
+        self.killers: list[list[int]] = [[-1, -1] for _ in range(cell_count + 1)]
+        self.history: list[int] = [0] * cell_count
+
+    def search(self, me: int, them: int) -> SearchResult:
+        """
+        best move for the side owning `me`, deepening one ply at a time until max_depth, the end of the game or a
+        forced result.  When the budget runs out the answer of the last completed depth stands
+        """
+        started = time.perf_counter()
+        self.nodes = self.table_hits = self.max_ply = self.expanded = self.children = 0
+        self.deadline = started + self.time_limit if self.time_limit is not None else None
+        self.killers = [[-1, -1] for _ in self.killers]
+        self.history = [0] * len(self.history)
+        empty = self.geometry.full_mask & ~(me | them)
+        max_depth = empty.bit_count() if self.max_depth is None else min(self.max_depth, empty.bit_count())
+        best_move, best_score, depth_reached = -1, 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                best_move, best_score = self.search_root(me, them, depth, best_move)
+            except SearchAborted:
+                break
+            depth_reached = depth
+            if WIN_SCORE - abs(best_score) <= depth:
+                # forced within the searched depth, so no quicker win or slower loss is left to find.  A forced
+                # score from deeper table entries of an earlier search may still be beaten by a deeper iteration
+                break
+        if best_move < 0:
+            # not even depth 1 finished, fall back on whatever the table suggests
+            best_move = self.table_move(me, them)
+            if best_move < 0 or not empty >> best_move & 1:
+                best_move = mask_to_cells(empty)[0]
+        return SearchResult(move=best_move, score=best_score, nodes=self.nodes, seconds=time.perf_counter() - started,
+                            completed=depth_reached == max_depth or abs(best_score) > WIN_THRESHOLD,
+                            depth=depth_reached, table_probes=self.nodes, table_hits=self.table_hits,
+                            max_ply=self.max_ply,
+                            branching_factor=self.children / self.expanded if self.expanded else 0.0)
+
+    def search_root(self, me: int, them: int, depth: int, previous_best: int) -> tuple[int, int]:
+        """
+        one iteration: (best move, score) searched to depth, starting with the previous iteration's best move
+        """
+        empty = self.geometry.full_mask & ~(me | them)
+        self.evaluator.reset(me, them)  # an aborted iteration leaves the counts mid-search
+        alpha, beta = -INFINITY, INFINITY
+        best_move, best_score = -1, -INFINITY
+        self.expanded += 1
+        for cell in self.ordered_moves(empty, previous_best if previous_best >= 0 else self.table_move(me, them), 0):
+            score = self.score_move(me, them, cell, depth, 0, alpha, beta)
+            if score > best_score:
+                best_move, best_score = cell, score
+            alpha = max(alpha, score)
+        key, transform = self.symmetry.canonical(me, them)
+        self.table.put(key, depth, EXACT, score_to_table(best_score, 0),
+                       self.symmetry.to_canonical_cell(best_move, transform))
+        return best_move, best_score
+
+    def score_move(self, me: int, them: int, cell: int, depth: int, ply: int, alpha: int, beta: int) -> int:
+        """value for the side owning `me` of placing its mark on cell"""
+        self.children += 1
+        new_me = me | 1 << cell
+        if self.geometry.completes_line(new_me, cell):
+            return WIN_SCORE - (ply + 1)
+        if new_me | them == self.geometry.full_mask:
+            return 0
+        side = ply & 1  # the root's side to move is side 0 of the evaluator
+        self.evaluator.place(side, cell)
+        score = -self.negamax(them, new_me, depth - 1, ply + 1, -beta, -alpha)
+        self.evaluator.remove(side, cell)
+        return score
+
+    def negamax(self, me: int, them: int, depth: int, ply: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        self.check_budget()
+        if ply > self.max_ply:
+            self.max_ply = ply
+        key, transform = self.symmetry.canonical(me, them)
+        table_move = -1
+        if (entry := self.table.get(key)) is not None:
+            self.table_hits += 1
+            entry_depth, flag, entry_score, table_move = entry
+            table_move = self.symmetry.from_canonical_cell(table_move, transform)
+            if entry_depth >= depth:
+                score = score_from_table(entry_score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+        if depth <= 0:
+            return self.evaluate(ply)
+
+        alpha_original = alpha
+        best_score, best_move = -INFINITY, -1
+        self.expanded += 1
+        empty = self.geometry.full_mask & ~(me | them)
+        for cell in self.ordered_moves(empty, table_move, ply):
+            score = self.score_move(me, them, cell, depth, ply, alpha, beta)
+            if score > best_score:
+                best_score, best_move = score, cell
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.record_cutoff(cell, depth, ply)
+                        break
+
+        if best_score <= alpha_original:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.put(key, depth, flag, score_to_table(best_score, ply),
+                       self.symmetry.to_canonical_cell(best_move, transform))
+        return best_score
+
+    def evaluate(self, ply: int) -> int:
+        """value for the side to move of a position cut off at the depth limit, short of any forced result"""
+        return max(-WIN_THRESHOLD, min(WIN_THRESHOLD, self.evaluator.score(ply & 1)))
+
+    def ordered_moves(self, empty: int, table_move: int, ply: int) -> list[int]:
+        """principal variation (table) move, then the ply's killers, then the rest by history score"""
+        moves = mask_to_cells(empty)
+        moves.sort(key=self.history.__getitem__, reverse=True)
+        for first in (*reversed(self.killers[ply]), table_move):
+            if first >= 0 and empty >> first & 1:
+                moves.remove(first)
+                moves.insert(0, first)
+        return moves
+
+    def record_cutoff(self, cell: int, depth: int, ply: int) -> None:
+        killers = self.killers[ply]
+        if killers[0] != cell:
+            killers[1] = killers[0]
+            killers[0] = cell
+        self.history[cell] += depth * depth
+
+    def table_move(self, me: int, them: int) -> int:
+        key, transform = self.symmetry.canonical(me, them)
+        entry = self.table.get(key)
+        return self.symmetry.from_canonical_cell(entry[3], transform) if entry is not None else -1
+
+    def check_budget(self) -> None:
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted(f'Node budget of {self.max_nodes} exhausted')
+        if self.deadline is not None and self.nodes % TIME_CHECK_INTERVAL == 0 \
+                and time.perf_counter() > self.deadline:
+            raise SearchAborted(f'Time budget of {self.time_limit} seconds exhausted')
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import FrozenInstanceError, dataclass
 import re
-from functools import cached_property
+import threading
+from typing import Iterator
 
 # from tic_tac_toe.logic.validators import validate_grid
-from tic_tac_toe.logic.exceptions import InvalidMove, InvalidWinningPattern
-from tic_tac_toe.logic.params import SIZE, WINNING_LEN, WINNING_PATTERNS
+from tic_tac_toe.logic.bitboard import Geometry, get_geometry, cells_to_bits, bits_to_cells, mask_to_cells
+from tic_tac_toe.logic.exceptions import InvalidMove
+from tic_tac_toe.logic.symmetry import get_symmetry
+from tic_tac_toe.logic.params import SIZE, WINNING_LEN
 
 
 class Mark(str, Enum):
@@ -18,7 +21,7 @@ class Mark(str, Enum):
 
     @property
     def other(self) -> Mark:
-        if Mark.CROSS:
+        if self is Mark.CROSS:
             return Mark.NAUGHT
         else:
             return Mark.CROSS
@@ -32,39 +35,169 @@ class Move:
     after_gamestate: GameState
 
 
-@dataclass(frozen=True)
-class Grid:
-    size: int = SIZE  # number of rows and columns
-    cells: str = " " * SIZE ** 2  # CFG change for flexible size of game
-    winning_len: int = WINNING_LEN  # you could have a 5 by 5 with a winning length pf 4
+class ReadOnly:
+    """
+    base of the slotted, shared value classes: assigning or deleting an attribute raises FrozenInstanceError, as it
+    did when they were frozen dataclasses.  Their own code sets slots through the slot descriptors, bound once below
+    each class (about five times cheaper a call than object.__setattr__)
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise FrozenInstanceError(f'cannot assign to field {name!r}')
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f'cannot delete field {name!r}')
+
+
+class Grid(ReadOnly):
+    """
+    immutable board: a packed integer (the X bitboard in the low size ** 2 bits, the O bitboard above it) plus a
+    reference to the Geometry shared by every grid of the same (size, winning_len).  __slots__ keep an instance down to
+    those two references; the cells string is derived on demand
+    """
+    __slots__ = ('_geometry', '_board')
+
+    def __init__(self, size: int = SIZE, cells: str | None = None, winning_len: int = WINNING_LEN) -> None:
+        if cells is None:
+            cells = ' ' * size ** 2
+        if not re.match((r"^[\sXO]" + r"{" + str(size ** 2) + r"}$"), cells):
+            raise ValueError(f"Must contain {size ** 2} cells containing: X, O, or space\n.",
+                             f"Instead found this: {cells} of length {len(cells)}")
+        x_bits, o_bits = cells_to_bits(cells)
+        _set_geometry(self, get_geometry(size, winning_len))
+        _set_board(self, x_bits | o_bits << size ** 2)
+
+    @classmethod
+    def from_bits(cls, size: int, x_bits: int, o_bits: int, winning_len: int) -> Grid:
+        """builds a grid from its bitboards, without going through a cells string"""
+        return cls.from_board(get_geometry(size, winning_len), x_bits | o_bits << size ** 2)
+
+    @classmethod
+    def from_board(cls, geometry: Geometry, board: int) -> Grid:
+        grid = cls.__new__(cls)
+        _set_geometry(grid, geometry)
+        _set_board(grid, board)
+        return grid
+
+    @property
+    def size(self) -> int:
+        """number of rows and columns"""
+        return self._geometry.size
+
+    @property
+    def winning_len(self) -> int:
+        """you could have a 5 by 5 with a winning length of 4"""
+        return self._geometry.winning_len
+
+    @property
+    def geometry(self) -> Geometry:
+        return self._geometry
+
+    @property
+    def board(self) -> int:
+        """packed board, x_bits | o_bits << size ** 2"""
+        return self._board
+
+    @property
+    def bits(self) -> tuple[int, int]:
+        """
+        (X, O) bitboards, bit i is set when cell i holds that mark
+        """
+        return self._board & self._geometry.full_mask, self._board >> self.size ** 2
+
+    @property
+    def x_bits(self) -> int:
+        return self._board & self._geometry.full_mask
+
+    @property
+    def o_bits(self) -> int:
+        return self._board >> self.size ** 2
+
+    @property
+    def cells(self) -> str:
+        return bits_to_cells(self.x_bits, self.o_bits, self.size ** 2)
+
+    def __reduce__(self):
+        # rebuilt through get_geometry so the copy shares the process' Geometry again
+        return Grid.from_bits, (self.size, self.x_bits, self.o_bits, self.winning_len)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return self._geometry is other._geometry and self._board == other._board
+
+    def __hash__(self) -> int:
+        return hash((self.size, self.winning_len, self._board))
 
-    def __post_init__(self) -> None:
-        if not re.match((r"^[\sXO]" + r"{" + str(self.size ** 2) + r"}$"), self.cells):
-            raise ValueError(f"Must contain {self.size ** 2} cells containing: X, O, or space\n.",
-                             f"Instead found this: {self.cells} of length {len(self.cells)}")
+    def __repr__(self) -> str:
+        return f'Grid(size={self.size}, cells={self.cells!r}, winning_len={self.winning_len})'
+
+    def canonical(self) -> Grid:
+        """
+        the orientation, out of the 8 symmetric ones, that position keyed stores use
+        """
+        symmetry = get_symmetry(self.size)
+        x_bits, o_bits = symmetry.split_key(symmetry.canonical_key(*self.bits))
+        return Grid.from_bits(size=self.size, x_bits=x_bits, o_bits=o_bits, winning_len=self.winning_len)
 
     def x_count(self) -> int:
-        return self.cells.count("X")
+        return self.x_bits.bit_count()
 
     def y_count(self) -> int:
-        return self.cells.count("O")
+        return self.o_bits.bit_count()
 
     def empty_count(self) -> int:
-        return self.cells.count(" ")
+        return self.size ** 2 - self._board.bit_count()
 
     def winning_patterns(self) -> list[str]:
-        try:
-            return WINNING_PATTERNS[(SIZE, WINNING_LEN)]
-        except KeyError:
-            raise InvalidWinningPattern(f'Winning pattern not found for size {SIZE} and winning length {WINNING_LEN}')
+        """the winning patterns of this grid's own size and winning length"""
+        return self.geometry.patterns()
 
 
-@dataclass(frozen=True)
-class GameState:
-    grid: Grid
-    starting_mark: Mark = Mark.CROSS
+_set_geometry = Grid._geometry.__set__
+_set_board = Grid._board.__set__
+
+
+UNSOLVED = object()  # winner not worked out yet
+
+
+class GameState(ReadOnly):
+    """
+    immutable game state.  The winner is worked out once and kept in a slot; states reached through make_move_to are
+    interned, so a position reached by different move orders is one object whose winner is computed only once.  Being
+    shared, instances are read only
+    """
+    __slots__ = ('_grid', '_starting_mark', '_winner')
+
+    def __init__(self, grid: Grid, starting_mark: Mark = Mark.CROSS) -> None:
+        _set_grid(self, grid)
+        _set_starting_mark(self, starting_mark)
+        _set_winner(self, UNSOLVED)
 
-    @cached_property
+    @property
+    def grid(self) -> Grid:
+        return self._grid
+
+    @property
+    def starting_mark(self) -> Mark:
+        return self._starting_mark
+
+    def __reduce__(self):
+        return GameState, (self._grid, self._starting_mark)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return self._grid == other._grid and self._starting_mark is other._starting_mark
+
+    def __hash__(self) -> int:
+        return hash((self._grid, self._starting_mark))
+
+    def __repr__(self) -> str:
+        return f'GameState(grid={self._grid!r}, starting_mark={self._starting_mark})'
+
+    @property
     def current_mark(self) -> Mark:
         """
         whose turn is it "X" or "O ?
@@ -74,67 +207,143 @@ class GameState:
         else:
             return self.starting_mark.other
 
-    @cached_property
+    @property
     def game_not_started(self) -> bool:
-        return self.grid.empty_count() == self.grid.size ** 2
+        return self.grid.board == 0
 
-    @cached_property
+    @property
     def game_over(self) -> bool:
-        return self.winner or self.tie
+        return self.winner is not None or self.tie
 
-    @cached_property
+    @property
     def tie(self) -> bool:
-        return self.grid.empty_count() == 0 and self.winner is None
-
-    @cached_property
-    def winner(self) -> str | None:
-        for pattern in self.grid.winning_patterns():
-            for mark in Mark:
-                try:
-                    if re.match(pattern.replace("?", mark), self.grid.cells):
-                        return mark
-                except AttributeError:
-                    print(f"Attribute error pattern is {pattern}, and type is {type(pattern)}")
-        return None
-
-    @cached_property
+        return self.grid.geometry.is_full(*self.grid.bits) and self.winner is None
+
+    @property
+    def winner(self) -> Mark | None:
+        if self._winner is UNSOLVED:
+            winner = None
+            x_bits, o_bits = self.grid.bits
+            for line in self.grid.geometry.lines:
+                if x_bits & line == line:
+                    winner = Mark.CROSS
+                    break
+                if o_bits & line == line:
+                    winner = Mark.NAUGHT
+                    break
+            _set_winner(self, winner)
+        return self._winner
+
+    @property
     def winning_cells(self) -> list[int]:
-        for pattern in self.grid.winning_patterns():
-            for mark in Mark:
-                try:
-                    if re.match(pattern.replace("?", mark), self.grid.cells):
-                        return [
-                            match.start()
-                            for match in re.finditer(r"\?", pattern)
-                        ]
-                except AttributeError:
-                    print(f"Attribute error pattern is {pattern}, and type is {type(pattern)}")
-        return []
+        if self.winner is None:
+            return []
+        bits = self.grid.x_bits if self.winner is Mark.CROSS else self.grid.o_bits
+        return mask_to_cells(self.grid.geometry.winning_line(bits))
 
     def make_move_to(self, place: int) -> Move:
-        if place >= self.grid.size ** 2 or place < 0:
+        grid = self.grid
+        if place >= grid.size ** 2 or place < 0:
             raise InvalidMove('Index of place to move to is beyond range')
-        if self.grid.cells[place] != ' ':
+        x_bits, o_bits = grid.bits
+        bit = 1 << place
+        if (x_bits | o_bits) & bit:
             raise InvalidMove('Attempt to mark a non empty cell.')
+        mark = self.current_mark
+        if mark is Mark.CROSS:
+            x_bits |= bit
+            mover_bits = x_bits
+        else:
+            o_bits |= bit
+            mover_bits = o_bits
+        after_gamestate = state_cache.get(grid.geometry, x_bits | o_bits << grid.size ** 2, self.starting_mark)
+        if after_gamestate._winner is UNSOLVED and self.winner is None:
+            # only the lines through place can have changed, so the child need not rescan the whole board
+            _set_winner(after_gamestate, mark if grid.geometry.completes_line(mover_bits, place) else None)
         return Move(
-            mark=self.current_mark,
+            mark=mark,
             place=place,
             before_gamestate=self,
-            after_gamestate=GameState(
-                Grid(size=SIZE, cells=self.grid.cells[:place] + self.current_mark + self.grid.cells[place + 1:],
-                     winning_len=3),
-                starting_mark=self.starting_mark
-            )
+            after_gamestate=after_gamestate
         )
 
-    @cached_property
+    @property
+    def empty_cells(self) -> tuple[int, ...]:
+        """
+        indices of the empty cells, lowest first.  Cheap: read off the bitboards, no child state is built
+        """
+        grid = self.grid
+        return tuple(mask_to_cells(grid.geometry.full_mask & ~(grid.x_bits | grid.o_bits)))
+
+    @property
+    def legal_cells(self) -> tuple[int, ...]:
+        """cells the current mark may move to, none once the game is over"""
+        return () if self.game_over else self.empty_cells
+
+    def iter_moves(self) -> Iterator[Move]:
+        """
+        the possible moves one at a time, each child state built only when the caller takes it.  Search code does not
+        come through here: it makes and unmakes moves on (me, them) bitboard ints (logic/minimax, solver, mcts)
+        """
+        for place in self.legal_cells:
+            yield self.make_move_to(place)
+
+    @property
     def possible_moves(self) -> list[Move]:
-        moves = []
-        if not self.game_over:
-            for (pos, val) in enumerate(list(self.grid.cells)):
-                if val == ' ':
-                    moves.append(self.make_move_to(place=pos))
-            return moves
+        """every possible move with its child state, [] once the game is over.  Prefer iter_moves or legal_cells"""
+        return list(self.iter_moves())
+
+
+_set_grid = GameState._grid.__set__
+_set_starting_mark = GameState._starting_mark.__set__
+_set_winner = GameState._winner.__set__
+
+
+class StateCache:
+    """
+    interning factory for game states: a size bounded LRU keyed by configuration, packed board and starting mark.
+    Transpositions come back as the same object, with whatever it has already worked out.  Like the transposition
+    table, a plain dict in recency order: a hit moves its entry to the end and the first entry is the one evicted.
+    One cache serves the whole process, including the server's searches on the default thread pool, so a lock guards
+    the dict and the counters
+    """
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        self.capacity = capacity
+        self.states: dict[int, GameState] = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def get(self, geometry: Geometry, board: int, starting_mark: Mark = Mark.CROSS) -> GameState:
+        # one int rather than a tuple keeps the key small: sizes and winning lengths stay below 64
+        key = (board << 12 | geometry.size << 6 | geometry.winning_len) << 1 | (starting_mark is Mark.NAUGHT)
+        states = self.states
+        with self.lock:
+            if (state := states.pop(key, None)) is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                state = GameState(Grid.from_board(geometry, board), starting_mark=starting_mark)
+                if len(states) >= self.capacity:
+                    del states[next(iter(states))]
+            states[key] = state
+        return state
+
+    def clear(self) -> None:
+        with self.lock:
+            self.states.clear()
+            self.hits = self.misses = 0
+
+
+state_cache = StateCache()
+
+
+def intern_state(grid: Grid, starting_mark: Mark = Mark.CROSS) -> GameState:
+    """the shared GameState for a grid and starting mark"""
+    return state_cache.get(grid.geometry, grid.board, starting_mark)
 
 
 def preview(gs: GameState):
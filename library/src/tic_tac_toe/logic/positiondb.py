@@ -0,0 +1,231 @@
+"""
+Compact, versioned binary format for position databases, read through mmap so that a lookup neither loads nor
+unpickles the whole file.
+
+layout (all integers little endian except the keys):
+    header  magic b'TTDB', version u16, size u8, winning_len u8, first depth u8, last depth u8, key_width u8,
+            value_width u8, flags u8, record count u64.  The depths bound the number of marks of the stored positions
+    records count x (key, value), sorted by key.  The key packs 2 bits per cell (0 empty, 1 X, 2 O, cell 0 in the
+            lowest bits) and is written big endian so that byte order is numeric order and the binary search compares
+            raw slices.  The value is value_width bytes, by default the one byte result code of
+            one_time/generate_sequences (TIE = 0, WIN = 1, LOSS = 2, from X's point of view) with 3 for unknown.
+With FLAG_CANONICAL set only the canonical orientation of each position is stored and lookups canonicalize first.
+Writing sorts externally: records are gathered in runs of at most run_size, each run is sorted and spilled to a
+temporary file, and the runs are merged into the database, so memory is bounded by the run size, not the record count.
+sorted_records exposes that sort on its own, for writers that split one sorted stream over several files.
+"""
+from __future__ import annotations
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+from functools import partial
+from typing import BinaryIO, Iterable, Iterator
+
+from tic_tac_toe.logic.bitboard import cells_to_bits
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+MAGIC = b'TTDB'
+VERSION = 2  # 2 replaced the single depth by a first and last depth
+HEADER = struct.Struct('<4sHBBBBBBBQ')
+FLAG_CANONICAL = 1
+EMPTY, CROSS, NAUGHT = 0, 1, 2
+UNKNOWN = 3
+RUN_SIZE = 1_000_000  # records held in memory at once while writing
+READ_RECORDS = 4096  # records read per call when merging runs
+
+
+def key_width(cell_count: int) -> int:
+    return (2 * cell_count + 7) // 8
+
+
+def pack_bits(x_bits: int, o_bits: int, cell_count: int) -> int:
+    """(X, O) bitboards -> 2 bits per cell key"""
+    key = 0
+    for cell in range(cell_count):
+        if x_bits >> cell & 1:
+            key |= CROSS << 2 * cell
+        elif o_bits >> cell & 1:
+            key |= NAUGHT << 2 * cell
+    return key
+
+
+def unpack_key(key: int, cell_count: int) -> tuple[int, int]:
+    """2 bits per cell key -> (X, O) bitboards"""
+    x_bits = o_bits = 0
+    for cell in range(cell_count):
+        code = key >> 2 * cell & 3
+        if code == CROSS:
+            x_bits |= 1 << cell
+        elif code == NAUGHT:
+            o_bits |= 1 << cell
+    return x_bits, o_bits
+
+
+def mark_range(records: Iterable[tuple[tuple[int, int], int]]) -> tuple[int, int]:
+    """(fewest, most) marks of the positions of (x_bits, o_bits) -> value records, the header's depth range"""
+    counts = [(x_bits | o_bits).bit_count() for (x_bits, o_bits), _ in records]
+    return min(counts, default=0), max(counts, default=0)
+
+
+def write_position_db(f_name: str, size: int, winning_len: int, depth: int, records: Iterable[tuple[int, int]],
+                      value_width: int = 1, canonical: bool = True, run_size: int = RUN_SIZE,
+                      first_depth: int | None = None) -> int:
+    """
+    writes (x_bits, o_bits) -> value records, canonicalizing them first when asked to, and returns the record count.
+    depth is the most marks a stored position has, first_depth the fewest (depth when not given).  When a position
+    comes more than once its first value is kept.  The file is written under a temporary name and renamed, so readers
+    never see a half written database
+    """
+    temp_name = f_name + '.tmp'
+    run_home = os.path.dirname(os.path.abspath(f_name))
+    with open(temp_name, 'wb') as db_file:
+        header = partial(HEADER.pack, MAGIC, VERSION, size, winning_len, depth if first_depth is None else first_depth,
+                         depth, key_width(size ** 2), value_width, FLAG_CANONICAL if canonical else 0)
+        db_file.write(header(0))
+        count = 0
+        for key, value in sorted_records(records, size, value_width, canonical, run_size, run_home):
+            db_file.write(key + value)
+            count += 1
+        db_file.seek(0)
+        db_file.write(header(count))
+    os.replace(temp_name, f_name)
+    return count
+
+
+def sorted_records(records: Iterable[tuple[tuple[int, int], int]], size: int, value_width: int = 1,
+                   canonical: bool = True, run_size: int = RUN_SIZE,
+                   run_home: str | None = None) -> Iterator[tuple[bytes, bytes]]:
+    """
+    (key, value) of (x_bits, o_bits) -> value records in the database's byte layout, sorted by key, each position
+    once with its first value.  Runs that do not fit in memory are spilled to a temporary directory under run_home
+    """
+    cell_count = size ** 2
+    symmetry = get_symmetry(size)
+    width = key_width(cell_count)
+    with tempfile.TemporaryDirectory(prefix='positiondb-', dir=run_home) as run_dir:
+        runs: list[str] = []
+        keyed: dict[int, int] = {}
+        for (x_bits, o_bits), value in records:
+            if canonical:
+                x_bits, o_bits = symmetry.split_key(symmetry.canonical_key(x_bits, o_bits))
+            keyed.setdefault(pack_bits(x_bits, o_bits, cell_count), value)
+            if len(keyed) >= run_size:
+                runs.append(write_run(os.path.join(run_dir, f'run-{len(runs)}'), keyed, width, value_width))
+                keyed = {}
+        if not runs:
+            # everything fitted in one run: no spilling
+            for key in sorted(keyed):
+                yield key.to_bytes(width, 'big'), keyed[key].to_bytes(value_width, 'little')
+            return
+        if keyed:
+            runs.append(write_run(os.path.join(run_dir, f'run-{len(runs)}'), keyed, width, value_width))
+        keyed = {}
+        yield from merge_runs(runs, width, value_width)
+
+
+def write_run(f_name: str, keyed: dict[int, int], width: int, value_width: int) -> str:
+    """spills one run, sorted by key, in the database's own record layout"""
+    with open(f_name, 'wb') as run_file:
+        for key in sorted(keyed):
+            run_file.write(key.to_bytes(width, 'big') + keyed[key].to_bytes(value_width, 'little'))
+    return f_name
+
+
+def read_run(run_file: BinaryIO, index: int, width: int, value_width: int) -> Iterator[tuple[bytes, int, bytes]]:
+    """(key, run index, value) of a spilled run in key order, read in blocks"""
+    record_width = width + value_width
+    for block in iter(partial(run_file.read, record_width * READ_RECORDS), b''):
+        for start in range(0, len(block), record_width):
+            yield block[start:start + width], index, block[start + width:start + record_width]
+
+
+def merge_runs(runs: list[str], width: int, value_width: int) -> Iterator[tuple[bytes, bytes]]:
+    """
+    (key, value) of sorted runs merged in key order.  A key in several runs keeps the value of the earliest run,
+    which holds the earliest record
+    """
+    run_files = [open(run, 'rb') for run in runs]
+    try:
+        previous = None
+        for key, _, value in heapq.merge(*(read_run(run_file, index, width, value_width)
+                                           for index, run_file in enumerate(run_files))):
+            if key != previous:
+                yield key, value
+                previous = key
+    finally:
+        for run_file in run_files:
+            run_file.close()
+
+
+class PositionDB:
+    """
+    read only, mmap backed view of a position database
+    """
+    def __init__(self, f_name: str) -> None:
+        self.f_name = f_name
+        with open(f_name, 'rb') as db_file:
+            self.map = mmap.mmap(db_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.winning_len, self.first_depth, self.depth, self.key_width, self.value_width, \
+            self.flags, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{f_name} is not a position database')
+        if version != VERSION:
+            raise ValueError(f'Unsupported position database version {version} in {f_name}')
+        self.cell_count = self.size ** 2
+        self.record_width = self.key_width + self.value_width
+        self.symmetry = get_symmetry(self.size)
+
+    def __enter__(self) -> PositionDB:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.map.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def canonical(self) -> bool:
+        return bool(self.flags & FLAG_CANONICAL)
+
+    def offset(self, index: int) -> int:
+        return HEADER.size + index * self.record_width
+
+    def get(self, key: int) -> int | None:
+        """value stored under a packed key, by binary search on the mapped records"""
+        target = key.to_bytes(self.key_width, 'big')
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            start = self.offset(middle)
+            found = self.map[start:start + self.key_width]
+            if found < target:
+                low = middle + 1
+            elif found > target:
+                high = middle
+            else:
+                start += self.key_width
+                return int.from_bytes(self.map[start:start + self.value_width], 'little')
+        return None
+
+    def lookup(self, x_bits: int, o_bits: int) -> int | None:
+        if self.canonical:
+            x_bits, o_bits = self.symmetry.split_key(self.symmetry.canonical_key(x_bits, o_bits))
+        return self.get(pack_bits(x_bits, o_bits, self.cell_count))
+
+    def lookup_cells(self, cells: str) -> int | None:
+        return self.lookup(*cells_to_bits(cells))
+
+    def __iter__(self) -> Iterator[tuple[tuple[int, int], int]]:
+        """((x_bits, o_bits), value) in key order"""
+        for index in range(self.count):
+            start = self.offset(index)
+            key = int.from_bytes(self.map[start:start + self.key_width], 'big')
+            start += self.key_width
+            yield unpack_key(key, self.cell_count), int.from_bytes(self.map[start:start + self.value_width], 'little')
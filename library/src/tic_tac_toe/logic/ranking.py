@@ -0,0 +1,187 @@
+"""
+Perfect hashing of positions.  All boards with k Xs and m Os on n cells form a layer of C(n, k + m) * C(k + m, k)
+positions, and each gets a dense index within its layer from the combinatorial number system:
+    rank = rank of the occupied cells among all (k + m)-subsets of the n cells * C(k + m, k)
+           + rank of the X cells among all k-subsets of the occupied cells
+where a subset c_1 < c_2 < ... < c_j ranks as C(c_1, 1) + C(c_2, 2) + ... + C(c_j, j) (colex order, which is also the
+numeric order of the subsets as bitmasks).  Result tables then become flat buffers indexed by rank with no hashing.
+"""
+from __future__ import annotations
+
+import struct
+from functools import cache
+from typing import Iterator
+
+from tic_tac_toe.logic.bitboard import mask_to_cells
+
+
+@cache
+def binomials(n: int) -> tuple[tuple[int, ...], ...]:
+    """binomials(n)[a][b] is C(a, b) for 0 <= a, b <= n"""
+    table = [[0] * (n + 1) for _ in range(n + 1)]
+    for a in range(n + 1):
+        table[a][0] = 1
+        for b in range(1, a + 1):
+            table[a][b] = table[a - 1][b - 1] + table[a - 1][b]
+    return tuple(tuple(row) for row in table)
+
+
+class LayerRanker:
+    """
+    rank/unrank for the layer of boards with x_count Xs and o_count Os on cell_count cells
+    """
+    def __init__(self, cell_count: int, x_count: int, o_count: int) -> None:
+        if x_count + o_count > cell_count:
+            raise ValueError(f'{x_count} Xs and {o_count} Os do not fit on {cell_count} cells')
+        self.cell_count = cell_count
+        self.x_count = x_count
+        self.o_count = o_count
+        self.marks = x_count + o_count
+        self.binomial = binomials(cell_count)
+        self.x_choices = self.binomial[self.marks][x_count]
+        self.size = self.binomial[cell_count][self.marks] * self.x_choices
+
+    def __len__(self) -> int:
+        return self.size
+
+    def rank(self, x_bits: int, o_bits: int) -> int:
+        binomial = self.binomial
+        occupied_rank = x_rank = 0
+        placed = x_placed = 0
+        occupied = x_bits | o_bits
+        while occupied:
+            low = occupied & -occupied
+            cell = low.bit_length() - 1
+            if x_bits & low:
+                x_placed += 1
+                x_rank += binomial[placed][x_placed]
+            placed += 1
+            occupied_rank += binomial[cell][placed]
+            occupied ^= low
+        return occupied_rank * self.x_choices + x_rank
+
+    def unrank(self, rank: int) -> tuple[int, int]:
+        """(x_bits, o_bits) of the board with the given rank"""
+        if not 0 <= rank < self.size:
+            raise IndexError(f'Rank {rank} outside layer of {self.size} positions')
+        occupied_rank, x_rank = divmod(rank, self.x_choices)
+        occupied = unrank_subset(occupied_rank, self.marks, self.cell_count, self.binomial)
+        x_selection = unrank_subset(x_rank, self.x_count, self.marks, self.binomial)
+        x_bits = deposit(x_selection, mask_to_cells(occupied))
+        return x_bits, occupied ^ x_bits
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """(x_bits, o_bits) of every board of the layer in rank order"""
+        return self.iter_range(0, self.size)
+
+    def iter_range(self, start: int, stop: int) -> Iterator[tuple[int, int]]:
+        """
+        (x_bits, o_bits) for ranks start .. stop - 1, stepping through the subsets instead of unranking each one.  Ranks
+        past the end of the layer are ignored
+        """
+        stop = min(stop, self.size)
+        if start >= stop:
+            return
+        occupied_rank, x_rank = divmod(start, self.x_choices)
+        occupied = unrank_subset(occupied_rank, self.marks, self.cell_count, self.binomial)
+        selection = unrank_subset(x_rank, self.x_count, self.marks, self.binomial)
+        limit = 1 << self.marks
+        remaining = stop - start
+        while True:
+            cells = mask_to_cells(occupied)
+            while selection < limit:
+                x_bits = deposit(selection, cells)
+                yield x_bits, occupied ^ x_bits
+                remaining -= 1
+                if remaining == 0:
+                    return
+                selection = next_combination(selection) if selection else limit
+            occupied = next_combination(occupied)
+            selection = (1 << self.x_count) - 1
+
+
+def next_combination(subset: int) -> int:
+    """next larger mask with the same number of bits (Gosper's hack), i.e. the next subset in colex order"""
+    low = subset & -subset
+    ripple = subset + low
+    return ripple | ((subset ^ ripple) >> 2) // low
+
+
+def unrank_subset(rank: int, k: int, n: int, binomial: tuple[tuple[int, ...], ...]) -> int:
+    """mask of the k-subset of n bits with the given colex rank"""
+    subset = 0
+    candidate = n - 1
+    for j in range(k, 0, -1):
+        while binomial[candidate][j] > rank:
+            candidate -= 1
+        rank -= binomial[candidate][j]
+        subset |= 1 << candidate
+        candidate -= 1
+    return subset
+
+
+def deposit(selection: int, cells: list[int]) -> int:
+    """spreads the low bits of selection onto the given cells"""
+    bits = 0
+    for index, cell in enumerate(cells):
+        if selection >> index & 1:
+            bits |= 1 << cell
+    return bits
+
+
+@cache
+def get_ranker(cell_count: int, x_count: int, o_count: int) -> LayerRanker:
+    return LayerRanker(cell_count, x_count, o_count)
+
+
+def layer_counts(depth: int) -> tuple[int, int]:
+    """(x_count, o_count) after depth plies with X starting, as in generate_sequences.generate_permutes"""
+    o_count = depth // 2
+    return depth - o_count, o_count
+
+
+class ResultTable:
+    """
+    2 bits per position, indexed by rank: 4 results to a byte
+    """
+    HEADER = struct.Struct('<4sBBBQ')
+    MAGIC = b'TTRT'
+
+    def __init__(self, ranker: LayerRanker, data: bytearray | None = None) -> None:
+        self.ranker = ranker
+        self.data = data if data is not None else bytearray((ranker.size + 3) // 4)
+
+    def __len__(self) -> int:
+        return self.ranker.size
+
+    def __getitem__(self, rank: int) -> int:
+        return self.data[rank >> 2] >> ((rank & 3) << 1) & 3
+
+    def __setitem__(self, rank: int, value: int) -> None:
+        shift = (rank & 3) << 1
+        self.data[rank >> 2] = self.data[rank >> 2] & ~(3 << shift) | (value & 3) << shift
+
+    def get(self, x_bits: int, o_bits: int) -> int:
+        return self[self.ranker.rank(x_bits, o_bits)]
+
+    def set(self, x_bits: int, o_bits: int, value: int) -> None:
+        self[self.ranker.rank(x_bits, o_bits)] = value
+
+    def save(self, f_name: str) -> None:
+        ranker = self.ranker
+        with open(f_name, 'wb') as table_file:
+            table_file.write(self.HEADER.pack(self.MAGIC, ranker.cell_count, ranker.x_count, ranker.o_count,
+                                              ranker.size))
+            table_file.write(self.data)
+
+    @classmethod
+    def load(cls, f_name: str) -> ResultTable:
+        with open(f_name, 'rb') as table_file:
+            magic, cell_count, x_count, o_count, size = cls.HEADER.unpack(table_file.read(cls.HEADER.size))
+            if magic != cls.MAGIC:
+                raise ValueError(f'{f_name} is not a result table')
+            data = bytearray(table_file.read())
+        ranker = get_ranker(cell_count, x_count, o_count)
+        if len(data) != (size + 3) // 4 or size != ranker.size:
+            raise ValueError(f'{f_name} is truncated or does not match its header')
+        return cls(ranker, data)
@@ -0,0 +1,228 @@
+"""
+Append only log of finished games, compact enough to keep millions of them, read back one record at a time.
+
+layout (all integers little endian):
+    header  magic b'TTGR', version u16, once per file
+    records one per game: size u8, winning_len u8, starting mark u8, winner u8, move count u16, player X name length
+            u8, player O name length u8, the two names in UTF-8, then one byte per move, the cell index in play order.
+Marks are coded as in logic/positiondb (CROSS = 1, NAUGHT = 2) with NO_WINNER = 0 for a tie.  A cell takes one byte, so
+boards are limited to 256 cells.  A record is written in a single call, so a crashed writer leaves at most one
+truncated record at the end: the reader skips it and a recorder reopening the log cuts it off before appending.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+from tic_tac_toe.logic.models import GameState, Grid, Mark
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+MAGIC = b'TTGR'
+VERSION = 2  # 2 widened the move count to u16, for full 16x16 games
+FILE_HEADER = struct.Struct('<4sH')
+RECORD_HEADER = struct.Struct('<BBBBHBB')
+NO_WINNER, CROSS, NAUGHT = 0, 1, 2
+MARK_CODES = {Mark.CROSS: CROSS, Mark.NAUGHT: NAUGHT}
+CODE_MARKS = {CROSS: Mark.CROSS, NAUGHT: Mark.NAUGHT}
+MAX_CELLS = 256
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    size: int
+    winning_len: int
+    starting_mark: Mark
+    winner: Mark | None
+    player_x: str
+    player_o: str
+    moves: tuple[int, ...]  # cell indexes in play order
+
+    @classmethod
+    def from_game(cls, game_state: GameState, moves: Iterable[int], player_x: str, player_o: str) -> GameRecord:
+        """record of a finished game, given its final state and the cells played"""
+        grid = game_state.grid
+        return cls(size=grid.size, winning_len=grid.winning_len, starting_mark=game_state.starting_mark,
+                   winner=game_state.winner, player_x=player_x, player_o=player_o, moves=tuple(moves))
+
+    @property
+    def opening(self) -> int | None:
+        return self.moves[0] if self.moves else None
+
+    def outcome_for(self, mark: Mark) -> int:
+        """1 for a win, 0 for a draw, -1 for a loss of the player of `mark`"""
+        if self.winner is None:
+            return 0
+        return 1 if self.winner is mark else -1
+
+    def encode(self) -> bytes:
+        if self.size ** 2 > MAX_CELLS:
+            raise ValueError(f'A {self.size}x{self.size} board has more cells than a game record can hold')
+        names = self.player_x.encode(), self.player_o.encode()
+        if any(len(name) > 255 for name in names):
+            raise ValueError('Player names in game records are limited to 255 bytes')
+        header = RECORD_HEADER.pack(self.size, self.winning_len, MARK_CODES[self.starting_mark],
+                                    MARK_CODES.get(self.winner, NO_WINNER), len(self.moves), *map(len, names))
+        return header + names[0] + names[1] + bytes(self.moves)
+
+    def replay(self) -> Iterator[GameState]:
+        """every game state from the empty board to the final position.  InvalidMove on a corrupt record"""
+        game_state = GameState(Grid(size=self.size, winning_len=self.winning_len), starting_mark=self.starting_mark)
+        yield game_state
+        for cell in self.moves:
+            game_state = game_state.make_move_to(cell).after_gamestate
+            yield game_state
+
+    def final_state(self) -> GameState:
+        for game_state in self.replay():
+            pass
+        return game_state
+
+
+class GameRecorder:
+    """
+    appends game records to a log file, creating it (and its header) when missing.  A truncated record left at the end
+    by a crashed writer is cut off first, so that new records follow the last complete one.  One recorder per file at a
+    time
+    """
+    def __init__(self, f_name: str) -> None:
+        self.f_name = f_name
+        self.file: BinaryIO = open(f_name, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(f_name, 'rb') as log_file:
+                check_header(log_file, f_name)
+                end = complete_length(log_file)
+            if end < self.file.tell():
+                self.file.truncate(end)
+        self.count = 0
+
+    def __enter__(self) -> GameRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, record: GameRecord) -> None:
+        self.file.write(record.encode())
+        self.count += 1
+
+    def write_game(self, game_state: GameState, moves: Iterable[int], player_x: str, player_o: str) -> None:
+        self.write(GameRecord.from_game(game_state, moves, player_x, player_o))
+
+    def flush(self) -> None:
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def check_header(log_file: BinaryIO, f_name: str) -> None:
+    header = log_file.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size or header[:4] != MAGIC:
+        raise ValueError(f'{f_name} is not a game record log')
+    version = FILE_HEADER.unpack(header)[1]
+    if version != VERSION:
+        raise ValueError(f'Unsupported game record log version {version} in {f_name}')
+
+
+def complete_length(log_file: BinaryIO) -> int:
+    """
+    offset just past the last complete record, reading on from the current position.  Only the record headers are
+    read, the bodies are skipped
+    """
+    size = os.fstat(log_file.fileno()).st_size
+    end = log_file.tell()
+    while len(header := log_file.read(RECORD_HEADER.size)) == RECORD_HEADER.size:
+        _, _, _, _, move_count, x_length, o_length = RECORD_HEADER.unpack(header)
+        if end + RECORD_HEADER.size + x_length + o_length + move_count > size:
+            break
+        end = log_file.seek(x_length + o_length + move_count, os.SEEK_CUR)
+    return end
+
+
+def read_records(f_name: str) -> Iterator[GameRecord]:
+    """streams the records of a log, in the order they were written"""
+    with open(f_name, 'rb') as log_file:
+        check_header(log_file, f_name)
+        while len(header := log_file.read(RECORD_HEADER.size)) == RECORD_HEADER.size:
+            size, winning_len, starting, winner, move_count, x_length, o_length = RECORD_HEADER.unpack(header)
+            body = log_file.read(x_length + o_length + move_count)
+            if len(body) < x_length + o_length + move_count:
+                return  # truncated by a crashed writer
+            yield GameRecord(size=size, winning_len=winning_len, starting_mark=CODE_MARKS[starting],
+                             winner=CODE_MARKS.get(winner), player_x=body[:x_length].decode(),
+                             player_o=body[x_length:x_length + o_length].decode(),
+                             moves=tuple(body[x_length + o_length:]))
+
+
+@dataclass
+class Tally:
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    def add(self, outcome: int) -> None:
+        self.games += 1
+        if outcome > 0:
+            self.wins += 1
+        elif outcome < 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def draw_rate(self) -> float:
+        return self.draws / self.games if self.games else 0.0
+
+    @property
+    def loss_rate(self) -> float:
+        return self.losses / self.games if self.games else 0.0
+
+
+def by_opening(records: Iterable[GameRecord], canonical: bool = False) -> dict[tuple[int, int, int], Tally]:
+    """
+    (size, winning_len, opening cell) -> results for the player who opened.  With canonical set, openings that are
+    the same up to rotation and reflection are counted together under the canonical cell
+    """
+    tallies: dict[tuple[int, int, int], Tally] = {}
+    for record in records:
+        if (cell := record.opening) is None:
+            continue
+        if canonical:
+            symmetry = get_symmetry(record.size)
+            cell = symmetry.to_canonical_cell(cell, symmetry.canonical(1 << cell, 0)[1])
+        tallies.setdefault((record.size, record.winning_len, cell), Tally()).add(
+            record.outcome_for(record.starting_mark))
+    return tallies
+
+
+def by_player(records: Iterable[GameRecord]) -> dict[str, Tally]:
+    """player name -> results over all of its games, with either mark"""
+    tallies: dict[str, Tally] = {}
+    for record in records:
+        tallies.setdefault(record.player_x, Tally()).add(record.outcome_for(Mark.CROSS))
+        tallies.setdefault(record.player_o, Tally()).add(record.outcome_for(Mark.NAUGHT))
+    return tallies
+
+
+def main():
+    f_name = sys.argv[1]
+    for (size, winning_len, cell), tally in sorted(by_opening(read_records(f_name), canonical=True).items()):
+        print(f'{size}x{size}/{winning_len} opening {cell:>3}: {tally.games:>8} games, '
+              f'opener wins {tally.win_rate:.1%}, draws {tally.draw_rate:.1%}, loses {tally.loss_rate:.1%}')
+    for name, tally in sorted(by_player(read_records(f_name)).items()):
+        print(f'{name}: {tally.games} games, wins {tally.win_rate:.1%}, draws {tally.draw_rate:.1%}, '
+              f'losses {tally.loss_rate:.1%}')
+
+
+if __name__ == '__main__':
+    main()
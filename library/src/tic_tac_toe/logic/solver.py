@@ -0,0 +1,177 @@
+"""
+Memoized solver over the game DAG.  Every reachable position is expanded exactly once, under its canonical key, and
+gets a minimax value: the outcome for the side to move plus the number of plies to the end of the game under best
+play.  A position's depth is simply its number of marks, so a depth limit cuts every position at the same place however
+it is reached and the memo stays exact; positions beyond the limit are UNKNOWN.
+Values are packed into one small int: outcome | distance << 2.  Outcome codes follow one_time/generate_sequences
+(TIE = 0, WIN = 1, LOSS = 2) with UNKNOWN = 3 added, but are from the point of view of the side to move.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from pickle import dump, load
+
+from tic_tac_toe.logic.bitboard import Geometry, get_geometry, mask_to_cells
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+TIE = 0
+WIN = 1
+LOSS = 2
+UNKNOWN = 3
+
+TABLE_VERSION = 1
+
+
+def pack(outcome: int, distance: int) -> int:
+    return outcome | distance << 2
+
+
+def outcome_of(value: int) -> int:
+    return value & 3
+
+
+def distance_of(value: int) -> int:
+    return value >> 2
+
+
+def preference(value: int) -> tuple[int, int]:
+    """
+    sort key, from the mover's point of view, of a child value given from the opponent's point of view: quickest win
+    first, then a tie, then an unproven line, then the slowest loss
+    """
+    outcome, distance = outcome_of(value), distance_of(value)
+    if outcome == LOSS:
+        return 3, -distance
+    if outcome == TIE:
+        return 2, -distance
+    if outcome == UNKNOWN:
+        return 1, -distance
+    return 0, distance
+
+
+@dataclass(frozen=True)
+class SolveResult:
+    value: int
+    positions: int  # distinct canonical positions in the table
+    nodes: int  # positions expanded
+    seconds: float
+
+
+class Solver:
+    def __init__(self, geometry: Geometry, max_depth: int | None = None) -> None:
+        self.geometry = geometry
+        self.symmetry = get_symmetry(geometry.size)
+        self.max_depth = geometry.size ** 2 if max_depth is None else max_depth
+        self.table: dict[int, int] = {}
+        self.nodes = 0
+
+    def solve(self, me: int, them: int) -> SolveResult:
+        """
+        solves everything reachable from the position where the side owning `me` is to move
+        """
+        started = time.perf_counter()
+        if self.geometry.has_line(them):
+            value = pack(LOSS, 0)
+            self.table[self.symmetry.canonical_key(me, them)] = value
+        elif self.geometry.has_line(me):
+            raise ValueError('The side to move has already won')
+        else:
+            value = self.value(me, them)
+        return SolveResult(value=value, positions=len(self.table), nodes=self.nodes,
+                           seconds=time.perf_counter() - started)
+
+    def value(self, me: int, them: int) -> int:
+        key = self.symmetry.canonical_key(me, them)
+        if (value := self.table.get(key)) is not None:
+            return value
+        occupied = me | them
+        if occupied == self.geometry.full_mask:
+            value = pack(TIE, 0)
+        elif occupied.bit_count() >= self.max_depth:
+            value = pack(UNKNOWN, 0)
+        else:
+            self.nodes += 1
+            best = None
+            for cell in mask_to_cells(self.geometry.full_mask & ~occupied):
+                new_me = me | 1 << cell
+                if self.geometry.completes_line(new_me, cell):
+                    child = pack(LOSS, 0)
+                    self.table[self.symmetry.canonical_key(them, new_me)] = child
+                else:
+                    child = self.value(them, new_me)
+                if best is None or preference(child) > preference(best):
+                    best = child
+            value = pack(mover_outcome(outcome_of(best)), distance_of(best) + 1)
+        self.table[key] = value
+        return value
+
+
+def mover_outcome(child_outcome: int) -> int:
+    if child_outcome == LOSS:
+        return WIN
+    if child_outcome == WIN:
+        return LOSS
+    return child_outcome
+
+
+class SolvedTable:
+    """
+    a solved table as the game uses it: canonical position -> packed value
+    """
+    def __init__(self, size: int, winning_len: int, max_depth: int, values: dict[int, int]) -> None:
+        self.size = size
+        self.winning_len = winning_len
+        self.max_depth = max_depth
+        self.values = values
+        self.geometry = get_geometry(size, winning_len)
+        self.symmetry = get_symmetry(size)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def lookup(self, me: int, them: int) -> int | None:
+        """packed value for the side owning `me` to move, None if the position is not in the table"""
+        return self.values.get(self.symmetry.canonical_key(me, them))
+
+    def move_values(self, me: int, them: int) -> dict[int, int | None]:
+        """
+        cell -> packed value of playing there, from the point of view of the side owning `me`
+        """
+        values = {}
+        for cell in mask_to_cells(self.geometry.full_mask & ~(me | them)):
+            new_me = me | 1 << cell
+            if self.geometry.completes_line(new_me, cell):
+                values[cell] = pack(WIN, 1)
+            elif (child := self.lookup(them, new_me)) is None:
+                values[cell] = None
+            else:
+                values[cell] = pack(mover_outcome(outcome_of(child)), distance_of(child) + 1)
+        return values
+
+    def best_move(self, me: int, them: int) -> int | None:
+        known = {cell: value for cell, value in self.move_values(me, them).items() if value is not None}
+        if not known:
+            return None
+        return max(known, key=lambda cell: mover_preference(known[cell]))
+
+
+def mover_preference(value: int) -> tuple[int, int]:
+    """preference() for a value already given from the mover's point of view"""
+    return preference(pack(mover_outcome(outcome_of(value)), distance_of(value)))
+
+
+def save_table(f_name: str, solver: Solver) -> None:
+    header = {'version': TABLE_VERSION, 'size': solver.geometry.size, 'winning_len': solver.geometry.winning_len,
+              'max_depth': solver.max_depth}
+    with open(f_name, 'wb') as table_file:
+        dump((header, solver.table), table_file)
+
+
+def load_table(f_name: str) -> SolvedTable:
+    with open(f_name, 'rb') as table_file:
+        header, values = load(table_file)
+    if header['version'] != TABLE_VERSION:
+        raise ValueError(f"Unsupported table version {header['version']} in {f_name}")
+    return SolvedTable(size=header['size'], winning_len=header['winning_len'], max_depth=header['max_depth'],
+                       values=values)
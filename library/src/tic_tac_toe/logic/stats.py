@@ -0,0 +1,47 @@
+"""
+What one move cost.  Computer players fill in a SearchStats on every move and the engines hand it to their move hook,
+from where it can go to logs or a metrics pipeline (as_dict gives a flat, JSON ready record).  Counters that do not
+apply to a player stay 0: a book move or a random move searches no nodes.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+SEARCH = 'search'
+BOOK = 'book'
+RANDOM = 'random'
+HUMAN = 'human'
+
+
+@dataclass(frozen=True)
+class SearchStats:
+    player: str
+    mark: str
+    ply: int  # marks on the board before the move
+    move: int  # cell index
+    source: str  # SEARCH, BOOK, RANDOM or HUMAN
+    seconds: float  # wall time of the move, any artificial delay excluded
+    nodes: int = 0  # positions visited, playouts for Monte Carlo search
+    table_probes: int = 0  # transposition table
+    table_hits: int = 0
+    cache_hits: int = 0  # interned game states, see models.StateCache
+    cache_misses: int = 0
+    max_depth: int = 0
+    branching_factor: float = 0.0
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+    @property
+    def table_hit_rate(self) -> float:
+        return self.table_hits / self.table_probes if self.table_probes else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), 'nodes_per_second': self.nodes_per_second, 'table_hit_rate': self.table_hit_rate,
+                'cache_hit_rate': self.cache_hit_rate}
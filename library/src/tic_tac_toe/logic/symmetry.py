@@ -0,0 +1,111 @@
+"""
+The 8 symmetries of a square board (4 rotations, each optionally mirrored) and canonical position keys.  Every store
+keyed by position should use the canonical key so that the up to 8 equivalent orientations of a position share one
+entry.  Cell permutations are precomputed per size, and so are per-chunk lookup tables that move a whole bitboard in a
+couple of table reads instead of one shift per cell.
+"""
+from __future__ import annotations
+
+from functools import cache
+
+from tic_tac_toe.logic.bitboard import bits_to_cells, cells_to_bits
+
+IDENTITY = 0
+CHUNK_BITS = 13  # lookup tables of at most 8192 entries per chunk and transform
+
+
+def cell_permutations(size: int) -> tuple[tuple[int, ...], ...]:
+    """
+    permutations[t][cell] is where cell lands under transform t.  0-3 are rotations by 0, 90, 180 and 270 degrees,
+    4-7 are the same rotations applied to the board mirrored left to right
+    """
+    def rotate(row: int, col: int) -> tuple[int, int]:
+        return col, size - 1 - row
+
+    permutations = []
+    for mirrored in (False, True):
+        for turns in range(4):
+            permutation = []
+            for cell in range(size ** 2):
+                row, col = divmod(cell, size)
+                if mirrored:
+                    col = size - 1 - col
+                for _ in range(turns):
+                    row, col = rotate(row, col)
+                permutation.append(row * size + col)
+            permutations.append(tuple(permutation))
+    return tuple(permutations)
+
+
+class Symmetry:
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.cell_count = size ** 2
+        self.permutations = cell_permutations(size)
+        self.inverses = tuple(tuple(sorted(range(self.cell_count), key=permutation.__getitem__))
+                              for permutation in self.permutations)
+        chunk_count = -(-self.cell_count // CHUNK_BITS)
+        self.chunk_bits = -(-self.cell_count // chunk_count)
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.chunk_tables = tuple(self.build_chunk_tables(permutation, chunk_count)
+                                  for permutation in self.permutations)
+
+    def build_chunk_tables(self, permutation: tuple[int, ...], chunk_count: int) -> tuple[tuple[int, list[int]], ...]:
+        tables = []
+        for chunk in range(chunk_count):
+            shift = chunk * self.chunk_bits
+            cells = [cell for cell in range(shift, min(shift + self.chunk_bits, self.cell_count))]
+            table = [0] * (1 << len(cells))
+            for value in range(1, len(table)):
+                low = value & -value
+                table[value] = table[value ^ low] | 1 << permutation[cells[low.bit_length() - 1]]
+            tables.append((shift, table))
+        return tuple(tables)
+
+    def transform(self, bits: int, transform: int) -> int:
+        result = 0
+        for shift, table in self.chunk_tables[transform]:
+            result |= table[bits >> shift & self.chunk_mask]
+        return result
+
+    def canonical(self, first: int, second: int) -> tuple[int, int]:
+        """
+        (key, transform) where key is the smallest first << cells | second over the 8 orientations and transform is
+        the one producing it
+        """
+        shift = self.cell_count
+        mask = self.chunk_mask
+        best_key = first << shift | second
+        best_transform = IDENTITY
+        for transform in range(1, 8):
+            moved_first = moved_second = 0
+            for chunk_shift, table in self.chunk_tables[transform]:
+                moved_first |= table[first >> chunk_shift & mask]
+                moved_second |= table[second >> chunk_shift & mask]
+            if (key := moved_first << shift | moved_second) < best_key:
+                best_key, best_transform = key, transform
+        return best_key, best_transform
+
+    def canonical_key(self, first: int, second: int) -> int:
+        return self.canonical(first, second)[0]
+
+    def split_key(self, key: int) -> tuple[int, int]:
+        return key >> self.cell_count, key & (1 << self.cell_count) - 1
+
+    def to_canonical_cell(self, cell: int, transform: int) -> int:
+        """real orientation -> canonical orientation"""
+        return self.permutations[transform][cell]
+
+    def from_canonical_cell(self, cell: int, transform: int) -> int:
+        """canonical orientation -> real orientation, e.g. for a best move read back from a store"""
+        return self.inverses[transform][cell]
+
+    def canonical_cells(self, cells: str) -> str:
+        """cells string of the canonical orientation of a position"""
+        x_bits, o_bits = self.split_key(self.canonical_key(*cells_to_bits(cells)))
+        return bits_to_cells(x_bits, o_bits, self.cell_count)
+
+
+@cache
+def get_symmetry(size: int) -> Symmetry:
+    return Symmetry(size)
@@ -0,0 +1,86 @@
+"""
+NumPy batch evaluation: many boards classified in one call.  A batch of boards is a 2-D uint8 array with one row per
+board and one column per cell holding EMPTY, CROSS or NAUGHT.  A line is won when the board's marks on it, counted
+through a cells x lines membership matrix derived from the configuration's lines, reach the winning length.
+"""
+from __future__ import annotations
+
+from functools import cache
+
+import numpy as np
+
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.ranking import LayerRanker
+
+EMPTY = 0
+CROSS = 1
+NAUGHT = 2
+NO_WINNER = 0
+
+
+@cache
+def membership_matrix(size: int, winning_len: int) -> np.ndarray:
+    """
+    float32 (cells, lines) matrix, 1 where the cell is on the line.  float32 so that the product runs through BLAS
+    """
+    lines = get_geometry(size, winning_len).lines
+    cells = np.arange(size ** 2, dtype=np.uint64)[:, None]
+    masks = np.array(lines, dtype=np.uint64)[None, :]
+    return ((masks >> cells) & np.uint64(1)).astype(np.float32)
+
+
+def classify_boards(boards: np.ndarray, size: int, winning_len: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (winner, tie) for every row: winner is a uint8 array of NO_WINNER, CROSS or NAUGHT and tie a bool array
+    """
+    if boards.ndim != 2 or boards.shape[1] != size ** 2:
+        raise ValueError(f'Expected boards of shape (n, {size ** 2}), got {boards.shape}')
+    matrix = membership_matrix(size, winning_len)
+    x_won = ((boards == CROSS).astype(np.float32) @ matrix >= winning_len).any(axis=1)
+    o_won = ((boards == NAUGHT).astype(np.float32) @ matrix >= winning_len).any(axis=1)
+    winner = np.where(x_won, CROSS, np.where(o_won, NAUGHT, NO_WINNER)).astype(np.uint8)
+    tie = (boards != EMPTY).all(axis=1) & ~x_won & ~o_won
+    return winner, tie
+
+
+def boards_from_cells(cells: list[str]) -> np.ndarray:
+    """cells strings -> batch of boards"""
+    codes = np.zeros(256, dtype=np.uint8)
+    codes[ord('X')], codes[ord('O')] = CROSS, NAUGHT
+    return codes[np.frombuffer(''.join(cells).encode('ascii'), dtype=np.uint8)].reshape(len(cells), -1)
+
+
+def boards_from_bits(x_bits: np.ndarray, o_bits: np.ndarray, cell_count: int) -> np.ndarray:
+    """uint64 X and O bitboards -> batch of boards"""
+    shifts = np.arange(cell_count, dtype=np.uint64)
+    one = np.uint64(1)
+    x_cells = (x_bits.astype(np.uint64)[:, None] >> shifts) & one
+    o_cells = (o_bits.astype(np.uint64)[:, None] >> shifts) & one
+    return (x_cells * CROSS + o_cells * NAUGHT).astype(np.uint8)
+
+
+def unrank_subsets(ranks: np.ndarray, k: int, n: int, binomial: tuple[tuple[int, ...], ...]) -> np.ndarray:
+    """
+    elements, in increasing order, of the k-subsets of n with the given colex ranks: shape (len(ranks), k).  The
+    greedy unranking of ranking.unrank_subset, one searchsorted per element for the whole batch
+    """
+    elements = np.empty((len(ranks), k), dtype=np.int64)
+    remaining = ranks.astype(np.int64)
+    for j in range(k, 0, -1):
+        column = np.array([binomial[c][j] for c in range(n)], dtype=np.int64)
+        element = np.searchsorted(column, remaining, side='right') - 1
+        elements[:, j - 1] = element
+        remaining = remaining - column[element]
+    return elements
+
+
+def unrank_boards(ranker: LayerRanker, ranks: np.ndarray) -> np.ndarray:
+    """batch of boards for the given ranks of a layer"""
+    occupied_ranks, x_ranks = np.divmod(ranks.astype(np.int64), ranker.x_choices)
+    occupied = unrank_subsets(occupied_ranks, ranker.marks, ranker.cell_count, ranker.binomial)
+    x_indices = unrank_subsets(x_ranks, ranker.x_count, ranker.marks, ranker.binomial)
+    boards = np.zeros((len(ranks), ranker.cell_count), dtype=np.uint8)
+    rows = np.arange(len(ranks))[:, None]
+    boards[rows, occupied] = NAUGHT
+    boards[rows, np.take_along_axis(occupied, x_indices, axis=1)] = CROSS
+    return boards
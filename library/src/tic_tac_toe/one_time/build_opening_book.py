@@ -0,0 +1,116 @@
+"""
+builds the opening book of logic/book.py: every canonical position reachable in up to `plies` moves from the empty
+board is searched by the iterative deepening negamax of logic/minimax.py (3x3 is solved outright) and its best move
+stored.  Positions are spread over a process pool, each worker keeping one transposition table for its batch.
+
+    python -m tic_tac_toe.one_time.build_opening_book --size 5 --winning-len 4 --plies 2 --time-limit 5
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tic_tac_toe.logic.book import VALUE_WIDTH, OpeningBook, pack_entry
+from tic_tac_toe.logic.bitboard import get_geometry, mask_to_cells
+from tic_tac_toe.logic.minimax import WIN_THRESHOLD, NegamaxSearch, TranspositionTable
+from tic_tac_toe.logic.params import SIZE, WINNING_LEN
+from tic_tac_toe.logic.positiondb import write_position_db
+from tic_tac_toe.logic.solver import TIE, WIN, LOSS, UNKNOWN
+from tic_tac_toe.logic.symmetry import get_symmetry
+
+DB_HOME = os.path.join(os.path.dirname(__file__), 'DB')
+BATCH_SIZE = 16
+
+
+def book_name(size: int, winning_len: int, db_home: str = DB_HOME) -> str:
+    return os.path.join(db_home, f'opening_book_{size}_{winning_len}.ttdb')
+
+
+def canonical_openings(size: int, winning_len: int, plies: int) -> list[tuple[int, int]]:
+    """
+    canonical (me, them) of every unfinished position up to plies moves deep, me being the side to move
+    """
+    geometry = get_geometry(size, winning_len)
+    symmetry = get_symmetry(size)
+    layer = {symmetry.canonical_key(0, 0)}
+    positions = []
+    for ply in range(plies + 1):
+        positions.extend(symmetry.split_key(key) for key in sorted(layer))
+        if ply == plies:
+            break
+        next_layer = set()
+        for key in layer:
+            me, them = symmetry.split_key(key)
+            for cell in mask_to_cells(geometry.full_mask & ~(me | them)):
+                new_me = me | 1 << cell
+                if geometry.completes_line(new_me, cell) or new_me | them == geometry.full_mask:
+                    continue
+                next_layer.add(symmetry.canonical_key(them, new_me))
+        layer = next_layer
+    return positions
+
+
+def search_openings(positions: list[tuple[int, int]], size: int, winning_len: int,
+                    time_limit: float) -> list[tuple[tuple[int, int], int]]:
+    """book records for a batch of canonical positions, run inside one worker"""
+    geometry = get_geometry(size, winning_len)
+    table = TranspositionTable()
+    records = []
+    for me, them in positions:
+        result = NegamaxSearch(geometry, table=table, time_limit=time_limit).search(me, them)
+        if result.score > WIN_THRESHOLD:
+            outcome = WIN
+        elif result.score < -WIN_THRESHOLD:
+            outcome = LOSS
+        else:
+            outcome = TIE if result.completed else UNKNOWN
+        # the position is already canonical, so the move is stored as searched
+        records.append(((me, them), pack_entry(result.move, outcome)))
+    return records
+
+
+def build_opening_book(size: int = SIZE, winning_len: int = WINNING_LEN, plies: int = 2, time_limit: float = 5.0,
+                       workers: int | None = None, f_name: str | None = None) -> str:
+    f_name = f_name or book_name(size, winning_len)
+    os.makedirs(os.path.dirname(f_name) or '.', exist_ok=True)
+    started = time.perf_counter()
+    positions = canonical_openings(size, winning_len, plies)
+    print(f'{len(positions)} canonical positions up to ply {plies}')
+    batches = [positions[start:start + BATCH_SIZE] for start in range(0, len(positions), BATCH_SIZE)]
+    records = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in executor.map(search_openings, batches, [size] * len(batches), [winning_len] * len(batches),
+                                  [time_limit] * len(batches)):
+            records.extend(batch)
+    count = write_position_db(f_name, size, winning_len, plies, records, value_width=VALUE_WIDTH)
+    print(f'{count} book moves written to {f_name} ({os.stat(f_name).st_size} bytes) in '
+          f'{time.perf_counter() - started:.1f}s')
+    return f_name
+
+
+def test_book():
+    f_name = build_opening_book(size=3, winning_len=3, plies=3, f_name=book_name(3, 3))
+    book = OpeningBook(f_name)
+    started = time.perf_counter()
+    entry = book.probe(0, 0)
+    print(f'empty 3x3 board: move {entry.move}, outcome {entry.outcome} '
+          f'(probe took {(time.perf_counter() - started) * 1e6:.0f}us)')
+    book.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds an opening book of searched canonical positions')
+    parser.add_argument('--size', type=int, default=SIZE)
+    parser.add_argument('--winning-len', type=int, default=WINNING_LEN)
+    parser.add_argument('--plies', type=int, default=2, help='deepest position in the book, in moves played')
+    parser.add_argument('--time-limit', type=float, default=5.0, help='seconds of search per position')
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cores')
+    parser.add_argument('--out', default=None, help='defaults to DB/opening_book_<size>_<winning len>.ttdb')
+    args = parser.parse_args()
+    build_opening_book(args.size, args.winning_len, args.plies, args.time_limit, args.workers, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+converts the pickled DB/seq_db_X_n_O_n files into the binary position database format of logic/positiondb.py.
+The pickles hold lists of __main__.GameSeq objects, which only load when that class exists in __main__, so the
+unpickler below maps it onto a stand in.  Each seq is a prefix of the cells, the rest of the grid is empty, and
+win_loss is None or the 'Win'/'Loss'/'Tie' strings of one_time/minimax.check_win_loss_tie (from X's point of view).
+"""
+from __future__ import annotations
+
+import os
+import re
+from pickle import Unpickler
+
+from tic_tac_toe.logic.bitboard import cells_to_bits
+from tic_tac_toe.logic.params import SIZE, WINNING_LEN
+from tic_tac_toe.logic.positiondb import mark_range, write_position_db, PositionDB, UNKNOWN
+
+DB_HOME = os.path.join(os.path.dirname(__file__), 'DB')
+SUFFIX = '.ttdb'
+RESULT_CODES = {None: UNKNOWN, 'Tie': 0, 'Win': 1, 'Loss': 2}
+
+
+class GameSeq:
+    """stand in for the class the sequence databases were pickled with"""
+    seq: tuple
+    win_loss: str | None
+
+
+class SeqDBUnpickler(Unpickler):
+    def find_class(self, module: str, name: str):
+        if name == 'GameSeq':
+            return GameSeq
+        return super().find_class(module, name)
+
+
+def read_seq_db(f_name: str) -> list[GameSeq]:
+    with open(f_name, 'rb') as seq_database:
+        return SeqDBUnpickler(seq_database).load()
+
+
+def convert(f_name: str, size: int = SIZE, winning_len: int = WINNING_LEN) -> str:
+    """
+    writes f_name + SUFFIX and returns its name
+    """
+    records = [
+        (cells_to_bits(''.join(row.seq).ljust(size ** 2)), RESULT_CODES[row.win_loss])
+        for row in read_seq_db(f_name)
+    ]
+    first_depth, depth = mark_range(records)
+    out_name = f_name + SUFFIX
+    count = write_position_db(out_name, size=size, winning_len=winning_len, depth=depth, records=records,
+                              first_depth=first_depth)
+    print(f'{f_name}: {count} canonical positions written to {out_name} ({os.stat(out_name).st_size} bytes, '
+          f'pickle was {os.stat(f_name).st_size} bytes)')
+    return out_name
+
+
+def convert_all(db_home: str = DB_HOME) -> None:
+    for f_name in sorted(os.listdir(db_home)):
+        if re.match(r'seq_db_X_\d+_O_\d+$', f_name):
+            convert(os.path.join(db_home, f_name))
+    return
+
+
+def test_convert():
+    f_name = convert(os.path.join(DB_HOME, 'seq_db_X_2_O_2'))
+    with PositionDB(f_name) as position_db:
+        for row in read_seq_db(os.path.join(DB_HOME, 'seq_db_X_2_O_2')):
+            assert position_db.lookup_cells(''.join(row.seq).ljust(SIZE ** 2)) is not None
+        print(f'{len(position_db)} records, all pickled sequences found')
+    return
+
+
+def main():
+    convert_all()
+    return
+
+
+if __name__ == '__main__':
+    main()
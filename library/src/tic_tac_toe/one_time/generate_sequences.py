@@ -1,35 +1,50 @@
 """
 run a batch file on Google Cloud to generate all sequences for every depth from 1 to 24.  This will be run in a batch
 on GCP instance.  This program will create a repository of XO sequences and store results in pickle dumps for use in
-minimax
+minimax.
+Positions are stored under their canonical orientation only (see logic/symmetry.py), which cuts the stores by up to 8x
+Boards are enumerated layer by layer in rank order (see logic/ranking.py), so a layer's results can be kept as flat
+2 bits per position tables indexed by rank instead of dicts keyed by 25-tuples
+build_parallel is the batch entry point: each depth's rank space is cut into shards that a process pool unranks and
+classifies with NumPy a block at a time (logic/vectorized.py), every shard is written atomically and recorded in a
+manifest, so a rerun after an interruption resumes at the first missing shard.
+build_win_loss_db is the single process alternative: a generator pipeline (enumerate, classify, keep the terminal
+positions, sort externally, write fixed size chunks) whose memory use stays flat whatever the depth.  As the chunks
+split one sorted stream their key ranges do not overlap, and an index of those ranges lets a lookup bisect straight to
+the one chunk that can hold a position
 """
-from more_itertools import distinct_permutations
+from bisect import bisect_right
 from itertools import permutations
-from itertools import chain
 from collections import namedtuple
-from pickle import dump, load
-import re
-from dataclasses import dataclass
+from pickle import load
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
 import os
-from tic_tac_toe.logic.models import Mark
-from typing import Iterator
+import time
+import numpy as np
+from tic_tac_toe.logic.bitboard import get_geometry, bits_to_cells, cells_to_bits
+from tic_tac_toe.logic.positiondb import HEADER, MAGIC, VERSION, FLAG_CANONICAL, PositionDB, key_width, \
+    pack_bits, sorted_records, unpack_key
+from tic_tac_toe.logic.ranking import LayerRanker, get_ranker, layer_counts
+from tic_tac_toe.logic.vectorized import CROSS, NAUGHT, classify_boards, unrank_boards
+from tic_tac_toe.logic.symmetry import get_symmetry
+from typing import Iterable, Iterator
 SIZE = 5
-WP = [
-    "?....?....?....?.........", ".....?....?....?....?....", ".?....?....?....?........",
-    "......?....?....?....?...", "..?....?....?....?.......", ".......?....?....?....?..",
-    "...?....?....?....?......", "........?....?....?....?.", "....?....?....?....?.....",
-    ".........?....?....?....?", "????.....................", ".????....................",
-    ".....????................", "......????...............", "..........????...........",
-    "...........????..........", "...............????......", "................????.....",
-    "....................????.", ".....................????", "...?...?...?...?.........",
-    "....?...?...?...?........", "........?...?...?...?....", ".........?...?...?...?...",
-    ".....?.....?.....?.....?.", "?.....?.....?.....?......", "......?.....?.....?.....?",
-    ".?.....?.....?.....?....."
-]
+WINNING_LEN = 4
+SYMMETRY = get_symmetry(SIZE)
+GEOMETRY = get_geometry(SIZE, WINNING_LEN)
 DB_HOME = './DB'
 WIN = 1
 LOSS = 2
 TIE = 0
+NO_RESULT = 3  # game still open, the 2 bit code used in result tables
+SHARD_SIZE = 1 << 22  # ranks per shard, a multiple of 4 so that shards split the 2 bit tables on byte boundaries
+MANIFEST = 'manifest.json'
+CHUNK_INDEX = 'win_loss_index.json'
+CHUNK_SIZE = 1 << 20  # records per chunk file of the streaming build
+BLOCK_SIZE = 1 << 16  # boards per NumPy classification call
 
 
 move = namedtuple('move', 'Mark, place, score')
@@ -38,61 +53,251 @@ place: int | None
 score: int | None
 best_move: move | None
 seq_data = namedtuple('seq_data', 'win_loss, moves, best_move')
-seq_db = {tuple: seq_data}
-win_loss_db: dict[tuple: int] = {}
 
 
 def generate_permutes(depth: int) -> Iterator:
     """
-    generates all strings for a given number of Xs and Os - depth which are of length size ** 2
-    and checks for win. Returns a namedtuple
+    generates all strings for a given number of Xs and Os - depth which are of length size ** 2, as tuples in rank
+    order
     """
-    o_depth = depth // 2
-    x_depth = depth - o_depth
-    permutes = distinct_permutations('X' * x_depth + 'O' * o_depth + ' ' * (SIZE ** 2 - x_depth - o_depth))
-    return permutes
+    ranker = get_ranker(SIZE ** 2, *layer_counts(depth))
+    return (tuple(bits_to_cells(x_bits, o_bits, SIZE ** 2)) for x_bits, o_bits in ranker)
+
+
+def classify(x_bits: int, o_bits: int) -> int:
+    """
+    WIN/LOSS/TIE from 'X' point of view, NO_RESULT while the game is open
+    """
+    if GEOMETRY.has_line(x_bits):
+        return WIN
+    if GEOMETRY.has_line(o_bits):
+        return LOSS
+    if GEOMETRY.is_full(x_bits, o_bits):
+        return TIE
+    return NO_RESULT
+
+
+def classify_rank_range(ranker: LayerRanker, start: int, stop: int) -> bytearray:
+    """
+    result codes of ranks start .. stop - 1 packed 4 to a byte, as ResultTable stores them.  Boards are unranked and
+    classified with NumPy a block at a time; start must be a multiple of 4
+    """
+    data = bytearray()
+    for block_start in range(start, stop, BLOCK_SIZE):
+        ranks = np.arange(block_start, min(block_start + BLOCK_SIZE, stop), dtype=np.int64)
+        winner, tie = classify_boards(unrank_boards(ranker, ranks), SIZE, WINNING_LEN)
+        codes = np.full(len(ranks) + -len(ranks) % 4, NO_RESULT, dtype=np.uint8)
+        codes[:len(ranks)][winner == CROSS] = WIN
+        codes[:len(ranks)][winner == NAUGHT] = LOSS
+        codes[:len(ranks)][tie] = TIE
+        codes = codes.reshape(-1, 4)
+        data += (codes[:, 0] | codes[:, 1] << 2 | codes[:, 2] << 4 | codes[:, 3] << 6).tobytes()
+    return data
+
+
+@dataclass(frozen=True)
+class ShardReport:
+    depth: int
+    shard: int
+    positions: int
+    seconds: float
+    f_name: str
+
+    @property
+    def positions_per_second(self) -> float:
+        return self.positions / self.seconds if self.seconds else 0.0
+
+
+def shard_name(out_dir: str, depth: int, shard: int) -> str:
+    x_count, o_count = layer_counts(depth)
+    return os.path.join(out_dir, f'win_loss_X_{x_count}_O_{o_count}.shard_{shard:05d}')
+
+
+def build_shard(depth: int, shard: int, shard_size: int, out_dir: str) -> ShardReport:
+    """
+    classifies ranks [shard * shard_size, (shard + 1) * shard_size) of a layer into a 2 bit per position slice.
+    Runs in a worker process; the slice is written under a temporary name and renamed once complete
+    """
+    started = time.perf_counter()
+    ranker = get_ranker(SIZE ** 2, *layer_counts(depth))
+    start = shard * shard_size
+    stop = min(start + shard_size, ranker.size)
+    data = classify_rank_range(ranker, start, stop)
+    f_name = shard_name(out_dir, depth, shard)
+    with open(f_name + '.tmp', 'wb') as shard_file:
+        shard_file.write(data)
+    os.replace(f_name + '.tmp', f_name)
+    return ShardReport(depth=depth, shard=shard, positions=stop - start, seconds=time.perf_counter() - started,
+                       f_name=f_name)
+
+
+def read_manifest(out_dir: str) -> dict:
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {'size': SIZE, 'winning_len': WINNING_LEN, 'shard_size': None, 'shards': {}}
+
+
+def write_manifest(out_dir: str, manifest: dict) -> None:
+    f_name = os.path.join(out_dir, MANIFEST)
+    with open(f_name + '.tmp', 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=1)
+    os.replace(f_name + '.tmp', f_name)
+
+
+def build_parallel(depths: range = range(1, SIZE ** 2), out_dir: str = DB_HOME, workers: int | None = None,
+                   shard_size: int = SHARD_SIZE) -> list[ShardReport]:
+    """
+    builds the result tables of all depths with one process per core.  Shards already in the manifest, and present
+    on disk, are skipped
+    """
+    if shard_size % 4:
+        raise ValueError('shard_size must be a multiple of 4')
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = read_manifest(out_dir)
+    if manifest['shard_size'] not in (None, shard_size):
+        raise ValueError(f"{out_dir} was started with shard_size {manifest['shard_size']}, not {shard_size}")
+    manifest['shard_size'] = shard_size
+    pending = []
+    for depth in depths:
+        shard_count = -(-get_ranker(SIZE ** 2, *layer_counts(depth)).size // shard_size)
+        for shard in range(shard_count):
+            if f'{depth}/{shard}' in manifest['shards'] and os.path.exists(shard_name(out_dir, depth, shard)):
+                continue
+            pending.append((depth, shard))
+    print(f'{len(pending)} shards to build, {len(manifest["shards"])} already done')
+    reports = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build_shard, depth, shard, shard_size, out_dir) for depth, shard in pending]
+        for future in as_completed(futures):
+            report = future.result()
+            reports.append(report)
+            manifest['shards'][f'{report.depth}/{report.shard}'] = asdict(report)
+            write_manifest(out_dir, manifest)
+            print(f'depth {report.depth} shard {report.shard}: {report.positions} positions in '
+                  f'{report.seconds:.1f}s ({report.positions_per_second:,.0f}/s)')
+    positions = sum(report.positions for report in reports)
+    elapsed = time.perf_counter() - started
+    print(f'{positions} positions in {elapsed:.1f}s ({positions / elapsed if elapsed else 0:,.0f}/s overall)')
+    return reports
 
 
 def check_win_loss_tie(permute: tuple) -> int | None:
     """
     rewritten win lose logic without using the class definitions
     expects tuples of length SIZE ** 2
-    Win/loss from 'X' point of view
+    Win/loss from 'X' point of view.  Classified on bitboards, so nothing needs to be remembered between calls
     """
-    try:
-        win_loss_tie = win_loss_db[permute]
-        return win_loss_tie
-    except KeyError:
-        result = None
-        cells = ''.join(permute)
-        for pattern in WP:
-            for mark in ['X', 'O']:
-                try:
-                    if re.match(pattern.replace("?", mark), cells):
-                        result = WIN if mark == 'X' else LOSS
-                except AttributeError:
-                    print(f"Attribute error, pattern is {pattern}, and type is {type(pattern)}")
-        if cells.count(' ') == 0:
-            result = TIE
-        win_loss_db[permute] = result
-        return result
-
-
-def build_win_loss_db():
-    permutes = ()
-    for depth in range(10, 11):
-        permutes_new = generate_permutes(depth=depth)
-        temp_permutes = permutes
-        permutes = chain(temp_permutes, permutes_new)
-    for permute in permutes:
-        win_or_loss = check_win_loss_tie(permute)
-        seq_db[permute] = seq_data(win_loss=win_or_loss, moves=None, best_move=None)
-    with open('win_loss_data.dict', 'wb') as sequence_db:
-        dump(seq_db, sequence_db)
-    return
+    result = classify(*cells_to_bits(''.join(permute)))
+    return None if result == NO_RESULT else result
+
+
+def enumerate_positions(depths: Iterable[int]) -> Iterator[tuple[int, int]]:
+    """
+    (x_bits, o_bits) of every canonical board of the given depths, one at a time
+    """
+    for depth in depths:
+        for x_bits, o_bits in get_ranker(SIZE ** 2, *layer_counts(depth)):
+            if SYMMETRY.canonical_key(x_bits, o_bits) == x_bits << SIZE ** 2 | o_bits:
+                yield x_bits, o_bits
+
+
+def classify_positions(positions: Iterable[tuple[int, int]]) -> Iterator[tuple[tuple[int, int], int]]:
+    for x_bits, o_bits in positions:
+        yield (x_bits, o_bits), classify(x_bits, o_bits)
+
+
+def terminal_only(records: Iterable[tuple[tuple[int, int], int]]) -> Iterator[tuple[tuple[int, int], int]]:
+    return (record for record in records if record[1] != NO_RESULT)
+
+
+def chunked(records: Iterable, chunk_size: int) -> Iterator[list]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_chunk(f_name: str, chunk: list[tuple[bytes, bytes]]) -> tuple[int, int]:
+    """
+    writes sorted (key, value) records as a position database, its header carrying the depth range of the chunk, and
+    returns that range
+    """
+    depths = [sum(unpack_key(int.from_bytes(key, 'big'), SIZE ** 2)).bit_count() for key, _ in chunk]
+    first_depth, last_depth = min(depths), max(depths)
+    with open(f_name + '.tmp', 'wb') as db_file:
+        db_file.write(HEADER.pack(MAGIC, VERSION, SIZE, WINNING_LEN, first_depth, last_depth, key_width(SIZE ** 2), 1,
+                                  FLAG_CANONICAL, len(chunk)))
+        for key, value in chunk:
+            db_file.write(key + value)
+    os.replace(f_name + '.tmp', f_name)
+    return first_depth, last_depth
+
+
+def build_win_loss_db(depths: Iterable[int] = range(1, SIZE ** 2), out_dir: str = DB_HOME,
+                      chunk_size: int = CHUNK_SIZE) -> int:
+    """
+    streams every canonical board of the given depths through classification and writes the terminal ones, sorted by
+    key, as position databases of at most chunk_size records each, then the index of their key ranges.  Only one run
+    of the external sort or one chunk is ever held in memory, so peak memory does not grow with depth.  Returns the
+    number of chunks written
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    depths = list(depths)
+    records = sorted_records(terminal_only(classify_positions(enumerate_positions(depths))), SIZE, run_home=out_dir)
+    index = []
+    for number, chunk in enumerate(chunked(records, chunk_size), start=1):
+        f_name = f'win_loss_{depths[0]}_{depths[-1]}.chunk_{number:05d}.ttdb'
+        first_depth, last_depth = write_chunk(os.path.join(out_dir, f_name), chunk)
+        index.append({'first_key': int.from_bytes(chunk[0][0], 'big'), 'last_key': int.from_bytes(chunk[-1][0], 'big'),
+                      'f_name': f_name, 'first_depth': first_depth, 'last_depth': last_depth})
+        print(f'{len(chunk)} terminal positions of depths {first_depth} to {last_depth} written to {f_name}')
+    f_name = os.path.join(out_dir, CHUNK_INDEX)
+    with open(f_name + '.tmp', 'w') as index_file:
+        json.dump({'size': SIZE, 'winning_len': WINNING_LEN, 'chunks': index}, index_file, indent=1)
+    os.replace(f_name + '.tmp', f_name)
+    return len(index)
     # end of function
 
 
+@dataclass
+class WinLossDB:
+    """the chunks written by build_win_loss_db, in key order, with the first and last key of each"""
+    first_keys: list[int]
+    last_keys: list[int]
+    chunks: list[PositionDB]
+
+
+def open_win_loss_db(out_dir: str = DB_HOME) -> WinLossDB:
+    """
+    reads the chunk index of a build_win_loss_db run and maps its chunks rather than loading them
+    """
+    with open(os.path.join(out_dir, CHUNK_INDEX)) as index_file:
+        index = json.load(index_file)['chunks']
+    return WinLossDB(first_keys=[entry['first_key'] for entry in index],
+                     last_keys=[entry['last_key'] for entry in index],
+                     chunks=[PositionDB(os.path.join(out_dir, entry['f_name'])) for entry in index])
+
+
+def lookup_win_loss(db: WinLossDB, x_bits: int, o_bits: int) -> int:
+    """
+    the stored result of a position, NO_RESULT when it is not terminal.  Bisects the index to the only chunk whose key
+    range can hold the position, then binary searches that chunk
+    """
+    key = pack_bits(*SYMMETRY.split_key(SYMMETRY.canonical_key(x_bits, o_bits)), SIZE ** 2)
+    number = bisect_right(db.first_keys, key) - 1
+    if number < 0 or key > db.last_keys[number]:
+        return NO_RESULT
+    result = db.chunks[number].get(key)
+    return NO_RESULT if result is None else result
+
+
 """
 def build_up(depth: int) -> None:
     builds up permutations of Xs and Os based on depth
@@ -166,18 +371,27 @@ def test_read_gcp_data():
 
 
 def test_build_up():
-    build_win_loss_db()
+    build_win_loss_db(depths=range(7, 10))
     return
 
 
 def main():
+    parser = argparse.ArgumentParser(description='Builds the win/loss/tie tables of every depth in parallel shards')
+    parser.add_argument('--first-depth', type=int, default=1)
+    parser.add_argument('--last-depth', type=int, default=SIZE ** 2 - 1)
+    parser.add_argument('--out-dir', default=DB_HOME)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the number of cores')
+    parser.add_argument('--shard-size', type=int, default=SHARD_SIZE)
+    args = parser.parse_args()
+    build_parallel(depths=range(args.first_depth, args.last_depth + 1), out_dir=args.out_dir, workers=args.workers,
+                   shard_size=args.shard_size)
     # print("Starting the compute")
     # for depth in range(1, SIZE ** 2):
     #     print(f"Building for depth {depth}")
     #     build_up(depth=depth)
     # test_read_gcp_data()
     # fast_list_gen()
-    test_build_up()
+    # test_build_up()
     return
 
 
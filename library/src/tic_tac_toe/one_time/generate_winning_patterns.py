@@ -3,7 +3,6 @@ This file creates all winning patterns for a given grid size and winning length
 This will be run one time and winning patterns created will be store using pickle dumps for use in the game project
 """
 from __future__ import annotations
-from itertools import permutations
 from dataclasses import dataclass
 from json import dump, dumps
 from os import getcwd
@@ -35,10 +34,9 @@ class Grid:
         """
         win_vectors: list = []
         for pad in range(0, self.size - self.win_len + 1):
-            permute_string = MARKER + DOT * pad
-            for x in permutations(permute_string):
-                win_vector = list(''.join(x).replace(MARKER, MARKER * self.win_len))
-                win_vectors.append(win_vector)
+            # the run of markers slides along a line of win_len + pad cells, one vector per offset
+            for offset in range(pad + 1):
+                win_vectors.append(list(DOT * offset + MARKER * self.win_len + DOT * (pad - offset)))
         return win_vectors
 
     def get_horizontal_position_vectors(self) -> map:
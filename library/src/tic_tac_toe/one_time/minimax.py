@@ -5,68 +5,47 @@ Scores are stored for two scenarios 1. grid, winning_len = 3,3 and 2. grid, winn
 
 modifications:
 1. using stored pickle sequence_db.data to load sequences and their win loss tie status
-2. for every iteration if there are any wins then those are chosen in best moves and the branch is closed for any more
-iteration
-3. Next all losing branches are also closed for further iteration
-4. With Tie the branch naturally reaches its end
-5. Other wise the moves keep accumulating scores
+2. the tree recursion of get_score is replaced by the memoized solver in logic/solver.py: every reachable position is
+expanded once, under its canonical (symmetry reduced) key, and gets a proper minimax value - win/loss/tie for the side
+to move plus the distance to the end of the game
+3. 5x5 openings are solved up to a configurable depth, positions beyond it are left as unknown
+4. the values are written to a table that the game loads with logic/solver.load_table
 """
 from itertools import permutations
 import re
-minmax_scores = {}
 from tic_tac_toe.logic.models import Grid, GameState, Mark
 from tic_tac_toe.logic.params import SIZE, WINNING_LEN, WINNING_PATTERNS
-all_scores: dict = {}
-hits: int = 0
-misses: int = 0
+from tic_tac_toe.logic.solver import Solver, save_table, outcome_of, distance_of
+from tic_tac_toe.logic.vectorized import CROSS, NAUGHT, boards_from_cells, classify_boards
 
 WP = WINNING_PATTERNS[SIZE, WINNING_LEN]
+OUTCOMES = {0: 'Tie', 1: 'Win', 2: 'Loss', 3: 'Unknown'}
 
 
-def get_score(move, starting_mark: Mark, score: int) -> int:
-    global all_scores, hits, misses
-    new_game_state = move.after_gamestate
-    if new_game_state.winner == starting_mark:
-        all_scores[new_game_state.grid.cells] = 1
-        score += 1
-        misses += 1
-    elif new_game_state.winner == starting_mark.other:
-        all_scores[new_game_state.grid.cells] = -1
-        score -= 1
-        misses += 1
-    elif new_game_state.tie is True:
-        all_scores[new_game_state.grid.cells] = 0
-        misses += 1
-    else:
-        for new_move in new_game_state.possible_moves:
-            this_score = get_score(move=new_move, starting_mark=starting_mark, score=score)
-            if this_score is not None:
-                score += this_score
-            all_scores[new_move.after_gamestate.grid.cells] = score
-        all_scores[move.after_gamestate.grid.cells] = score
-    all_scores[move.after_gamestate.grid.cells] = score
-    return score
-
-
+def solve(cells: str, size: int = SIZE, winning_len: int = WINNING_LEN, max_depth: int | None = None,
+          f_name: str | None = None) -> Solver:
+    """
+    solves every position reachable from cells, reports node count and wall time and optionally writes the table
+    """
+    game_state = GameState(Grid(size=size, winning_len=winning_len, cells=cells))
+    grid = game_state.grid
+    me, them = (grid.x_bits, grid.o_bits) if game_state.current_mark is Mark.CROSS else (grid.o_bits, grid.x_bits)
+    solver = Solver(grid.geometry, max_depth=max_depth)
+    result = solver.solve(me, them)
+    print(f'{size}x{size}/{winning_len} from {cells!r} up to depth {solver.max_depth}: '
+          f'{OUTCOMES[outcome_of(result.value)]} in {distance_of(result.value)} for {game_state.current_mark}, '
+          f'{result.nodes} nodes expanded, {result.positions} positions stored in {result.seconds:.2f}s')
+    if f_name:
+        save_table(f_name, solver)
+    return solver
 
 
 def test():
-    global all_scores, hits, misses
-    starting_point = cells = ''.join(['X', 'O', 'X', 'O', 'X', 'O', ' ', ' ', ' '])
-    start_game_state = GameState(Grid(size=SIZE, winning_len=WINNING_LEN, cells=starting_point),
-                                 starting_mark=Mark.CROSS)
-    for move in start_game_state.possible_moves:
-        score = get_score(move=move, starting_mark=Mark.CROSS, score=0)
-        print(move, score)
-    print('all scores follows...')
-    print(all_scores)
-    print(f'hits: {hits}, misses: {misses}')
+    solve(cells=' ' * 9, size=3, winning_len=3, f_name='minimax_scores_3_3')
+    solve(cells=' ' * 25, size=5, winning_len=4, max_depth=5)
     return
 
 
-
-
-
 def test_winning_patterns():
     grid = Grid(size=SIZE, cells=' ' * (SIZE ** 2), winning_len=WINNING_LEN)
     print(grid.winning_patterns())
@@ -89,6 +68,16 @@ def check_win_loss_tie(cells: str, starting_mark=Mark.CROSS) -> str | None:
     return None
 
 
+def check_win_loss_tie_batch(cells: list[str], starting_mark=Mark.CROSS) -> list[str | None]:
+    """
+    check_win_loss_tie for many boards in one NumPy call
+    """
+    winner, tie = classify_boards(boards_from_cells(cells), SIZE, WINNING_LEN)
+    win, loss = (CROSS, NAUGHT) if starting_mark is Mark.CROSS else (NAUGHT, CROSS)
+    return ['Win' if won == win else 'Loss' if won == loss else 'Tie' if tied else None
+            for won, tied in zip(winner.tolist(), tie.tolist())]
+
+
 def test_winner():
     cells = '?....?....?....?.........'.replace('?.', 'XO')
     cells = cells.replace('.', ' ')
@@ -103,9 +92,11 @@ def test_check_win_loss_tie():
     assert depth <= SIZE ** 2
     o_count = depth // 2
     x_count = depth - o_count
-    permutes = [''.join(permute) + ' ' * (SIZE ** 2 - depth) for permute in permutations(['X'] * x_count + ['O'] * o_count)]
-    for sequence in permutes:
-        print(f'String is {sequence} and result is {check_win_loss_tie(sequence)}')
+    permutes = [''.join(permute) + ' ' * (SIZE ** 2 - depth)
+                for permute in permutations(['X'] * x_count + ['O'] * o_count)]
+    for sequence, result in zip(permutes, check_win_loss_tie_batch(permutes)):
+        assert result == check_win_loss_tie(sequence)
+        print(f'String is {sequence} and result is {result}')
     return
 
 
@@ -114,7 +105,8 @@ def main():
     # test_winner() # succeeded
     # test_generate_permutes() # succeeded
     # test_check_closed_permute()
-    test_check_win_loss_tie()
+    # test_check_win_loss_tie()
+    test()
     return
 
 
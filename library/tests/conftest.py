@@ -0,0 +1,62 @@
+from functools import cache
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import get_geometry, mask_to_cells
+from tic_tac_toe.logic.minimax import WIN_SCORE
+
+
+@pytest.fixture(scope='session')
+def geometry_3x3():
+    return get_geometry(3, 3)
+
+
+@pytest.fixture(scope='session')
+def positions_3x3(geometry_3x3):
+    """(me, them) of every reachable unfinished 3x3 position, the side owning `me` to move"""
+    geometry = geometry_3x3
+    seen = set()
+    stack = [(0, 0)]
+    positions = []
+    while stack:
+        me, them = stack.pop()
+        if (me, them) in seen:
+            continue
+        seen.add((me, them))
+        if geometry.has_line(them) or me | them == geometry.full_mask:
+            continue
+        positions.append((me, them))
+        for cell in mask_to_cells(geometry.full_mask & ~(me | them)):
+            stack.append((them, me | 1 << cell))
+    return positions
+
+
+@pytest.fixture(scope='session')
+def brute_force(geometry_3x3):
+    """
+    plain minimax over the full game tree, memoized on the exact position only.  Scores are from the side to move's
+    point of view as in logic/minimax: WIN_SCORE less the plies to a win, the negative of that for a loss, 0 for a tie
+    """
+    geometry = geometry_3x3
+
+    @cache
+    def score(me: int, them: int) -> int:
+        best = None
+        for cell in mask_to_cells(geometry.full_mask & ~(me | them)):
+            value = move_score(me, them, cell)
+            best = value if best is None or value > best else best
+        return best
+
+    @cache
+    def move_score(me: int, them: int, cell: int) -> int:
+        new_me = me | 1 << cell
+        if geometry.has_line(new_me):
+            return WIN_SCORE - 1
+        if new_me | them == geometry.full_mask:
+            return 0
+        child = score(them, new_me)
+        # one ply further from the end of the game, seen from the other side
+        return -child + (child > 0) - (child < 0)
+
+    score.move_score = move_score
+    return score
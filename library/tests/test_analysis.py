@@ -0,0 +1,92 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from tic_tac_toe.logic.analysis import Analyzer, get_solver
+from tic_tac_toe.logic.bitboard import mask_to_cells
+from tic_tac_toe.logic.exceptions import InvalidGameState
+from tic_tac_toe.logic.minimax import WIN_SCORE
+from tic_tac_toe.logic.models import Mark
+from tic_tac_toe.logic.solver import LOSS, TIE, UNKNOWN, WIN, Solver, pack
+
+
+def to_score(outcome: int, distance: int) -> int:
+    """an outcome and distance as a logic/minimax score"""
+    return {WIN: WIN_SCORE - distance, LOSS: distance - WIN_SCORE, TIE: 0}[outcome]
+
+
+def packed_boards(positions: list[tuple[int, int]]) -> list[int]:
+    """(me, them) positions of X first games as packed boards"""
+    boards = []
+    for me, them in positions:
+        x_bits, o_bits = (me, them) if me.bit_count() == them.bit_count() else (them, me)
+        boards.append(x_bits | o_bits << 9)
+    return boards
+
+
+def check(analyses, positions, brute_force):
+    for (me, them), analysis in zip(positions, analyses):
+        score = brute_force(me, them)
+        assert to_score(analysis.outcome, analysis.distance) == score
+        assert brute_force.move_score(me, them, analysis.best_move) == score
+        assert sorted(move.cell for move in analysis.moves) == mask_to_cells(0x1FF & ~(me | them))
+        for move in analysis.moves:
+            assert to_score(move.outcome, move.distance) == brute_force.move_score(me, them, move.cell)
+
+
+def test_best_moves_match_the_solver(geometry_3x3, positions_3x3, brute_force):
+    analyzer = Analyzer(3, 3)
+    analyses = analyzer.analyze(packed_boards(positions_3x3))
+    check(analyses, positions_3x3, brute_force)
+    solver = Solver(geometry_3x3)
+    for (me, them), analysis in zip(positions_3x3, analyses):
+        assert pack(analysis.outcome, analysis.distance) == solver.value(me, them)
+    # the batch is reduced to the 627 unfinished positions up to symmetry before solving
+    assert len(analyzer.cache) == 627
+
+
+def test_cache_and_executor_agree(positions_3x3, brute_force):
+    boards = packed_boards(positions_3x3)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        analyzer = Analyzer(3, 3, executor=executor, chunk_size=100)
+        first = analyzer.analyze(boards)
+    assert analyzer.cache.hits == 0
+    assert analyzer.analyze(boards) == first
+    assert analyzer.cache.hits == len(analyzer.cache)
+    check(first, positions_3x3, brute_force)
+
+
+def test_solver_memo_stays_bounded(positions_3x3, brute_force):
+    analyzer = Analyzer(3, 3, memo_size=100, chunk_size=16)
+    solver = get_solver(3, 3, None)
+    sizes = []
+    for start in range(0, len(positions_3x3), 16):
+        chunk = positions_3x3[start:start + 16]
+        check(analyzer.analyze(packed_boards(chunk)), chunk, brute_force)
+        sizes.append(len(solver.table))
+    assert max(sizes) <= 100
+    assert len(analyzer.cache) == 627
+
+
+def test_cells_strings_and_starting_mark():
+    naught_first = Analyzer(3, 3, starting_mark=Mark.NAUGHT)
+    # O to move, and O has two in the top row
+    analysis = naught_first.analyze_one('OO XX    ')
+    assert (analysis.best_move, analysis.outcome, analysis.distance) == (2, WIN, 1)
+    assert Analyzer(3, 3).analyze_one('OO XX    ').best_move == 5
+
+
+def test_finished_and_invalid_positions():
+    analyzer = Analyzer(3, 3)
+    lost = analyzer.analyze_one('XXXOO    ')
+    assert (lost.outcome, lost.distance, lost.moves, lost.best_move) == (LOSS, 0, (), None)
+    assert analyzer.analyze_one('XOXXOOOXX').outcome == TIE
+    for cells in ('XX       ', 'X O', 'OO       '):
+        with pytest.raises(InvalidGameState):
+            analyzer.analyze_one(cells)
+
+
+def test_depth_limit():
+    analysis = Analyzer(4, 3, max_depth=2).analyze_one(0)
+    assert analysis.outcome == UNKNOWN
+    assert all(move.outcome == UNKNOWN for move in analysis.moves)
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from tic_tac_toe.logic.batch import GameBatch, random_playouts
+from tic_tac_toe.logic.models import GameState, Grid, Mark
+from tic_tac_toe.logic.vectorized import CROSS, NAUGHT, NO_WINNER, boards_from_cells
+
+WINNER_CODES = {None: NO_WINNER, Mark.CROSS: CROSS, Mark.NAUGHT: NAUGHT}
+
+
+@pytest.mark.parametrize('size, winning_len', [(3, 3), (4, 3), (5, 4)])
+def test_playouts_replay_as_real_games(size, winning_len):
+    result = random_playouts(size, winning_len, games=300, seed=size)
+    for game in range(300):
+        starting_mark = Mark.CROSS if game % 2 == 0 else Mark.NAUGHT
+        game_state = GameState(Grid(size=size, winning_len=winning_len), starting_mark=starting_mark)
+        plies = int(result.plies[game])
+        for cell in result.moves[game, :plies]:
+            assert not game_state.game_over
+            game_state = game_state.make_move_to(int(cell)).after_gamestate
+        assert game_state.game_over
+        assert (result.moves[game, plies:] == -1).all()
+        assert result.winner[game] == WINNER_CODES[game_state.winner]
+
+
+def test_rates_and_seed():
+    first = random_playouts(3, 3, games=1000, seed=42)
+    second = random_playouts(3, 3, games=1000, seed=42)
+    assert (first.moves == second.moves).all()
+    rates = first.rates()
+    assert sum(rates.values()) == pytest.approx(1.0)
+    # random play on 3x3 favours whoever starts, and the starts alternate
+    assert 0.3 < rates['X'] < 0.6 and 0.3 < rates['O'] < 0.6
+
+
+def test_games_from_given_boards():
+    boards = boards_from_cells(['XX OO    ', 'XXXOO    ', 'XOXXOOOXX'])
+    batch = GameBatch(3, 3, games=3, starting_mark=NAUGHT, boards=boards, seed=0)
+    assert list(batch.finished) == [False, True, True]
+    result = batch.run()
+    assert result.winner[1] == CROSS and result.winner[2] == NO_WINNER
+    assert result.plies[1] == result.plies[2] == 0
+    assert result.moves[0, 0] != -1
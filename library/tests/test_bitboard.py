@@ -0,0 +1,91 @@
+import random
+import re
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import bits_to_cells, cells_to_bits, get_geometry, mask_to_cells
+from tic_tac_toe.logic.exceptions import InvalidWinningPattern
+from tic_tac_toe.logic.models import GameState, Grid, Mark, state_cache
+from tic_tac_toe.one_time.generate_winning_patterns import Grid as PatternGrid
+
+CONFIGURATIONS = [(3, 3), (4, 3), (4, 4), (5, 4), (6, 5)]
+
+
+def regex_winner(cells: str, size: int, winning_len: int) -> str | None:
+    """the winner as the regex check of the original code found it"""
+    for pattern in PatternGrid(size=size, win_len=winning_len).get_winning_patterns():
+        for mark in 'XO':
+            if re.match(pattern.replace('?', mark), cells):
+                return mark
+    return None
+
+
+def random_cells(rng: random.Random, size: int) -> str:
+    cell_count = size ** 2
+    x_count = rng.randint(0, (cell_count + 1) // 2)
+    o_count = rng.randint(max(0, x_count - 1), min(x_count, cell_count - x_count))
+    cells = ['X'] * x_count + ['O'] * o_count + [' '] * (cell_count - x_count - o_count)
+    rng.shuffle(cells)
+    return ''.join(cells)
+
+
+@pytest.mark.parametrize('size, winning_len', CONFIGURATIONS)
+def test_has_line_matches_regex(size, winning_len):
+    geometry = get_geometry(size, winning_len)
+    rng = random.Random(size * 100 + winning_len)
+    for _ in range(300):
+        cells = random_cells(rng, size)
+        x_bits, o_bits = cells_to_bits(cells)
+        # random boards may hold two winners, so each side is checked on its own marks
+        assert geometry.has_line(x_bits) == (regex_winner(cells.replace('O', ' '), size, winning_len) == 'X')
+        assert geometry.has_line(o_bits) == (regex_winner(cells.replace('X', ' '), size, winning_len) == 'O')
+
+
+@pytest.mark.parametrize('size, winning_len', CONFIGURATIONS)
+def test_completes_line_matches_full_scan(size, winning_len):
+    geometry = get_geometry(size, winning_len)
+    rng = random.Random(size * 100 + winning_len)
+    for _ in range(300):
+        x_bits, o_bits = cells_to_bits(random_cells(rng, size))
+        if geometry.has_line(x_bits):
+            continue
+        for cell in mask_to_cells(geometry.full_mask & ~(x_bits | o_bits)):
+            assert geometry.completes_line(x_bits | 1 << cell, cell) == geometry.has_line(x_bits | 1 << cell)
+
+
+@pytest.mark.parametrize('size, winning_len', CONFIGURATIONS)
+def test_incremental_winner_matches_regex(size, winning_len):
+    state_cache.clear()  # states cached by earlier tests would already know their winner
+    rng = random.Random(size * 100 + winning_len)
+    for _ in range(50):
+        game_state = GameState(Grid(size=size, winning_len=winning_len), starting_mark=rng.choice(list(Mark)))
+        while not game_state.game_over:
+            game_state = game_state.make_move_to(rng.choice(game_state.legal_cells)).after_gamestate
+            expected = regex_winner(game_state.grid.cells, size, winning_len)
+            assert game_state.winner == (None if expected is None else Mark(expected))
+
+
+@pytest.mark.parametrize('size, winning_len', CONFIGURATIONS)
+def test_lines_are_the_winning_patterns(size, winning_len):
+    patterns = set(PatternGrid(size=size, win_len=winning_len).get_winning_patterns())
+    assert set(get_geometry(size, winning_len).patterns()) == patterns
+
+
+def test_cells_round_trip():
+    cells = 'XO X  O X'
+    x_bits, o_bits = cells_to_bits(cells)
+    assert mask_to_cells(x_bits) == [0, 3, 8]
+    assert mask_to_cells(o_bits) == [1, 6]
+    assert bits_to_cells(x_bits, o_bits, 9) == cells
+
+
+def test_is_full():
+    geometry = get_geometry(3, 3)
+    assert geometry.is_full(*cells_to_bits('XOXXOOOXX'))
+    assert not geometry.is_full(*cells_to_bits('XOXXOOOX '))
+
+
+@pytest.mark.parametrize('size, winning_len', [(0, 1), (3, 0), (3, 4)])
+def test_unknown_configuration(size, winning_len):
+    with pytest.raises(InvalidWinningPattern):
+        get_geometry(size, winning_len)
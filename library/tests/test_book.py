@@ -0,0 +1,54 @@
+import pickle
+
+import pytest
+
+from tic_tac_toe.logic.book import VALUE_WIDTH, OpeningBook
+from tic_tac_toe.logic.positiondb import write_position_db
+from tic_tac_toe.logic.solver import LOSS, TIE, WIN
+from tic_tac_toe.one_time.build_opening_book import canonical_openings, search_openings
+
+PLIES = 3
+
+
+@pytest.fixture(scope='module')
+def book_3x3(tmp_path_factory):
+    f_name = str(tmp_path_factory.mktemp('book') / 'opening_book_3_3.ttdb')
+    records = search_openings(canonical_openings(3, 3, PLIES), 3, 3, time_limit=10.0)
+    write_position_db(f_name, 3, 3, PLIES, records, value_width=VALUE_WIDTH)
+    book = OpeningBook(f_name)
+    yield book
+    book.close()
+
+
+def test_book_moves_are_best_moves(book_3x3, positions_3x3, brute_force):
+    probed = 0
+    for me, them in positions_3x3:
+        entry = book_3x3.probe(me, them)
+        if (me | them).bit_count() > PLIES:
+            assert entry is None
+            continue
+        probed += 1
+        score = brute_force(me, them)
+        assert brute_force.move_score(me, them, entry.move) == score
+        assert entry.outcome == (WIN if score > 0 else LOSS if score < 0 else TIE)
+    assert probed == 1 + 9 + 9 * 8 + 9 * 8 // 2 * 7
+
+
+def test_covers(book_3x3):
+    assert book_3x3.covers(3, 3)
+    assert not book_3x3.covers(4, 3)
+
+
+def test_pickles_without_its_map(book_3x3):
+    book_3x3.probe(0, 0)
+    copy = pickle.loads(pickle.dumps(book_3x3))
+    assert copy.f_name == book_3x3.f_name
+    assert copy.probe(0, 0) == book_3x3.probe(0, 0)
+    copy.close()
+
+
+def test_rejects_a_plain_position_db(tmp_path):
+    f_name = str(tmp_path / 'win_loss.ttdb')
+    write_position_db(f_name, 3, 3, 1, [((1, 0), 1)])
+    with pytest.raises(ValueError):
+        OpeningBook(f_name).probe(0, 0)
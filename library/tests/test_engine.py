@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from tic_tac_toe.game.engine import AsyncTicTacToe, TicTacToe
+from tic_tac_toe.game.players import AsyncComputerPlayer, MCTSPlayer, MiniMaxPlayer, Player, RandomComputerPlayer
+from tic_tac_toe.game.renderers import AsyncRenderer, NullRenderer
+from tic_tac_toe.logic.models import GameState, Mark, Move
+from tic_tac_toe.logic.stats import HUMAN, RANDOM, SEARCH, SearchStats
+
+
+class FirstEmptyPlayer(Player):
+    """a player keeping no stats of its own, as a human at the console"""
+
+    def get_move(self, game_state: GameState) -> Move | None:
+        return game_state.make_move_to(game_state.legal_cells[0])
+
+
+class NullAsyncRenderer(AsyncRenderer):
+    async def render(self, game_state: GameState) -> None:
+        pass
+
+
+def check_moves(stats: list[SearchStats], final_state: GameState) -> None:
+    """one stats per move, in order, adding up to the final board"""
+    x_bits, o_bits = final_state.grid.bits
+    assert [entry.ply for entry in stats] == list(range((x_bits | o_bits).bit_count()))
+    assert [entry.mark for entry in stats] == ['X', 'O'] * (len(stats) // 2) + ['X'] * (len(stats) % 2)
+    assert sum(1 << entry.move for entry in stats[::2]) == x_bits
+    assert sum(1 << entry.move for entry in stats[1::2]) == o_bits
+    assert all(entry.seconds > 0 for entry in stats)
+
+
+def test_hook_fires_once_per_move_with_search_counts():
+    stats: list[SearchStats] = []
+    minimax = MiniMaxPlayer('minimax', Mark.CROSS, delay_seconds=0, time_limit=None, max_depth=3)
+    mcts = MCTSPlayer('mcts', Mark.NAUGHT, delay_seconds=0, time_limit=None, max_playouts=200, seed=1)
+    game = TicTacToe(minimax, mcts, NullRenderer(), size=4, winning_len=3, move_hook=stats.append)
+    final_state = game.play()
+    check_moves(stats, final_state)
+    for entry in stats[::2]:
+        assert (entry.player, entry.source) == ('minimax', SEARCH)
+        assert entry.nodes > 0 and entry.table_probes == entry.nodes and entry.max_depth > 0
+        assert entry.cache_misses + entry.cache_hits == 1  # the one move played interns one state
+    for entry in stats[1::2]:
+        assert (entry.player, entry.source, entry.nodes) == ('mcts', SEARCH, 200)
+        assert entry.table_probes == 0 and entry.branching_factor > 1
+    record = json.loads(json.dumps(stats[0].as_dict()))
+    assert record['nodes_per_second'] == stats[0].nodes_per_second
+
+
+def test_players_without_stats_are_timed():
+    stats: list[SearchStats] = []
+    game = TicTacToe(FirstEmptyPlayer('human', Mark.CROSS), RandomComputerPlayer('random', Mark.NAUGHT, 0),
+                     NullRenderer(), size=3, winning_len=3, move_hook=stats.append)
+    check_moves(stats, game.play())
+    assert {entry.source for entry in stats[::2]} == {HUMAN}
+    assert {entry.source for entry in stats[1::2]} == {RANDOM}
+    assert all(entry.nodes == 0 for entry in stats)
+
+
+def test_async_hook_gets_the_executor_stats():
+    stats: list[SearchStats] = []
+    players = [AsyncComputerPlayer(MiniMaxPlayer('minimax', mark, delay_seconds=0, time_limit=None))
+               for mark in (Mark.CROSS, Mark.NAUGHT)]
+    game = AsyncTicTacToe(*players, NullAsyncRenderer(), size=3, winning_len=3, move_hook=stats.append)
+    final_state = asyncio.run(game.play())
+    assert final_state.tie
+    check_moves(stats, final_state)
+    assert all(entry.source == SEARCH and entry.nodes > 0 for entry in stats[:-1])
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.evaluation import LineEvaluator, default_weights
+from tic_tac_toe.logic.minimax import NegamaxSearch
+
+
+def fresh_score(geometry, bits: list[int], side: int) -> int:
+    evaluator = LineEvaluator(geometry)
+    evaluator.reset(*bits)
+    return evaluator.score(side)
+
+
+@pytest.mark.parametrize('size, winning_len', [(3, 3), (4, 3), (5, 4)])
+def test_running_score_matches_a_reset(size, winning_len):
+    geometry = get_geometry(size, winning_len)
+    rng = random.Random(size * 10 + winning_len)
+    for _ in range(20):
+        evaluator = LineEvaluator(geometry)
+        evaluator.reset(0, 0)
+        bits = [0, 0]
+        played: list[tuple[int, int]] = []
+        for _ in range(3 * size ** 2):
+            empty = [cell for cell in range(size ** 2) if not (bits[0] | bits[1]) >> cell & 1]
+            if played and (not empty or rng.random() < 0.3):
+                side, cell = played.pop()
+                evaluator.remove(side, cell)
+                bits[side] &= ~(1 << cell)
+            else:
+                side, cell = len(played) % 2, rng.choice(empty)
+                evaluator.place(side, cell)
+                bits[side] |= 1 << cell
+                played.append((side, cell))
+            for side in (0, 1):
+                assert evaluator.score(side) == fresh_score(geometry, bits, side)
+        while played:  # unmaking everything gets back to the empty board
+            evaluator.remove(*played.pop())
+        assert evaluator.score(0) == 0 and evaluator.counts == ([0] * len(geometry.lines), [0] * len(geometry.lines))
+
+
+def test_search_unmakes_every_move():
+    geometry = get_geometry(5, 4)
+    evaluator = LineEvaluator(geometry)
+    me, them = 0b1000000000001, 0b10
+    result = NegamaxSearch(geometry, time_limit=None, max_depth=3, evaluator=evaluator).search(me, them)
+    assert result.completed
+    fresh = LineEvaluator(geometry)
+    fresh.reset(me, them)
+    assert (evaluator.counts, evaluator.total) == (fresh.counts, fresh.total)
+
+
+def test_line_values():
+    geometry = get_geometry(3, 3)
+    assert default_weights(3) == (0, 1, 4, 16)
+    # the centre is on 4 open lines; a corner blocks the diagonal and keeps its row and column open
+    assert fresh_score(geometry, [0b000010000, 0], 0) == 4
+    assert fresh_score(geometry, [0b000010000, 0b000000001], 0) == 3 - 2
+    assert fresh_score(geometry, [0b000010000, 0b000000001], 1) == 2 - 3
+    with pytest.raises(ValueError):
+        LineEvaluator(geometry, weights=(0, 1, 2))
@@ -0,0 +1,73 @@
+import json
+import multiprocessing
+import os
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.ranking import ResultTable, get_ranker, layer_counts
+from tic_tac_toe.logic.symmetry import get_symmetry
+from tic_tac_toe.one_time import generate_sequences
+
+
+@pytest.fixture
+def on_3x3(monkeypatch):
+    """the module is written for its 5x5 constants, 3x3 keeps a full build small"""
+    monkeypatch.setattr(generate_sequences, 'SIZE', 3)
+    monkeypatch.setattr(generate_sequences, 'WINNING_LEN', 3)
+    monkeypatch.setattr(generate_sequences, 'GEOMETRY', get_geometry(3, 3))
+    monkeypatch.setattr(generate_sequences, 'SYMMETRY', get_symmetry(3))
+
+
+def test_win_loss_db_lookups(tmp_path, on_3x3):
+    chunks = generate_sequences.build_win_loss_db(range(5, 10), str(tmp_path), chunk_size=50)
+    with open(tmp_path / generate_sequences.CHUNK_INDEX) as index_file:
+        index = json.load(index_file)['chunks']
+    assert len(index) == chunks > 1
+    for previous, entry in zip(index, index[1:]):
+        assert previous['last_key'] < entry['first_key']
+    db = generate_sequences.open_win_loss_db(str(tmp_path))
+    for entry, chunk in zip(index, db.chunks):
+        assert (chunk.first_depth, chunk.depth) == (entry['first_depth'], entry['last_depth'])
+        assert 5 <= chunk.first_depth <= chunk.depth <= 9
+    for depth in range(10):
+        for x_bits, o_bits in get_ranker(9, *layer_counts(depth)):
+            expected = generate_sequences.classify(x_bits, o_bits) if depth >= 5 else generate_sequences.NO_RESULT
+            assert generate_sequences.lookup_win_loss(db, x_bits, o_bits) == expected
+
+
+def merged_layer(out_dir: str, depth: int) -> bytes:
+    manifest = generate_sequences.read_manifest(out_dir)
+    shard_count = -(-get_ranker(9, *layer_counts(depth)).size // manifest['shard_size'])
+    data = b''
+    for shard in range(shard_count):
+        with open(generate_sequences.shard_name(out_dir, depth, shard), 'rb') as shard_file:
+            data += shard_file.read()
+    return data
+
+
+def test_parallel_build_resumes_a_lost_shard(tmp_path, on_3x3):
+    if multiprocessing.get_start_method() != 'fork':
+        pytest.skip('the workers see the 3x3 constants only when forked')
+    out_dir = str(tmp_path)
+    depths = range(3, 10)
+    reports = generate_sequences.build_parallel(depths, out_dir, workers=2, shard_size=64)
+    manifest = generate_sequences.read_manifest(out_dir)
+    assert sorted(manifest['shards']) == sorted(f'{report.depth}/{report.shard}' for report in reports)
+    assert len(reports) == sum(-(-get_ranker(9, *layer_counts(depth)).size // 64) for depth in depths) > len(depths)
+    lost = generate_sequences.shard_name(out_dir, 5, 1)
+    kept = {report.f_name: os.stat(report.f_name).st_mtime_ns for report in reports if report.f_name != lost}
+    os.remove(lost)
+    resumed = generate_sequences.build_parallel(depths, out_dir, workers=2, shard_size=64)
+    assert [(report.depth, report.shard) for report in resumed] == [(5, 1)]
+    assert all(os.stat(f_name).st_mtime_ns == mtime for f_name, mtime in kept.items())
+    for depth in depths:
+        ranker = get_ranker(9, *layer_counts(depth))
+        data = merged_layer(out_dir, depth)
+        assert data == generate_sequences.classify_rank_range(ranker, 0, ranker.size)
+        table = ResultTable(ranker, bytearray(data))
+        assert all(table[rank] == generate_sequences.classify(*ranker.unrank(rank)) for rank in range(ranker.size))
+    with pytest.raises(ValueError):
+        generate_sequences.build_parallel(depths, out_dir, workers=2, shard_size=128)
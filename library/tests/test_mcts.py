@@ -0,0 +1,65 @@
+import pytest
+
+from tic_tac_toe.logic.bitboard import cells_to_bits, get_geometry, mask_to_cells
+from tic_tac_toe.logic.mcts import MCTS, Node, find_subtree
+
+
+def search(cells: str, playouts: int = 2000, seed: int = 1):
+    """MCTS for X to move on a 3x3 board"""
+    geometry = get_geometry(3, 3)
+    me, them = cells_to_bits(cells)
+    root = Node(geometry, me, them)
+    return root, MCTS(geometry, time_limit=None, max_playouts=playouts, seed=seed).search(root)
+
+
+def test_takes_the_win():
+    _, result = search('XX OO    ')
+    assert result.move == 2
+    assert result.win_rate > 0.9
+
+
+def test_blocks_the_loss():
+    _, result = search('X  OO   X')
+    assert result.move == 5
+
+
+def test_visits_add_up():
+    root, result = search('         ', playouts=500)
+    assert result.playouts == 500
+    assert root.visits == 500
+    assert sum(child.visits for child in root.children) == 500
+    assert sorted(child.move for child in root.children) == list(range(9))
+    assert result.max_depth >= 2
+    assert result.branching_factor > 1
+
+
+def test_zero_budget_still_moves():
+    geometry = get_geometry(5, 4)
+    result = MCTS(geometry, time_limit=None, max_playouts=0).search(Node(geometry, 0, 1))
+    assert result.move in mask_to_cells(geometry.full_mask & ~1)
+
+
+def test_needs_a_budget():
+    with pytest.raises(ValueError):
+        MCTS(get_geometry(3, 3), time_limit=None, max_playouts=None)
+
+
+def test_reuses_the_subtree_of_the_moves_played():
+    geometry = get_geometry(3, 3)
+    root, result = search('         ', playouts=2000)
+    reply = next(cell for cell in range(9) if cell != result.move)
+    # X played result.move, then O replied: X is to move again, two plies below the old root
+    me, them = 1 << result.move, 1 << reply
+    subtree = find_subtree(root, me, them)
+    assert subtree is not None and subtree.parent is None
+    visits = subtree.visits
+    assert visits > 0
+    second = MCTS(geometry, time_limit=None, max_playouts=100, seed=2).search(subtree)
+    assert second.reused_visits == visits
+    assert subtree.visits == visits + 100
+
+
+def test_unknown_position_has_no_subtree():
+    root, _ = search('         ', playouts=50)
+    assert find_subtree(root, 0b111, 0b111000) is None
+    assert find_subtree(None, 0, 0) is None
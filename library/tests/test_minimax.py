@@ -0,0 +1,114 @@
+from tic_tac_toe.logic import minimax
+from tic_tac_toe.logic.bitboard import get_geometry, mask_to_cells
+from tic_tac_toe.logic.minimax import WIN_SCORE, WIN_THRESHOLD, NegamaxSearch, TranspositionTable
+from tic_tac_toe.logic.solver import LOSS, Solver, pack
+
+
+def test_negamax_matches_brute_force(geometry_3x3, positions_3x3, brute_force):
+    for me, them in positions_3x3:
+        result = NegamaxSearch(geometry_3x3).search(me, them)
+        assert result.completed
+        assert result.score == brute_force(me, them)
+        assert brute_force.move_score(me, them, result.move) == result.score
+
+
+def test_shared_table_matches_brute_force(geometry_3x3, positions_3x3, brute_force):
+    # a player keeps one table for a whole game; a small one also exercises eviction
+    table = TranspositionTable(capacity=256)
+    for me, them in positions_3x3:
+        result = NegamaxSearch(geometry_3x3, table=table).search(me, them)
+        assert result.score == brute_force(me, them)
+        assert brute_force.move_score(me, them, result.move) == result.score
+    assert len(table) <= 256
+
+
+def test_empty_board_is_a_draw(geometry_3x3):
+    result = NegamaxSearch(geometry_3x3).search(0, 0)
+    assert result.completed and result.score == 0
+    assert result.depth == 9
+
+
+def test_budget_still_answers_a_legal_move():
+    geometry = get_geometry(5, 4)
+    result = NegamaxSearch(geometry, max_nodes=200).search(0, 1 << 12)
+    assert not result.completed
+    assert result.move in mask_to_cells(geometry.full_mask & ~(1 << 12))
+    assert abs(result.score) < WIN_THRESHOLD
+
+
+def test_depth_limited_search_finds_the_immediate_win():
+    geometry = get_geometry(5, 4)
+    me = 1 << 0 | 1 << 1 | 1 << 2
+    them = 1 << 5 | 1 << 6 | 1 << 7
+    result = NegamaxSearch(geometry, max_depth=2).search(me, them)
+    assert result.move == 3
+    assert result.score > WIN_THRESHOLD
+
+
+class UnorderedSearch(NegamaxSearch):
+    """cells lowest first, with no table move, killers or history"""
+
+    def ordered_moves(self, empty: int, table_move: int, ply: int) -> list[int]:
+        return mask_to_cells(empty)
+
+
+def test_move_ordering_keeps_the_score(geometry_3x3, positions_3x3):
+    for me, them in positions_3x3:
+        assert NegamaxSearch(geometry_3x3).search(me, them).score == UnorderedSearch(geometry_3x3).search(me, them).score
+    geometry = get_geometry(4, 3)
+    for me, them in ((0, 0), (0, 1 << 5), (1 << 0, 1 << 5), (1 << 0 | 1 << 10, 1 << 5 | 1 << 15)):
+        ordered = NegamaxSearch(geometry, max_depth=4).search(me, them)
+        unordered = UnorderedSearch(geometry, max_depth=4).search(me, them)
+        assert ordered.score == unordered.score
+        assert ordered.nodes < unordered.nodes
+
+
+class ExpiringSearch(NegamaxSearch):
+    """runs out of time as soon as the iteration after expire_after starts"""
+
+    def __init__(self, geometry, expire_after: int, **options) -> None:
+        super().__init__(geometry, time_limit=60.0, **options)
+        self.expire_after = expire_after
+        self.iterations: list[tuple[int, int]] = []
+
+    def search_root(self, me: int, them: int, depth: int, previous_best: int) -> tuple[int, int]:
+        best_move, best_score = super().search_root(me, them, depth, previous_best)
+        self.iterations.append((best_move, best_score))
+        if depth == self.expire_after:
+            self.deadline = 0.0
+        return best_move, best_score
+
+
+def test_deadline_answers_the_last_completed_iteration(monkeypatch):
+    monkeypatch.setattr(minimax, 'TIME_CHECK_INTERVAL', 1)
+    geometry = get_geometry(5, 4)
+    me, them = 1 << 12 | 1 << 6, 1 << 7 | 1 << 18
+    for expire_after in (1, 2, 3):
+        search = ExpiringSearch(geometry, expire_after)
+        result = search.search(me, them)
+        assert len(search.iterations) == expire_after
+        assert (result.move, result.score) == search.iterations[-1]
+        assert result.depth == expire_after and not result.completed
+        limited = NegamaxSearch(geometry, max_depth=expire_after).search(me, them)
+        assert (result.move, result.score) == (limited.move, limited.score)
+
+
+def test_real_deadline_is_kept():
+    geometry = get_geometry(5, 4)
+    result = NegamaxSearch(geometry, time_limit=0.05).search(1 << 12, 1 << 6)
+    assert not result.completed
+    assert result.seconds < 1.0
+    assert result.depth >= 1
+
+
+def test_stops_at_the_shortest_forced_win():
+    # X wins 4x4 / 3 from the empty board in 5 plies: the deepening stops there instead of going on to 16
+    geometry = get_geometry(4, 3)
+    table = TranspositionTable()
+    result = NegamaxSearch(geometry, table=table).search(0, 0)
+    assert (result.score, result.depth, result.completed) == (WIN_SCORE - 5, 5, True)
+    # the forced win is over by the fifth mark, so the solver needs to look no further to confirm it
+    assert Solver(geometry, max_depth=6).value(0, 1 << result.move) == pack(LOSS, 4)
+    # a second search on the same table, which now holds deeper entries, still finds the 5 ply win
+    again = NegamaxSearch(geometry, table=table).search(0, 0)
+    assert (again.score, again.depth) == (WIN_SCORE - 5, 5)
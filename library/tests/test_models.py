@@ -0,0 +1,89 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.mcts import MCTS, Node
+from tic_tac_toe.logic.minimax import NegamaxSearch
+from tic_tac_toe.logic.models import GameState, Grid, Mark, StateCache, state_cache
+from tic_tac_toe.logic.solver import TIE, Solver, outcome_of
+
+
+def test_moves_are_built_lazily():
+    game_state = GameState(Grid(size=3, winning_len=3, cells='X O      '))
+    assert game_state.empty_cells == (1, 3, 4, 5, 6, 7, 8)
+    state_cache.clear()
+    moves = game_state.iter_moves()
+    assert state_cache.misses == 0
+    move = next(moves)
+    assert (move.place, move.mark, state_cache.misses) == (1, Mark.CROSS, 1)
+    assert [move.place for move in game_state.possible_moves] == list(game_state.legal_cells)
+
+
+def test_no_moves_once_the_game_is_over():
+    won = GameState(Grid(size=3, winning_len=3, cells='XXXOO    '))
+    assert won.empty_cells == (5, 6, 7, 8)
+    assert won.legal_cells == () and won.possible_moves == [] and list(won.iter_moves()) == []
+
+
+def test_search_code_makes_and_unmakes_on_bitboards(monkeypatch):
+    # the searches play moves by or-ing bits into (me, them) ints and unmake them by dropping the copy, so a
+    # mutable board object would add nothing: not a single game state is built exploring the whole 3x3 tree
+    def no_states(*args, **kwargs):
+        raise AssertionError('search built a GameState')
+
+    monkeypatch.setattr(GameState, '__init__', no_states)
+    geometry = get_geometry(3, 3)
+    assert NegamaxSearch(geometry, time_limit=None).search(0, 0).score == 0
+    assert outcome_of(Solver(geometry).solve(0, 0).value) == TIE
+    assert MCTS(geometry, time_limit=None, max_playouts=200).search(Node(geometry, 0, 0)).playouts == 200
+    with pytest.raises(AssertionError):
+        GameState(Grid(size=3, winning_len=3))
+
+
+def play(game_state: GameState, cells: list[int]) -> GameState:
+    for cell in cells:
+        game_state = game_state.make_move_to(cell).after_gamestate
+    return game_state
+
+
+def test_transpositions_are_one_object():
+    start = GameState(Grid(size=4, winning_len=3))
+    first = play(start, [0, 5, 10, 15])
+    assert play(start, [10, 15, 0, 5]) is first
+    assert play(start, [10, 5, 0, 15]) is first
+    assert play(start, [5, 0, 15, 10]) is not first  # the marks swapped
+    assert play(GameState(Grid(size=4, winning_len=3), starting_mark=Mark.NAUGHT), [0, 5, 10, 15]) is not first
+    assert play(GameState(Grid(size=4, winning_len=4)), [0, 5, 10, 15]) is not first
+
+
+def test_least_recently_used_is_evicted_first():
+    geometry = get_geometry(3, 3)
+    cache = StateCache(capacity=3)
+    states = [cache.get(geometry, 1 << cell) for cell in range(3)]
+    assert cache.get(geometry, 1 << 0) is states[0]  # 1 is now the least recently used
+    cache.get(geometry, 1 << 3)
+    assert (len(cache), cache.hits, cache.misses) == (3, 1, 4)
+    assert cache.get(geometry, 1 << 0) is states[0] and cache.get(geometry, 1 << 2) is states[2]
+    assert cache.get(geometry, 1 << 1) is not states[1]
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_shared_between_threads():
+    geometry = get_geometry(4, 3)
+    cache = StateCache(capacity=64)
+    boards = [random.Random(seed).getrandbits(16) for seed in range(200)]
+
+    def lookups(seed: int) -> list[GameState]:
+        rng = random.Random(seed)
+        return [cache.get(geometry, rng.choice(boards)) for _ in range(5000)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lookups, range(8)))
+    assert cache.hits + cache.misses == 8 * 5000
+    assert len(cache) == 64
+    for states in results:
+        for state in states:
+            assert state.grid.geometry is geometry
@@ -0,0 +1,96 @@
+import os
+import random
+import shutil
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import cells_to_bits
+from tic_tac_toe.logic.positiondb import (HEADER, UNKNOWN, PositionDB, mark_range, pack_bits, unpack_key,
+                                          write_position_db)
+from tic_tac_toe.logic.symmetry import get_symmetry
+from tic_tac_toe.one_time.convert_seq_db import DB_HOME, convert
+
+
+def random_records(rng: random.Random, cell_count: int, count: int) -> list[tuple[tuple[int, int], int]]:
+    records = []
+    for _ in range(count):
+        cells = rng.sample(range(cell_count), rng.randint(0, cell_count))
+        split = (len(cells) + 1) // 2
+        records.append(((sum(1 << cell for cell in cells[:split]), sum(1 << cell for cell in cells[split:])),
+                        rng.randrange(4)))
+    return records
+
+
+def test_key_round_trip():
+    rng = random.Random(1)
+    for (x_bits, o_bits), _ in random_records(rng, 25, 200):
+        assert unpack_key(pack_bits(x_bits, o_bits, 25), 25) == (x_bits, o_bits)
+
+
+def test_round_trip(tmp_path):
+    f_name = str(tmp_path / 'plain.ttdb')
+    records = random_records(random.Random(2), 16, 500)
+    first_values = {}
+    for position, value in records:
+        first_values.setdefault(position, value)
+    assert write_position_db(f_name, size=4, winning_len=3, depth=16, records=records, canonical=False) == \
+        len(first_values)
+    with PositionDB(f_name) as position_db:
+        assert (position_db.size, position_db.winning_len, position_db.depth) == (4, 3, 16)
+        assert not position_db.canonical
+        assert dict(position_db) == first_values
+        for (x_bits, o_bits), value in first_values.items():
+            assert position_db.lookup(x_bits, o_bits) == value
+        assert position_db.lookup_cells('XXXXOOOOXXXXOOOO') == first_values.get(cells_to_bits('XXXXOOOOXXXXOOOO'))
+
+
+def test_canonical_lookup_from_any_orientation(tmp_path):
+    f_name = str(tmp_path / 'canonical.ttdb')
+    symmetry = get_symmetry(3)
+    records = [(cells_to_bits('X   O    '), 1), (cells_to_bits('XO  X   O'), 2)]
+    assert write_position_db(f_name, size=3, winning_len=3, depth=3, records=records, first_depth=2) == 2
+    with PositionDB(f_name) as position_db:
+        assert position_db.canonical
+        assert (position_db.first_depth, position_db.depth) == (2, 3)
+        for (x_bits, o_bits), value in records:
+            for transform in range(8):
+                assert position_db.lookup(symmetry.transform(x_bits, transform),
+                                          symmetry.transform(o_bits, transform)) == value
+        assert position_db.lookup_cells('    X    ') is None
+
+
+def test_converted_depths_bound_the_marks(tmp_path):
+    # seq_db_X_3_O_3 holds the positions after X's and O's third moves, 5 and 6 marks
+    f_name = str(tmp_path / 'seq_db_X_3_O_3')
+    shutil.copy(os.path.join(DB_HOME, 'seq_db_X_3_O_3'), f_name)
+    with PositionDB(convert(f_name)) as position_db:
+        assert (position_db.first_depth, position_db.depth) == (5, 6)
+        assert mark_range(position_db) == (5, 6)
+    assert mark_range([]) == (0, 0)
+
+
+def test_external_sort_matches_in_memory_sort(tmp_path):
+    records = random_records(random.Random(3), 25, 3000)
+    records += records[:100]  # repeated positions keep their first value, whichever run they fall in
+    in_memory, spilled = str(tmp_path / 'in_memory.ttdb'), str(tmp_path / 'spilled.ttdb')
+    count = write_position_db(in_memory, size=5, winning_len=4, depth=25, records=records)
+    assert write_position_db(spilled, size=5, winning_len=4, depth=25, records=records, run_size=97) == count
+    with open(in_memory, 'rb') as first, open(spilled, 'rb') as second:
+        assert first.read() == second.read()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['in_memory.ttdb', 'spilled.ttdb']
+
+
+def test_value_width(tmp_path):
+    f_name = str(tmp_path / 'wide.ttdb')
+    write_position_db(f_name, size=3, winning_len=3, depth=1, records=[((1, 0), 0x1234), ((0, 0), UNKNOWN)],
+                      value_width=2)
+    with PositionDB(f_name) as position_db:
+        assert position_db.lookup(1, 0) == 0x1234
+        assert position_db.lookup(0, 0) == UNKNOWN
+
+
+def test_rejects_other_files(tmp_path):
+    f_name = tmp_path / 'other.ttdb'
+    f_name.write_bytes(b'\0' * HEADER.size)
+    with pytest.raises(ValueError):
+        PositionDB(str(f_name))
@@ -0,0 +1,59 @@
+from math import comb
+
+import pytest
+
+from tic_tac_toe.logic.ranking import ResultTable, get_ranker, layer_counts
+
+LAYERS = [(9, 0, 0), (9, 1, 0), (9, 3, 2), (9, 5, 4), (16, 3, 2), (25, 2, 2)]
+
+
+@pytest.mark.parametrize('cell_count, x_count, o_count', LAYERS)
+def test_rank_unrank_round_trip(cell_count, x_count, o_count):
+    ranker = get_ranker(cell_count, x_count, o_count)
+    assert len(ranker) == comb(cell_count, x_count + o_count) * comb(x_count + o_count, x_count)
+    boards = list(ranker)
+    assert len(boards) == len(ranker) == len(set(boards))
+    for rank, (x_bits, o_bits) in enumerate(boards):
+        assert x_bits & o_bits == 0
+        assert (x_bits.bit_count(), o_bits.bit_count()) == (x_count, o_count)
+        assert ranker.rank(x_bits, o_bits) == rank
+        assert ranker.unrank(rank) == (x_bits, o_bits)
+
+
+@pytest.mark.parametrize('cell_count, x_count, o_count', LAYERS)
+def test_iter_range_matches_unrank(cell_count, x_count, o_count):
+    ranker = get_ranker(cell_count, x_count, o_count)
+    start, stop = len(ranker) // 3, len(ranker) // 3 + 50
+    expected = [ranker.unrank(rank) for rank in range(start, min(stop, len(ranker)))]
+    assert list(ranker.iter_range(start, stop)) == expected
+
+
+def test_unrank_out_of_range():
+    ranker = get_ranker(9, 1, 1)
+    with pytest.raises(IndexError):
+        ranker.unrank(len(ranker))
+
+
+def test_layer_counts():
+    assert [layer_counts(depth) for depth in range(5)] == [(0, 0), (1, 0), (1, 1), (2, 1), (2, 2)]
+
+
+def test_result_table_round_trip(tmp_path):
+    ranker = get_ranker(9, 3, 2)
+    table = ResultTable(ranker)
+    for rank, (x_bits, o_bits) in enumerate(ranker):
+        table.set(x_bits, o_bits, rank % 4)
+    f_name = str(tmp_path / 'table')
+    table.save(f_name)
+    loaded = ResultTable.load(f_name)
+    assert len(loaded) == len(ranker)
+    assert [loaded.get(x_bits, o_bits) for x_bits, o_bits in ranker] == [rank % 4 for rank in range(len(ranker))]
+
+
+def test_result_table_rejects_a_truncated_file(tmp_path):
+    f_name = str(tmp_path / 'table')
+    ResultTable(get_ranker(9, 3, 2)).save(f_name)
+    with open(f_name, 'rb+') as table_file:
+        table_file.truncate(table_file.seek(0, 2) - 1)
+    with pytest.raises(ValueError):
+        ResultTable.load(f_name)
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from tic_tac_toe.logic.models import GameState, Grid, Mark
+from tic_tac_toe.logic.records import FILE_HEADER, GameRecord, GameRecorder, by_opening, by_player, read_records
+
+
+def random_game(rng: random.Random, size: int, winning_len: int, starting_mark: Mark) -> tuple[GameState, list[int]]:
+    game_state = GameState(Grid(size=size, winning_len=winning_len), starting_mark=starting_mark)
+    moves = []
+    while not game_state.game_over:
+        moves.append(rng.choice(game_state.legal_cells))
+        game_state = game_state.make_move_to(moves[-1]).after_gamestate
+    return game_state, moves
+
+
+def random_records(count: int) -> list[GameRecord]:
+    rng = random.Random(count)
+    records = []
+    for game in range(count):
+        starting_mark = Mark.CROSS if game % 2 == 0 else Mark.NAUGHT
+        game_state, moves = random_game(rng, 3 + game % 3, 3, starting_mark)
+        records.append(GameRecord.from_game(game_state, moves, 'random-X', 'rändom-O'))
+    return records
+
+
+def test_round_trip(tmp_path):
+    f_name = str(tmp_path / 'games.ttgr')
+    records = random_records(100)
+    with GameRecorder(f_name) as recorder:
+        for record in records[:60]:
+            recorder.write(record)
+    with GameRecorder(f_name) as recorder:  # appends after the existing records
+        for record in records[60:]:
+            recorder.write(record)
+        assert recorder.count == 40
+    assert list(read_records(f_name)) == records
+
+
+def test_replay_reaches_the_final_state():
+    rng = random.Random(5)
+    game_state, moves = random_game(rng, 4, 3, Mark.NAUGHT)
+    record = GameRecord.from_game(game_state, moves, 'a', 'b')
+    states = list(record.replay())
+    assert len(states) == len(moves) + 1
+    assert record.final_state() == game_state
+    assert record.final_state().winner is record.winner
+
+
+def test_truncated_tail_is_skipped(tmp_path):
+    f_name = str(tmp_path / 'games.ttgr')
+    records = random_records(10)
+    with GameRecorder(f_name) as recorder:
+        for record in records:
+            recorder.write(record)
+    size = (tmp_path / 'games.ttgr').stat().st_size
+    last = len(records[-1].encode())
+    for cut in (1, last // 2, last - 1):
+        with open(f_name, 'rb+') as log_file:
+            log_file.truncate(size - cut)
+        assert list(read_records(f_name)) == records[:-1]
+    with open(f_name, 'rb+') as log_file:
+        log_file.truncate(size - last)
+    assert list(read_records(f_name)) == records[:-1]
+
+
+def test_appending_after_a_truncated_tail(tmp_path):
+    f_name = str(tmp_path / 'games.ttgr')
+    records = random_records(10)
+    with GameRecorder(f_name) as recorder:
+        for record in records[:5]:
+            recorder.write(record)
+    with open(f_name, 'rb+') as log_file:
+        log_file.truncate(log_file.seek(0, 2) - 3)  # a crash while writing the fifth record
+    with GameRecorder(f_name) as recorder:
+        for record in records[5:]:
+            recorder.write(record)
+    assert list(read_records(f_name)) == records[:4] + records[5:]
+
+
+def test_reopening_a_complete_log_keeps_it(tmp_path):
+    f_name = tmp_path / 'games.ttgr'
+    with GameRecorder(str(f_name)) as recorder:
+        for record in random_records(3):
+            recorder.write(record)
+    contents = f_name.read_bytes()
+    GameRecorder(str(f_name)).close()
+    assert f_name.read_bytes() == contents
+
+
+def test_full_16x16_game(tmp_path):
+    f_name = str(tmp_path / 'games.ttgr')
+    record = GameRecord(size=16, winning_len=16, starting_mark=Mark.CROSS, winner=None, player_x='x', player_o='o',
+                        moves=tuple(range(256)))
+    with GameRecorder(f_name) as recorder:
+        recorder.write(record)
+    assert list(read_records(f_name)) == [record]
+
+
+def test_encode_limits():
+    with pytest.raises(ValueError):
+        GameRecord(size=17, winning_len=3, starting_mark=Mark.CROSS, winner=None, player_x='x', player_o='o',
+                   moves=()).encode()
+    with pytest.raises(ValueError):
+        GameRecord(size=3, winning_len=3, starting_mark=Mark.CROSS, winner=None, player_x='x' * 256, player_o='o',
+                   moves=()).encode()
+
+
+def test_rejects_other_files(tmp_path):
+    f_name = tmp_path / 'other.ttgr'
+    f_name.write_bytes(FILE_HEADER.pack(b'TTDB', 2))
+    with pytest.raises(ValueError):
+        list(read_records(str(f_name)))
+    with pytest.raises(ValueError):
+        GameRecorder(str(f_name))
+
+
+def test_tallies():
+    records = [
+        GameRecord(3, 3, Mark.CROSS, Mark.CROSS, 'a', 'b', (0, 4, 1, 5, 2)),
+        GameRecord(3, 3, Mark.CROSS, Mark.NAUGHT, 'a', 'b', (8, 4, 1, 0, 2, 3, 7, 6)),
+        GameRecord(3, 3, Mark.NAUGHT, None, 'b', 'a', (4, 0, 8, 2, 1, 7, 3, 5, 6)),
+    ]
+    openings = by_opening(records)
+    assert sorted(openings) == [(3, 3, 0), (3, 3, 4), (3, 3, 8)]
+    corners = by_opening(records, canonical=True)
+    assert len(corners) == 2
+    corner = next(tally for (_, _, cell), tally in corners.items() if cell != 4)
+    assert (corner.games, corner.wins, corner.losses) == (2, 1, 1)
+    players = by_player(records)
+    assert (players['a'].games, players['a'].wins, players['a'].draws, players['a'].losses) == (3, 1, 1, 1)
+    assert players['b'].win_rate == pytest.approx(1 / 3)
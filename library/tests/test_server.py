@@ -0,0 +1,81 @@
+import asyncio
+
+from tic_tac_toe.game.players import resident_players
+from tic_tac_toe.game.server import MAX_LINE, SessionManager, play_random_client
+from tic_tac_toe.logic.models import Mark
+
+
+async def with_server(client, **options):
+    """runs client(manager, port) against a server on a free port"""
+    manager = SessionManager(**options)
+    server = await manager.serve(port=0)
+    try:
+        return await client(manager, server.sockets[0].getsockname()[1])
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+async def read_lines(reader: asyncio.StreamReader) -> list[str]:
+    lines = []
+    while line := await asyncio.wait_for(reader.readline(), 5):
+        lines.append(line.decode('ascii').strip())
+        if lines[-1].startswith('OVER'):
+            break
+    return lines
+
+
+def test_game_against_minimax():
+    async def client(manager, port):
+        results = [await play_random_client('127.0.0.1', port, 'minimax', 3, 3, mark)
+                   for mark in (Mark.CROSS, Mark.NAUGHT)]
+        await asyncio.sleep(0.1)  # lets the finished games release their players
+        return manager, results
+
+    manager, results = asyncio.run(with_server(client))
+    # random moves never beat a full width search on 3x3
+    assert results[0] in ('O', 'TIE') and results[1] in ('X', 'TIE')
+    assert manager.finished == 2 and not manager.sessions
+    assert not resident_players
+
+
+def test_move_timeout():
+    async def client(manager, port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'NEW random 3 3 X\n')
+        lines = await read_lines(reader)
+        writer.close()
+        return lines
+
+    lines = asyncio.run(with_server(client, move_timeout=0.2))
+    assert lines == ['GAME 1 X', 'STATE 1 ......... X', 'OVER 1 TIMEOUT']
+
+
+def test_errors_keep_the_connection():
+    async def client(manager, port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        lines = []
+        for command in (b'JUMP\n', b'NEW nobody\n', b'NEW random 3 4\n', b'MOVE 7 0\n'):
+            writer.write(command)
+            lines.append((await asyncio.wait_for(reader.readline(), 5)).decode('ascii').strip())
+        writer.close()
+        return lines
+
+    lines = asyncio.run(with_server(client))
+    assert all(line.startswith('ERR ') for line in lines)
+    assert lines[0] == 'ERR Unknown command JUMP'
+    assert lines[3] == 'ERR No game 7 in play on this connection'
+
+
+def test_over_long_line_closes_the_connection():
+    async def client(manager, port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'X' * (MAX_LINE * 2) + b'\n')
+        reply = await asyncio.wait_for(reader.readline(), 5)
+        closed = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return reply, closed
+
+    reply, closed = asyncio.run(with_server(client))
+    assert reply == f'ERR Line longer than {MAX_LINE} bytes\n'.encode('ascii')
+    assert closed == b''
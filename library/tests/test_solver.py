@@ -0,0 +1,66 @@
+import pytest
+
+from tic_tac_toe.logic.bitboard import get_geometry
+from tic_tac_toe.logic.minimax import WIN_SCORE
+from tic_tac_toe.logic.solver import LOSS, TIE, UNKNOWN, WIN, Solver, distance_of, load_table, outcome_of, pack, \
+    save_table
+
+
+def to_score(value: int) -> int:
+    """a solver value as a logic/minimax score"""
+    outcome, distance = outcome_of(value), distance_of(value)
+    return {WIN: WIN_SCORE - distance, LOSS: distance - WIN_SCORE, TIE: 0}[outcome]
+
+
+@pytest.fixture(scope='module')
+def solver_3x3(geometry_3x3):
+    solver = Solver(geometry_3x3)
+    solver.solve(0, 0)
+    return solver
+
+
+def test_solver_matches_brute_force(solver_3x3, positions_3x3, brute_force):
+    for me, them in positions_3x3:
+        assert to_score(solver_3x3.value(me, them)) == brute_force(me, them)
+
+
+def test_every_position_is_solved_once(solver_3x3, positions_3x3):
+    nodes = solver_3x3.nodes
+    for me, them in positions_3x3:
+        solver_3x3.value(me, them)
+    assert solver_3x3.nodes == nodes
+    # every reachable 3x3 position up to symmetry, terminal ones included
+    assert len(solver_3x3.table) == 765
+
+
+def test_empty_board_is_a_draw(solver_3x3):
+    assert solver_3x3.solve(0, 0).value == pack(TIE, 9)
+
+
+def test_solve_a_lost_position(geometry_3x3):
+    assert Solver(geometry_3x3).solve(0b000010010, 0b000000111).value == pack(LOSS, 0)
+
+
+def test_solve_rejects_a_won_side_to_move(geometry_3x3):
+    with pytest.raises(ValueError):
+        Solver(geometry_3x3).solve(0b000000111, 0b000011000)
+
+
+def test_depth_limit_leaves_positions_unknown():
+    solver = Solver(get_geometry(4, 3), max_depth=5)
+    # 4x4 with 3 in a row is a first player win within the limit
+    assert solver.value(0, 0) == pack(WIN, 5)
+    # positions with max_depth marks are not searched, those short of it still see a win on the next move
+    assert outcome_of(solver.value(0b00011, 0b110000 | 1 << 10)) == UNKNOWN
+    assert solver.value(0b0011, 0b110000) == pack(WIN, 1)
+    assert outcome_of(Solver(get_geometry(5, 4), max_depth=3).value(0, 0)) == UNKNOWN
+
+
+def test_saved_table_best_moves(tmp_path, solver_3x3, positions_3x3, brute_force):
+    f_name = str(tmp_path / 'table_3_3.pickle')
+    save_table(f_name, solver_3x3)
+    table = load_table(f_name)
+    assert (table.size, table.winning_len, table.max_depth, len(table)) == (3, 3, 9, len(solver_3x3.table))
+    for me, them in positions_3x3:
+        best = table.best_move(me, them)
+        assert brute_force.move_score(me, them, best) == brute_force(me, them)
@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from tic_tac_toe.logic.bitboard import cells_to_bits
+from tic_tac_toe.logic.symmetry import IDENTITY, get_symmetry
+
+SIZES = [3, 4, 5, 7]  # 7x7 spreads a bitboard over several lookup chunks
+
+
+def reference_transform(bits: int, permutation: tuple[int, ...]) -> int:
+    """one shift per cell, as a check on the chunked lookup tables"""
+    return sum(1 << permutation[cell] for cell in range(len(permutation)) if bits >> cell & 1)
+
+
+def random_position(rng: random.Random, cell_count: int) -> tuple[int, int]:
+    cells = rng.sample(range(cell_count), rng.randint(0, cell_count))
+    split = len(cells) // 2
+    return sum(1 << cell for cell in cells[:split]), sum(1 << cell for cell in cells[split:])
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_permutations_form_the_square_group(size):
+    symmetry = get_symmetry(size)
+    permutations = set(symmetry.permutations)
+    assert len(permutations) == 8
+    assert symmetry.permutations[IDENTITY] == tuple(range(size ** 2))
+    for first in permutations:
+        for second in permutations:
+            assert tuple(second[cell] for cell in first) in permutations
+
+
+def test_quarter_turn_moves_the_corner_clockwise():
+    assert get_symmetry(3).permutations[1][0] == 2
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_canonical_key_is_invariant(size):
+    symmetry = get_symmetry(size)
+    rng = random.Random(size)
+    for _ in range(200):
+        first, second = random_position(rng, size ** 2)
+        keys = set()
+        for permutation in symmetry.permutations:
+            keys.add(symmetry.canonical_key(reference_transform(first, permutation),
+                                            reference_transform(second, permutation)))
+        assert len(keys) == 1
+        smallest = min(reference_transform(first, permutation) << size ** 2 | reference_transform(second, permutation)
+                       for permutation in symmetry.permutations)
+        assert keys == {smallest}
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_transform_matches_reference(size):
+    symmetry = get_symmetry(size)
+    rng = random.Random(size)
+    for _ in range(200):
+        bits = random_position(rng, size ** 2)[0]
+        for transform, permutation in enumerate(symmetry.permutations):
+            assert symmetry.transform(bits, transform) == reference_transform(bits, permutation)
+
+
+@pytest.mark.parametrize('size', SIZES)
+def test_cells_map_to_and_from_the_canonical_orientation(size):
+    symmetry = get_symmetry(size)
+    rng = random.Random(size)
+    for _ in range(50):
+        first, second = random_position(rng, size ** 2)
+        key, transform = symmetry.canonical(first, second)
+        canonical_first, canonical_second = symmetry.split_key(key)
+        assert symmetry.transform(first, transform) == canonical_first
+        assert symmetry.transform(second, transform) == canonical_second
+        for cell in range(size ** 2):
+            canonical_cell = symmetry.to_canonical_cell(cell, transform)
+            assert symmetry.from_canonical_cell(canonical_cell, transform) == cell
+            assert (first >> cell & 1) == (canonical_first >> canonical_cell & 1)
+
+
+def test_canonical_cells():
+    symmetry = get_symmetry(3)
+    corners = {symmetry.canonical_cells(cells) for cells in ('X        ', '  X      ', '      X  ', '        X')}
+    assert len(corners) == 1
+    assert cells_to_bits(corners.pop()) == symmetry.split_key(symmetry.canonical_key(1, 0))
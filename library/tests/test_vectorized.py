@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from tic_tac_toe.logic.bitboard import bits_to_cells, get_geometry
+from tic_tac_toe.logic.ranking import get_ranker
+from tic_tac_toe.logic.vectorized import CROSS, NAUGHT, NO_WINNER, boards_from_bits, boards_from_cells, \
+    classify_boards, unrank_boards
+
+CONFIGURATIONS = [(3, 3), (4, 3), (5, 4)]
+
+
+def random_position(rng: random.Random, cell_count: int) -> tuple[int, int]:
+    cells = rng.sample(range(cell_count), rng.randint(0, cell_count))
+    split = (len(cells) + 1) // 2
+    return sum(1 << cell for cell in cells[:split]), sum(1 << cell for cell in cells[split:])
+
+
+@pytest.mark.parametrize('size, winning_len', CONFIGURATIONS)
+def test_classify_matches_bitboards(size, winning_len):
+    geometry = get_geometry(size, winning_len)
+    rng = random.Random(size)
+    positions = [random_position(rng, size ** 2) for _ in range(2000)]
+    # X is checked first, as generate_sequences.classify does
+    positions = [(x_bits, o_bits) for x_bits, o_bits in positions
+                 if not (geometry.has_line(x_bits) and geometry.has_line(o_bits))]
+    winner, tie = classify_boards(boards_from_cells([bits_to_cells(x_bits, o_bits, size ** 2)
+                                                     for x_bits, o_bits in positions]), size, winning_len)
+    for (x_bits, o_bits), found_winner, found_tie in zip(positions, winner, tie):
+        expected = CROSS if geometry.has_line(x_bits) else NAUGHT if geometry.has_line(o_bits) else NO_WINNER
+        assert found_winner == expected
+        assert found_tie == (expected == NO_WINNER and geometry.is_full(x_bits, o_bits))
+
+
+def test_boards_from_bits_matches_cells():
+    rng = random.Random(7)
+    positions = [random_position(rng, 25) for _ in range(100)]
+    x_bits = np.array([x for x, _ in positions], dtype=np.uint64)
+    o_bits = np.array([o for _, o in positions], dtype=np.uint64)
+    expected = boards_from_cells([bits_to_cells(x, o, 25) for x, o in positions])
+    assert (boards_from_bits(x_bits, o_bits, 25) == expected).all()
+
+
+@pytest.mark.parametrize('cell_count, x_count, o_count', [(9, 3, 2), (16, 2, 2), (25, 4, 3)])
+def test_unrank_boards_matches_ranker(cell_count, x_count, o_count):
+    ranker = get_ranker(cell_count, x_count, o_count)
+    ranks = np.unique(np.random.default_rng(cell_count).integers(0, len(ranker), 500))
+    boards = unrank_boards(ranker, ranks)
+    expected = boards_from_cells([bits_to_cells(*ranker.unrank(int(rank)), cell_count) for rank in ranks])
+    assert (boards == expected).all()
+
+
+def test_rejects_boards_of_another_size():
+    with pytest.raises(ValueError):
+        classify_boards(np.zeros((2, 16), dtype=np.uint8), 3, 3)